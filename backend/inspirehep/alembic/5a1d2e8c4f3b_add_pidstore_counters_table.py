@@ -0,0 +1,35 @@
+#
+# This file is part of Invenio.
+# Copyright (C) 2016-2018 CERN.
+#
+# Invenio is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""add pidstore counters table"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5a1d2e8c4f3b"
+down_revision = "b7c2c3f0e6a1"
+branch_labels = ()
+depends_on = None
+
+
+def upgrade():
+    """Upgrade database."""
+    op.create_table(
+        "inspire_pidstore_counters",
+        sa.Column("pid_type", sa.String(length=6), nullable=False),
+        sa.Column("prefix", sa.String(length=255), nullable=False),
+        sa.Column("last_number", sa.Integer, nullable=False),
+        sa.PrimaryKeyConstraint(
+            "pid_type", "prefix", name=op.f("pk_inspire_pidstore_counters")
+        ),
+    )
+
+
+def downgrade():
+    """Downgrade database."""
+    op.drop_table("inspire_pidstore_counters")
@@ -0,0 +1,59 @@
+#
+# This file is part of Invenio.
+# Copyright (C) 2016-2018 CERN.
+#
+# Invenio is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""add citations counts tables"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy_utils.types import UUIDType
+
+# revision identifiers, used by Alembic.
+revision = "b7c2c3f0e6a1"
+down_revision = "232af38d2604"
+branch_labels = ()
+depends_on = None
+
+
+def upgrade():
+    """Upgrade database."""
+    op.create_table(
+        "records_citations_counts",
+        sa.Column("record_id", UUIDType, nullable=False),
+        sa.Column("citation_count", sa.Integer, nullable=False, default=0),
+        sa.Column(
+            "citation_count_without_self_citations",
+            sa.Integer,
+            nullable=False,
+            default=0,
+        ),
+        sa.ForeignKeyConstraint(
+            ["record_id"],
+            ["records_metadata.id"],
+            name="fk_records_citations_counts_record_id",
+        ),
+        sa.PrimaryKeyConstraint("record_id", name=op.f("pk_records_citations_counts")),
+    )
+    op.create_table(
+        "records_citations_by_year",
+        sa.Column("record_id", UUIDType, nullable=False),
+        sa.Column("year", sa.Integer, nullable=False),
+        sa.Column("count", sa.Integer, nullable=False, default=0),
+        sa.ForeignKeyConstraint(
+            ["record_id"],
+            ["records_metadata.id"],
+            name="fk_records_citations_by_year_record_id",
+        ),
+        sa.PrimaryKeyConstraint(
+            "record_id", "year", name=op.f("pk_records_citations_by_year")
+        ),
+    )
+
+
+def downgrade():
+    """Downgrade database."""
+    op.drop_table("records_citations_by_year")
+    op.drop_table("records_citations_counts")
@@ -45,6 +45,20 @@ FEATURE_FLAG_ENABLE_WORKFLOW_ON_AUTHOR_UPDATE = False
 FEATURE_FLAG_ENABLE_HAL_PUSH = False
 FEATURE_FLAG_ENABLE_CDS_SYNC = False
 FEATURE_FLAG_ENABLE_LEGACY_VIEW_REDIRECTS = True
+FEATURE_FLAG_ENABLE_RENDER_CACHE = False
+# Read citation counts from `records_citations_counts`, enable it only after
+# `inspirehep citations recompute-counts` has been run.
+FEATURE_FLAG_ENABLE_CITATION_COUNTS_TABLE = False
+FEATURE_FLAG_ENABLE_REFERENCE_MATCHER_CACHE = False
+# Sum the citations by year with a nested aggregation instead of a script,
+# enable it only after the hep index has been rebuilt with the nested
+# `citations_by_year` mapping by `inspirehep index rebuild`.
+FEATURE_FLAG_ENABLE_NESTED_CITATIONS_BY_YEAR = False
+# Queue the records referencing an indexed record instead of reindexing them
+# in the same task, the scheduled `process_reindex_queue` does nothing without it.
+FEATURE_FLAG_ENABLE_REINDEX_QUEUE = False
+# Coalesce the ORCID pushes of an author in a single `orcid_push_author` job.
+FEATURE_FLAG_ENABLE_ORCID_PUSH_QUEUE = False
 
 # Web services and APIs
 # =====================
@@ -54,6 +68,8 @@ LEGACY_BASE_URL = "https://old.inspirehep.net"
 LEGACY_RECORD_URL_PATTERN = "http://inspirehep.net/record/{recid}"
 MAX_API_RESULTS = 10000
 REST_MIMETYPE_QUERY_ARG_NAME = "format"
+# Number of references of the bibliography generator resolved by one ES request.
+BIBLIOGRAPHY_GENERATOR_MSEARCH_SIZE = 100
 
 # Helpers
 # =======
@@ -158,6 +174,10 @@ CELERY_BEAT_SCHEDULE = {
     #    'task': 'invenio_accounts.tasks.clean_session_table',
     #    'schedule': timedelta(minutes=60),
     # },
+    "reindex_queue": {
+        "task": "inspirehep.indexer.tasks.process_reindex_queue",
+        "schedule": 10.0,
+    },
 }
 
 
@@ -226,8 +246,36 @@ INDEXER_DEFAULT_INDEX = "records-hep"
 INDEXER_DEFAULT_DOC_TYPE = "_doc"
 INDEXER_BULK_REQUEST_TIMEOUT = 900
 INDEXER_REPLACE_REFS = False
+#: Seconds a queued record waits before being reindexed, so that several
+#: changes to the records it references are reindexed once.
+INDEXER_REINDEX_QUEUE_DEBOUNCE = 5
+#: Number of queued records indexed in one bulk request.
+INDEXER_REINDEX_QUEUE_BATCH_SIZE = 200
+#: Maximum number of bulk requests done by one `process_reindex_queue` task.
+INDEXER_REINDEX_QUEUE_MAX_BATCHES = 50
+#: Seconds before the first retry of a queued record which failed to be
+#: reindexed, doubled for every following attempt.
+INDEXER_REINDEX_QUEUE_RETRY_BACKOFF = 60
+#: Number of attempts to reindex a queued record before giving up on it.
+INDEXER_REINDEX_QUEUE_MAX_ATTEMPTS = 5
+#: Bounds of the number of records indexed by one `batch_index` task of the
+#: `reindex` command, the size adapts to the finished batches in between.
+INDEXER_REINDEX_MIN_BATCH_SIZE = 20
+INDEXER_REINDEX_MAX_BATCH_SIZE = 2000
+#: Serialized bytes and seconds wanted for one bulk request of the `reindex`
+#: command, the batches are sized to hit the first one reached.
+INDEXER_REINDEX_TARGET_BATCH_BYTES = 10 * 1024 * 1024
+INDEXER_REINDEX_TARGET_BATCH_DURATION = 30
+#: Seconds by which the replays of the updated records of `index rebuild`
+#: overlap, so the records committed while replaying are not missed.
+INDEXER_REBUILD_REPLAY_OVERLAP = 60
 SEARCH_INDEX_PREFIX = None
 SEARCH_CLIENT_CONFIG = {"serializer": ORJSONSerializerES()}
+#: Expiration time in seconds of the display formats cached in redis.
+RENDER_CACHE_TTL = 60 * 60 * 24 * 30
+#: Bump it whenever the templates or schemas of the display formats change,
+#: so that all the cached formats are rendered again.
+RENDER_CACHE_VERSION = 1
 
 # Alembic
 # =======
@@ -261,6 +309,10 @@ ALEMBIC_SKIP_TABLES = [
 
 SEARCH_MAX_RECURSION_LIMIT = 5000
 
+# Disambiguation
+#: Number of publications updated and committed together by `disambiguate_signatures`.
+DISAMBIGUATION_LINK_CHUNK_SIZE = 100
+
 # Refextract
 # Path to where journal kb file is stored from `inspirehep.modules.refextract.tasks.create_journal_kb_file`
 # On production, if you enable celery beat change this path to point to a shared space.
@@ -10,11 +10,7 @@ from prometheus_client import Counter
 from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm.exc import NoResultFound, StaleDataError
 
-from inspirehep.disambiguation.utils import (
-    create_new_stub_author,
-    link_signatures_to_author,
-    update_author_names,
-)
+from inspirehep.disambiguation.utils import SignaturesLinker, create_new_stub_author
 from inspirehep.matcher.validators import (
     affiliations_validator,
     collaboration_validator,
@@ -38,10 +34,15 @@ def disambiguate_signatures(self, clusters):
     If the cluster has no authors, it creates a new author using the data from all the signatures
     and links all signatures to the newly created author.
     If the cluster has exactly one author, it links all signatures to that author.
+    The signatures of all the clusters are linked together, updating each
+    publication once.
 
     Args:
         clusters (list): clusters received after the clustering performed by inspire_disambiguation.
     """
+    linker = SignaturesLinker(
+        max_chunk_size=current_app.config["DISAMBIGUATION_LINK_CHUNK_SIZE"]
+    )
     for cluster in clusters:
         authors = cluster["authors"]
         if len(authors) == 1:
@@ -51,31 +52,21 @@ def disambiguate_signatures(self, clusters):
                 author=cluster["authors"][0],
                 signatures=cluster["signatures"],
             )
-            with db.session.begin_nested():
-                link_signatures_to_author(
-                    cluster["signatures"], cluster["authors"][0]["author_id"]
-                )
+            linker.add(cluster["signatures"], cluster["authors"][0]["author_id"])
 
         elif len(authors) == 0:
             disambiguation_assigned_clusters.labels("0").inc()
-            with db.session.begin_nested():
-                LOGGER.debug(
-                    "Received cluster with 0 authors.", signatures=cluster["signatures"]
-                )
-                author = create_new_stub_author()
-                linked_signatures = link_signatures_to_author(
-                    cluster["signatures"], author["control_number"]
-                )
-                if not linked_signatures:
-                    author.hard_delete()
-                else:
-                    disambiguation_created_authors.inc()
-                    update_author_names(author, linked_signatures)
+            LOGGER.debug(
+                "Received cluster with 0 authors.", signatures=cluster["signatures"]
+            )
+            linker.add(cluster["signatures"])
 
         else:
             disambiguation_assigned_clusters.labels("2+").inc()
             LOGGER.debug("Received cluster with more than 1 author.")
-    db.session.commit()
+
+    linker.link()
+    disambiguation_created_authors.inc(len(linker.stub_authors))
 
 
 def match_literature_author_with_config(author_data, matcher_config):
@@ -1,12 +1,19 @@
 import datetime
+import time
+from collections import defaultdict
 
 import structlog
 from flask import url_for
+from flask_sqlalchemy import models_committed
 from inspire_dojson.utils import get_record_ref
+from invenio_db import db
 from prometheus_client import Counter
 
+from inspirehep.indexer.tasks import batch_index
 from inspirehep.records.api.authors import AuthorsRecord
 from inspirehep.records.api.literature import LiteratureRecord
+from inspirehep.records.relations import RecordsRelationsBatch
+from inspirehep.utils import chunker
 
 LOGGER = structlog.getLogger()
 
@@ -15,27 +22,31 @@ disambiguation_changed_signatures = Counter(
 )
 
 
-def link_signature_to_author(signature_data, author_control_number):
-    """Adds record/$ref of the given author to the given signature.
-
-    Args:
-        author_control_number (int): The control number of the author to which we want to link.
-        signature_data (list): List containing 2 elements: the publication_id and the signature uuid.
-
-    Returns:
-        dict: The signature data from the publication with the linked author.
-    """
-    record = LiteratureRecord.get_record_by_pid_value(signature_data["publication_id"])
+def _get_signature_to_link(record, signature_uuid):
+    """Return the signature of the record, ``None`` if it can't be linked."""
     signature = next(
         (
             author
             for author in record.get("authors")
-            if author.get("uuid") == signature_data["signature_uuid"]
+            if author.get("uuid") == signature_uuid
         ),
         None,
     )
     if not signature or ("record" in signature and signature.get("curated_relation")):
         return None
+    return signature
+
+
+def _link_signature(record, signature_uuid, author_control_number):
+    """Adds record/$ref of the given author to the signature of the record.
+
+    Returns:
+        dict: The signature with the linked author, ``None`` if it was not
+        changed.
+    """
+    signature = _get_signature_to_link(record, signature_uuid)
+    if not signature:
+        return None
 
     if signature.get("curated_relation") and "record" not in signature:
         signature["curated_relation"] = False
@@ -46,7 +57,25 @@ def link_signature_to_author(signature_data, author_control_number):
         return None
 
     signature["record"] = new_author_record
-    record.update(dict(record))
+    return signature
+
+
+def link_signature_to_author(signature_data, author_control_number):
+    """Adds record/$ref of the given author to the given signature.
+
+    Args:
+        author_control_number (int): The control number of the author to which we want to link.
+        signature_data (list): List containing 2 elements: the publication_id and the signature uuid.
+
+    Returns:
+        dict: The signature data from the publication with the linked author.
+    """
+    record = LiteratureRecord.get_record_by_pid_value(signature_data["publication_id"])
+    signature = _link_signature(
+        record, signature_data["signature_uuid"], author_control_number
+    )
+    if signature:
+        record.update(dict(record))
     return signature
 
 
@@ -72,6 +101,124 @@ def link_signatures_to_author(signatures_data, author_control_number):
     return linked_signatures
 
 
+class StubAuthor(object):
+    """Placeholder of a stub author created when a signature is linked to it."""
+
+
+class SignaturesLinker(object):
+    def __init__(self, max_chunk_size=100):
+        """
+        Links signatures to authors updating each publication once.
+
+        The signatures of all the clusters are grouped by publication, the
+        publications are loaded by chunks with one query and every changed
+        one is updated once with all its signatures. Each chunk is committed
+        with its relations updated together and all the updated publications
+        are indexed by one ``batch_index`` task at the end.
+
+        The stub authors are created, and their names updated, in the chunk
+        where their signatures are linked, so a failing chunk leaves no stub
+        author without signatures.
+
+        Args:
+            max_chunk_size (int): the number of publications committed together.
+        """
+        self.max_chunk_size = max_chunk_size
+        self.authors_by_publication = defaultdict(dict)
+        self.linked_signatures = defaultdict(list)
+        self.updated_records_uuids = []
+        self.stub_authors = {}
+
+    def add(self, signatures_data, author_control_number=None):
+        """Queue the signatures to link to the author, or to a new stub author."""
+        author = author_control_number or StubAuthor()
+        for signature_data in signatures_data:
+            publication_id = str(signature_data["publication_id"])
+            self.authors_by_publication[publication_id][
+                signature_data["signature_uuid"]
+            ] = author
+
+    def _get_author_control_number(self, author):
+        if not isinstance(author, StubAuthor):
+            return author
+        if author not in self.stub_authors:
+            self.stub_authors[author] = create_new_stub_author()
+        return self.stub_authors[author]["control_number"]
+
+    def _link_chunk(self, publications_ids):
+        updated_records = []
+        updated_stub_authors = set()
+        records = list(
+            LiteratureRecord.get_records_by_pids(
+                [("lit", publication_id) for publication_id in publications_ids]
+            )
+        )
+        for record in records:
+            authors = self.authors_by_publication[str(record["control_number"])]
+            linked_signatures = []
+            for signature_uuid, author in authors.items():
+                if isinstance(author, StubAuthor):
+                    if not _get_signature_to_link(record, signature_uuid):
+                        continue
+                    updated_stub_authors.add(author)
+                author_control_number = self._get_author_control_number(author)
+                signature = _link_signature(
+                    record, signature_uuid, author_control_number
+                )
+                if signature:
+                    linked_signatures.append((author_control_number, signature))
+            if not linked_signatures:
+                continue
+            with db.session.begin_nested():
+                record.update(dict(record), disable_relations_update=True)
+            updated_records.append(record)
+            for author_control_number, signature in linked_signatures:
+                self.linked_signatures[author_control_number].append(signature)
+        for author in updated_stub_authors:
+            stub_author = self.stub_authors[author]
+            with db.session.begin_nested():
+                update_author_names(
+                    stub_author, self.linked_signatures[stub_author["control_number"]]
+                )
+            updated_records.append(stub_author)
+        RecordsRelationsBatch(updated_records).update()
+        db.session.commit()
+        self.updated_records_uuids.extend(str(record.id) for record in updated_records)
+
+    def link(self):
+        """Link all the queued signatures.
+
+        Returns:
+            dict: the signatures with the linked author by author control number.
+        """
+        from inspirehep.records.receivers import index_after_commit
+
+        start = time.monotonic()
+        models_committed.disconnect(index_after_commit)
+        try:
+            for publications_ids in chunker(
+                self.authors_by_publication, self.max_chunk_size
+            ):
+                self._link_chunk(publications_ids)
+        finally:
+            models_committed.connect(index_after_commit)
+            if self.updated_records_uuids:
+                batch_index.delay(self.updated_records_uuids)
+
+        duration = time.monotonic() - start
+        linked_signatures_count = sum(map(len, self.linked_signatures.values()))
+        disambiguation_changed_signatures.inc(linked_signatures_count)
+        LOGGER.info(
+            "Signatures linked",
+            signatures=linked_signatures_count,
+            papers=len(self.updated_records_uuids),
+            papers_per_second=len(self.updated_records_uuids) / duration
+            if duration
+            else 0,
+        )
+        return self.linked_signatures
+
+
 def create_new_stub_author(**kwargs):
     """Create a stub author record."""
     author_data = {
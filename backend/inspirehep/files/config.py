@@ -13,9 +13,15 @@ S3_BUCKET_PREFIX = "inspire-files-"
 S3_FILE_ACL = "public-read"
 S3_BIBLIOGRAPHY_GENERATOR_BUCKET = "inspire-tmp"
 S3_EDITOR_BUCKET = "inspire-editor"
+# Files bigger than the threshold are uploaded in parts of the chunk size
+S3_MULTIPART_THRESHOLD = 8 * 1024 * 1024
+S3_MULTIPART_CHUNKSIZE = 8 * 1024 * 1024
 
 FILES_MAX_UPLOAD_THREADS = 5
 FILES_UPLOAD_THREAD_TIMEOUT = 120
 FILES_DOWNLOAD_TIMEOUT = 60
+FILES_DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# Downloaded files bigger than this are spooled to disk instead of memory
+FILES_SPOOL_MAX_MEMORY_SIZE = 8 * 1024 * 1024
 FILES_PUBLIC_PATH = "/files/"
 UPDATE_S3_FILES_METADATA = False
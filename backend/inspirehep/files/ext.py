@@ -6,6 +6,7 @@
 # the terms of the MIT License; see LICENSE file for more details.
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import UnknownServiceError
 from flask import _app_ctx_stack as stack
 from flask import current_app
@@ -91,7 +92,13 @@ class InspireS3(object):
 
     @property
     def s3_instance(self):
-        s3_instance = S3(self.s3_client, self.s3_resource)
+        config = TransferConfig(
+            multipart_threshold=current_app.config["S3_MULTIPART_THRESHOLD"],
+            multipart_chunksize=current_app.config["S3_MULTIPART_CHUNKSIZE"],
+            max_concurrency=1,
+            use_threads=False,
+        )
+        s3_instance = S3(self.s3_client, self.s3_resource, config)
         return s3_instance
 
     @property
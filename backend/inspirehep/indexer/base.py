@@ -5,6 +5,8 @@
 # inspirehep is free software; you can redistribute it and/or modify it under
 # the terms of the MIT License; see LICENSE file for more details.
 
+import time
+
 import structlog
 from elasticsearch import RequestError, TransportError
 from elasticsearch.helpers import bulk
@@ -12,9 +14,11 @@ from flask import current_app
 from invenio_indexer.api import RecordIndexer
 from invenio_indexer.signals import before_record_index
 from invenio_indexer.utils import _es7_expand_action
+from invenio_records.models import RecordMetadata
 from invenio_search import current_search_client as es
 from kombu.exceptions import EncodeError
-from sqlalchemy.orm.exc import NoResultFound
+
+from inspirehep.indexer.batch import records_batch
 
 LOGGER = structlog.getLogger()
 
@@ -72,63 +76,117 @@ class InspireRecordIndexer(RecordIndexer):
             "_source": self._prepare_record(record, index, doc_type),
         }
 
-    def bulk_index(self, records_uuids, request_timeout=None):
+    def bulk_index(
+        self,
+        records_uuids,
+        request_timeout=None,
+        measure_size=False,
+        target_indexes=None,
+    ):
         """Starts bulk indexing for specified records
 
         Args:
             records_uuids(list[str): List of strings which are UUID's of records
                 to reindex
             request_timeout(int): Maximum time after which   es will throw an exception
+            measure_size(bool): if set to True the size of the serialized
+                records is returned as ``size``, it costs one more serialization.
+            target_indexes(dict): indexes to use instead of the ones of the
+                records, e.g. ``{"records-hep": "records-hep-1612345678"}``.
 
         Returns:
             dict: dict with success count and failure list
-                (with uuids of failed records)
+                (with uuids of failed records) and the ``duration`` in seconds
 
         """
         if not request_timeout:
             request_timeout = current_app.config["INDEXER_BULK_REQUEST_TIMEOUT"]
-        success, failures = bulk(
-            es,
-            self.bulk_iterator(records_uuids),
-            request_timeout=request_timeout,
-            raise_on_error=False,
-            raise_on_exception=False,
-            expand_action_callback=(_es7_expand_action),
-            max_retries=5,  # Retires on Error 429
-            initial_backoff=10,  # wait for initial_backoff * 2^retry_number
-        )
+        stats = {"size": 0} if measure_size else None
+        start = time.monotonic()
+        records = self.get_records(records_uuids)
+        with records_batch(records):
+            success, failures = bulk(
+                es,
+                self.bulk_iterator(records, stats, target_indexes),
+                request_timeout=request_timeout,
+                raise_on_error=False,
+                raise_on_exception=False,
+                expand_action_callback=(_es7_expand_action),
+                max_retries=5,  # Retires on Error 429
+                initial_backoff=10,  # wait for initial_backoff * 2^retry_number
+            )
 
-        return {
+        result = {
             "success": success,
             "failures": failures,
             "failures_count": len(records_uuids) - success,
+            "duration": time.monotonic() - start,
         }
+        if stats is not None:
+            result["size"] = stats["size"]
+        return result
 
-    def bulk_iterator(self, records_uuids):
-        for record_uuid in records_uuids:
-            data = self.bulk_action(record_uuid)
+    def bulk_iterator(self, records, stats=None, target_indexes=None):
+        for record in records:
+            data = self.bulk_action(record, target_indexes)
             if not data:
                 continue
+            if stats is not None:
+                stats["size"] += len(es.transport.serializer.dumps(data["_source"]))
             yield data
 
-    def bulk_action(self, record_uuid):
-        try:
-            from inspirehep.records.api import InspireRecord
+    @staticmethod
+    def get_records(records_uuids):
+        """Load all the records of a batch with a single query.
+
+        Args:
+            records_uuids (list[str]): UUIDs of the records to load.
+
+        Returns:
+            list(InspireRecord): the loaded records, in the same order as
+            ``records_uuids``, skipping the ones which failed to load.
+        """
+        from inspirehep.records.api import InspireRecord
+
+        models = {
+            str(model.id): model
+            for model in RecordMetadata.query.filter(
+                RecordMetadata.id.in_(records_uuids)
+            )
+        }
+        records = []
+        for record_uuid in records_uuids:
+            model = models.get(str(record_uuid))
+            if model is None or model.json is None:
+                LOGGER.error("Record failed to load", uuid=str(record_uuid))
+                continue
+            record_class = InspireRecord.get_class_for_record(model.json)
+            records.append(record_class(model.json, model=model))
+        return records
 
-            record = InspireRecord.get_record(record_uuid, with_deleted=True)
+    def bulk_action(self, record, target_indexes=None):
+        try:
+            target_index = None
+            if target_indexes:
+                index, _ = self.record_to_index(record)
+                target_index = target_indexes.get(index)
             if record.get("deleted", False):
+                if target_index:
+                    es.delete(
+                        index=self._prepare_index(target_index, None)[0],
+                        id=str(record.id),
+                        ignore=404,
+                    )
                 try:
                     # When record is not in es then dsl is throwing TransportError(404)
                     record.index(delay=False, force_delete=True)
                 except TransportError:
                     LOGGER.warning("Record not found in ES!", uuid=str(record.id))
                 return None
-            return self._process_bulk_record_for_index(record)
-        except NoResultFound:
-            LOGGER.exception("Record failed to load", uuid=str(record_uuid))
+            return self._process_bulk_record_for_index(record, index=target_index)
         except RequestError:
-            LOGGER.exception("Cannot process request on ES", uuid=str(record_uuid))
+            LOGGER.exception("Cannot process request on ES", uuid=str(record.id))
         except EncodeError:
             LOGGER.exception(
-                "Kombu is not able to process response!", uuid=str(record_uuid)
+                "Kombu is not able to process response!", uuid=str(record.id)
             )
@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 CERN.
+#
+# inspirehep is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import chain
+
+import structlog
+from flask import current_app
+from invenio_db import db
+from invenio_pidstore.models import PersistentIdentifier, PIDStatus
+from invenio_records.models import RecordMetadata
+from sqlalchemy import func, tuple_
+
+from inspirehep.records.models import (
+    RecordCitations,
+    RecordCitationsByYear,
+    RecordCitationsCount,
+    RecordsAuthors,
+)
+from inspirehep.utils import chunker
+
+LOGGER = structlog.getLogger()
+
+# Linked records resolved while serializing records for ES.
+LINKED_RECORDS_FIELDS = [
+    "authors.record",
+    "accelerator_experiments.record",
+    "publication_info.conference_record",
+    "publication_info.parent_record",
+]
+
+_current_records_batch = ContextVar("current_records_batch", default=None)
+
+
+class RecordsBatch:
+    def __init__(self, records, max_chunk_size=500):
+        """
+        Data prefetched in bulk for a batch of records serialized together.
+
+        Args:
+            records (list(InspireRecord)): the records of the batch.
+            max_chunk_size (int): maximum number of values in one ``IN`` clause.
+        """
+        self.records = records
+        self.max_chunk_size = max_chunk_size
+        self.linked_records = {}
+        self.citation_count = {}
+        self.citation_count_without_self_citations = {}
+        self.citations_by_year = {}
+        self.referenced_authors_bais = {}
+
+    @property
+    def _citeable_records_ids(self):
+        from inspirehep.records.api.mixins import CitationMixin
+
+        return [
+            record.id for record in self.records if isinstance(record, CitationMixin)
+        ]
+
+    def prefetch(self):
+        self.prefetch_linked_records()
+        self.prefetch_citations()
+        self.prefetch_referenced_authors_bais()
+        LOGGER.info(
+            "Prefetched records batch",
+            records=len(self.records),
+            linked_records=len(self.linked_records),
+        )
+
+    def prefetch_linked_records(self):
+        pids = set(
+            chain.from_iterable(
+                record.get_linked_pids_from_field(field)
+                for record in self.records
+                for field in LINKED_RECORDS_FIELDS
+            )
+        )
+        for pid in pids:
+            self.linked_records[pid] = None
+
+        for pids_chunk in chunker(pids, self.max_chunk_size):
+            query = (
+                db.session.query(
+                    PersistentIdentifier.pid_type,
+                    PersistentIdentifier.pid_value,
+                    PersistentIdentifier.status,
+                    RecordMetadata,
+                )
+                .join(
+                    RecordMetadata,
+                    RecordMetadata.id == PersistentIdentifier.object_uuid,
+                )
+                .filter(
+                    PersistentIdentifier.object_type == "rec",
+                    tuple_(
+                        PersistentIdentifier.pid_type, PersistentIdentifier.pid_value
+                    ).in_(pids_chunk),
+                )
+            )
+            for pid_type, pid_value, status, model in query:
+                self.linked_records[(pid_type, pid_value)] = (model, status)
+
+    def prefetch_citations(self):
+        records_ids = self._citeable_records_ids
+        for record_id in records_ids:
+            self.citation_count[record_id] = 0
+            self.citation_count_without_self_citations[record_id] = 0
+            self.citations_by_year[record_id] = []
+
+        if current_app.config.get("FEATURE_FLAG_ENABLE_CITATION_COUNTS_TABLE"):
+            self.prefetch_stored_citations(records_ids)
+            return
+
+        self_citations_enabled = current_app.config.get(
+            "FEATURE_FLAG_ENABLE_SELF_CITATIONS"
+        )
+        for ids_chunk in chunker(records_ids, self.max_chunk_size):
+            query = (
+                db.session.query(
+                    RecordCitations.cited_id,
+                    RecordCitations.is_self_citation,
+                    func.date_trunc("year", RecordCitations.citation_date).label(
+                        "year"
+                    ),
+                    func.count(RecordCitations.citer_id),
+                    func.count(RecordCitations.citation_date),
+                )
+                .filter(RecordCitations.cited_id.in_(ids_chunk))
+                .group_by(RecordCitations.cited_id, RecordCitations.is_self_citation)
+                .group_by("year")
+            )
+            counts_by_year = defaultdict(lambda: defaultdict(int))
+            for cited_id, is_self_citation, year, count, dated_count in query:
+                self.citation_count[cited_id] += count
+                if self_citations_enabled and is_self_citation is False:
+                    self.citation_count_without_self_citations[cited_id] += count
+                if year:
+                    counts_by_year[cited_id][year.year] += dated_count
+
+            for cited_id, counts in counts_by_year.items():
+                self.citations_by_year[cited_id] = [
+                    {"year": year, "count": count}
+                    for year, count in sorted(counts.items())
+                ]
+
+    def prefetch_stored_citations(self, records_ids):
+        self_citations_enabled = current_app.config.get(
+            "FEATURE_FLAG_ENABLE_SELF_CITATIONS"
+        )
+        for ids_chunk in chunker(records_ids, self.max_chunk_size):
+            counts_query = RecordCitationsCount.query.filter(
+                RecordCitationsCount.record_id.in_(ids_chunk)
+            ).with_entities(
+                RecordCitationsCount.record_id,
+                RecordCitationsCount.citation_count,
+                RecordCitationsCount.citation_count_without_self_citations,
+            )
+            for record_id, count, count_without_self_citations in counts_query:
+                self.citation_count[record_id] = count
+                if self_citations_enabled:
+                    self.citation_count_without_self_citations[
+                        record_id
+                    ] = count_without_self_citations
+
+            counts_by_year_query = (
+                RecordCitationsByYear.query.filter(
+                    RecordCitationsByYear.record_id.in_(ids_chunk),
+                    RecordCitationsByYear.count > 0,
+                )
+                .with_entities(
+                    RecordCitationsByYear.record_id,
+                    RecordCitationsByYear.year,
+                    RecordCitationsByYear.count,
+                )
+                .order_by(RecordCitationsByYear.year)
+            )
+            for record_id, year, count in counts_by_year_query:
+                self.citations_by_year[record_id].append({"year": year, "count": count})
+
+    def prefetch_referenced_authors_bais(self):
+        records_ids = [record.id for record in self.records]
+        referenced_authors_bais = defaultdict(set)
+        for ids_chunk in chunker(records_ids, self.max_chunk_size):
+            query = (
+                db.session.query(RecordCitations.citer_id, RecordsAuthors.author_id)
+                .filter(
+                    RecordsAuthors.id_type == "INSPIRE BAI",
+                    RecordsAuthors.record_id == RecordCitations.cited_id,
+                    RecordCitations.citer_id.in_(ids_chunk),
+                )
+                .distinct()
+            )
+            for citer_id, author_id in query:
+                referenced_authors_bais[citer_id].add(author_id)
+
+        for record_id in records_ids:
+            self.referenced_authors_bais[record_id] = sorted(
+                referenced_authors_bais[record_id]
+            )
+
+    def get_linked_models(self, pids):
+        """Return the prefetched linked records metadata and the pids not prefetched.
+
+        Args:
+            pids (list): tuples containing (pid_type, pid_value) of the records.
+
+        Returns:
+            tuple: the list of ``RecordMetadata`` found and the list of pids
+                which were not prefetched.
+        """
+        models = []
+        missing_pids = []
+        for pid in dict.fromkeys(pids):
+            if pid not in self.linked_records:
+                missing_pids.append(pid)
+                continue
+            linked_record = self.linked_records[pid]
+            if linked_record:
+                models.append(linked_record[0])
+        return models, missing_pids
+
+    def get_linked_model_by_pid_value(self, pid_type, pid_value):
+        """Return the prefetched record metadata for the pid if it's not redirected.
+
+        Raises:
+            KeyError: when the record was not prefetched, doesn't exist or the pid
+                is redirected.
+        """
+        linked_record = self.linked_records[(pid_type, str(pid_value))]
+        if linked_record is None or linked_record[1] == PIDStatus.REDIRECTED:
+            raise KeyError(pid_type, pid_value)
+        return linked_record[0]
+
+
+def get_current_records_batch():
+    """Return the batch of records currently being serialized, if any."""
+    return _current_records_batch.get()
+
+
+def get_prefetched_value(name, record_id):
+    """Return the value prefetched for the record in the current batch.
+
+    Args:
+        name (str): name of the prefetched data, e.g. ``citation_count``.
+        record_id (UUID): the id of the record.
+
+    Returns:
+        the prefetched value or ``None`` if it was not prefetched.
+    """
+    records_batch = get_current_records_batch()
+    if records_batch is None:
+        return None
+    return getattr(records_batch, name).get(record_id)
+
+
+@contextmanager
+def records_batch(records):
+    """Prefetch the data needed to serialize the records in bulk.
+
+    While the context is active, the prefetched data is used by the records
+    and their serializers instead of querying it record by record.
+    """
+    batch = RecordsBatch(records)
+    batch.prefetch()
+    token = _current_records_batch.set(batch)
+    try:
+        yield batch
+    finally:
+        _current_records_batch.reset(token)
@@ -7,10 +7,11 @@
 
 import logging
 import re
+from datetime import datetime, timedelta
 from os import makedirs, path
-from time import sleep
 
 import click
+import orjson
 import structlog
 from click import UsageError
 from flask import current_app
@@ -20,31 +21,13 @@ from invenio_pidstore.models import PersistentIdentifier, PIDStatus
 from invenio_search import current_search
 from invenio_search.cli import index
 
-from inspirehep.indexer.tasks import batch_index
+from inspirehep.indexer.rebuild import IndexesRebuild
+from inspirehep.indexer.reindex import ReindexCheckpoint, ReindexOrchestrator
 from inspirehep.records.api import InspireRecord
 
 LOGGER = structlog.getLogger()
 
-
-def next_batch(iterator, batch_size):
-    """Get first batch_size elements from the iterable, or remaining if less.
-
-    Args:
-        iterator(Iterator): the iterator to batch.
-        batch_size(int): the size of the batch.
-
-    Returns:
-        list: the next batch from the given iterator object.
-    """
-    batch = []
-
-    try:
-        for idx in range(batch_size):
-            batch.append(next(iterator))
-    except StopIteration:
-        pass
-
-    return batch
+REBUILD_REPLAYS_BEFORE_SWAP = 3
 
 
 def get_query_records_to_index(pid_types):
@@ -91,15 +74,19 @@ def _prepare_logdir(log_path):
 @click.option(
     "-q",
     "--queue-name",
-    default="indexer_task",
-    help="RabbitMQ queue used for sending indexing tasks.",
+    multiple=True,
+    default=["indexer_task"],
+    help="RabbitMQ queue used for sending indexing tasks, "
+    "the tasks are sent to each queue in turn if it's given more than once.",
     show_default=True,
 )
 @click.option(
     "-bs",
     "--batch-size",
     default=200,
-    help="The number of documents per batch that will be indexed by workers.",
+    help="The number of documents of the first batches indexed by workers, "
+    "the next ones are sized after the serialized size and indexing time "
+    "of the finished batches.",
     show_default=True,
 )
 @click.option(
@@ -109,17 +96,38 @@ def _prepare_logdir(log_path):
     help="The size of the chunk of records loaded from the DB.",
     show_default=True,
 )
+@click.option(
+    "-m",
+    "--max-in-flight",
+    default=50,
+    help="The maximum number of indexing tasks running at once.",
+    show_default=True,
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Resume the reindex interrupted with the same PIDs from its checkpoint.",
+)
 @click.option(
     "-l",
     "--log-path",
     default="/tmp/inspire/",
-    help="The path of the indexing logs. Default is /tmp/inspire.",
+    help="The path of the indexing logs, checkpoint and report. Default is /tmp/inspire.",
     show_default=True,
 )
 @with_appcontext
 @click.pass_context
 def reindex_records(
-    ctx, all, pidtype, pid, queue_name, batch_size, db_batch_size, log_path
+    ctx,
+    all,
+    pidtype,
+    pid,
+    queue_name,
+    batch_size,
+    db_batch_size,
+    max_in_flight,
+    resume,
+    log_path,
 ):
     """(Inspire) Reindex records in ElasticSearch.
 
@@ -127,6 +135,9 @@ def reindex_records(
     by sending celery tasks to the specified queue. Indexing errors logged to file into the `log-path` folder.
     Please, specify only one of the args between 'all', 'pid', and 'recid'.
 
+    The progress is saved in `reindex_checkpoint.json` and a throughput report
+    in `reindex_report.json` into the `log-path` folder.
+
     Example:
 
         * Reindexing all the records in Inspire:
@@ -147,6 +158,11 @@ def reindex_records(
         * Reindex only one record:
 
             >>> inspirehep index reindex -id lit 123456
+
+
+        * Resume an interrupted reindex of all the records:
+
+            >>> inspirehep index reindex --all --resume
     """
     if not bool(all) ^ bool(pidtype) ^ bool(pid):
         raise UsageError(
@@ -184,57 +200,45 @@ def reindex_records(
     LOGGER.addHandler(file_log)
     LOGGER.info("Saving errors to %r", log_path)
 
-    request_timeout = current_app.config.get("INDEXER_BULK_REQUEST_TIMEOUT")
-    all_tasks = []
-    uuid_records_per_tasks = {}
+    checkpoint = ReindexCheckpoint(
+        path.join(path.dirname(log_path), "reindex_checkpoint.json"), pidtype
+    )
+    if resume and checkpoint.load():
+        click.secho(
+            f"Resuming after {checkpoint.counters['records']} records.", fg="green"
+        )
+    orchestrator = ReindexOrchestrator(
+        pidtype,
+        queue_name,
+        checkpoint,
+        batch_size,
+        page_size=db_batch_size,
+        max_in_flight=max_in_flight,
+        request_timeout=current_app.config.get("INDEXER_BULK_REQUEST_TIMEOUT"),
+    )
     query = get_query_records_to_index(pidtype)
+    if checkpoint.last_uuid:
+        query = query.filter(PersistentIdentifier.object_uuid > checkpoint.last_uuid)
 
     with click.progressbar(
-        query.yield_per(db_batch_size),
         length=query.count(),
-        label=f"Scheduling indexing tasks to the '{queue_name}' queue.",
-    ) as items:
-        batch = next_batch(items, batch_size)
-
-        while batch:
-            uuids = [str(item[0]) for item in batch]
-            indexer_task = batch_index.apply_async(
-                kwargs={"records_uuids": uuids, "request_timeout": request_timeout},
-                queue=queue_name,
-            )
-
-            uuid_records_per_tasks[indexer_task.id] = uuids
-            all_tasks.append(indexer_task)
-            batch = next_batch(items, batch_size)
-
-    click.secho("Created {} bulk-indexing tasks.".format(len(all_tasks)), fg="green")
-
-    with click.progressbar(
-        length=len(all_tasks), label="Indexing records"
+        label=f"Indexing records with tasks sent to {', '.join(queue_name)}",
     ) as progressbar:
-
-        def _finished_tasks_count():
-            return len([task for task in all_tasks if task.ready()])
-
-        while len(all_tasks) != _finished_tasks_count():
-            sleep(0.5)
-            # this is so click doesn't divide by 0:
-            progressbar.pos = _finished_tasks_count() or 1
-            progressbar.update(0)
-
-    failures = []
-    failures_count = 0
-    successes = 0
-    batch_errors = []
-
-    for task in all_tasks:
-        result = task.result
-        if task.failed():
-            batch_errors.append({"task_id": task.id, "error": result})
-        else:
-            successes += result["success"]
-            failures += result["failures"]
-            failures_count += result["failures_count"]
+        report = orchestrator.run(on_progress=progressbar.update)
+
+    report["batch_errors"] = orchestrator.batch_errors
+    report_path = path.join(path.dirname(log_path), "reindex_report.json")
+    with open(report_path, "wb") as report_file:
+        report_file.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+    checkpoint.clear()
+
+    failures = orchestrator.failures
+    failures_count = report["total"]["failures_count"]
+    successes = report["total"]["success"]
+    batch_errors = orchestrator.batch_errors
+    click.secho(
+        f"{report['records_per_second']:.1f} records/s, report saved to {report_path}."
+    )
 
     color = "red" if failures or batch_errors else "green"
     click.secho(
@@ -306,6 +310,131 @@ def remap_indexes(ctx, yes_i_know, indexes, ignore_checks):
     click.echo("remapped indexes %s" % [i[0] for i in created_indexes])
 
 
+@index.command(
+    "rebuild",
+    help="(Inspire) Rebuilds specified indexes into new ones with the current "
+    "mappings and switches their aliases to them, without search downtime.",
+)
+@click.option(
+    "--index",
+    "-i",
+    "indexes",
+    multiple=True,
+    help="Specify indexes which you want to rebuild (ignore prefix and postfix)",
+)
+@click.option(
+    "-q",
+    "--queue-name",
+    multiple=True,
+    default=["indexer_task"],
+    help="RabbitMQ queue used for sending indexing tasks.",
+    show_default=True,
+)
+@click.option(
+    "-bs",
+    "--batch-size",
+    default=200,
+    help="The number of documents of the first batches indexed by workers.",
+    show_default=True,
+)
+@click.option(
+    "-m",
+    "--max-in-flight",
+    default=50,
+    help="The maximum number of indexing tasks running at once.",
+    show_default=True,
+)
+@click.option(
+    "--delete-old", is_flag=True, help="Delete the old indexes once switched."
+)
+@click.option(
+    "-l",
+    "--log-path",
+    default="/tmp/inspire/",
+    help="The path of the indexing checkpoint and report. Default is /tmp/inspire.",
+    show_default=True,
+)
+@with_appcontext
+@click.pass_context
+def rebuild_indexes(
+    ctx, indexes, queue_name, batch_size, max_in_flight, delete_old, log_path
+):
+    """Rebuild indexes without emptying the live ones.
+
+    The new indexes are loaded without replicas nor refresh, the records
+    updated in the meantime are indexed again into them, then their settings
+    are restored and all the aliases of the live indexes are moved to them in
+    one atomic operation.
+
+    Example:
+
+        >>> inspirehep index rebuild -i records-hep -i records-authors
+    """
+    wrong_indexes = set(indexes) - set(current_app.config["PID_TYPE_TO_INDEX"].values())
+    if not indexes or wrong_indexes:
+        click.echo(
+            "Available indexes are: "
+            f"{', '.join(current_app.config['PID_TYPE_TO_INDEX'].values())}"
+        )
+        ctx.exit(1)
+
+    rebuild = IndexesRebuild(indexes)
+    checkpoint_path = path.join(log_path, "rebuild_checkpoint.json")
+    _prepare_logdir(checkpoint_path)
+    checkpoint = ReindexCheckpoint(checkpoint_path, rebuild.pid_types)
+    old_indexes = None
+    try:
+        rebuild.create_indexes()
+        click.echo(f"Created indexes: {', '.join(rebuild.target_indexes.values())}")
+
+        since = datetime.utcnow() - timedelta(
+            seconds=current_app.config["INDEXER_REBUILD_REPLAY_OVERLAP"]
+        )
+        orchestrator = ReindexOrchestrator(
+            rebuild.pid_types,
+            queue_name,
+            checkpoint,
+            batch_size,
+            max_in_flight=max_in_flight,
+            request_timeout=current_app.config.get("INDEXER_BULK_REQUEST_TIMEOUT"),
+            target_indexes=rebuild.target_indexes,
+        )
+        report = orchestrator.run()
+        click.echo(
+            f"Indexed {report['total']['success']} records "
+            f"({report['records_per_second']:.1f} records/s), "
+            f"{report['total']['failures_count']} failed."
+        )
+
+        # every replay is shorter than the previous one, the last one is done
+        # after the swap as the records are then indexed into the new indexes
+        for _ in range(REBUILD_REPLAYS_BEFORE_SWAP):
+            since, replayed_count = rebuild.replay_updated_records(since)
+            click.echo(f"Replayed {replayed_count} updated records.")
+            if not replayed_count:
+                break
+
+        rebuild.restore_settings()
+        old_indexes = rebuild.swap_aliases()
+    finally:
+        checkpoint.clear()
+        if old_indexes is None:
+            # the aliases weren't switched, the new indexes are of no use
+            click.secho("Rebuild failed, deleting the new indexes.", fg="red")
+            rebuild.delete_indexes()
+
+    rebuild.replay_updated_records(since, into_new_indexes=False)
+    click.secho(
+        f"Switched aliases from {', '.join(old_indexes)} to "
+        f"{', '.join(rebuild.target_indexes.values())}.",
+        fg="green",
+    )
+
+    if delete_old and old_indexes:
+        current_search.client.indices.delete(index=",".join(old_indexes))
+        click.echo(f"Deleted indexes: {', '.join(old_indexes)}")
+
+
 @index.command(
     "create-aliases",
     help="Creates aliases without prefix for indexes if prefix was set",
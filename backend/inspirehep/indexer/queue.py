@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 CERN.
+#
+# inspirehep is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+import time
+
+import structlog
+from flask import current_app
+from prometheus_client import Gauge, Histogram
+from redis import StrictRedis
+
+LOGGER = structlog.getLogger()
+
+reindex_queue_backlog = Gauge(
+    "reindex_queue_backlog",
+    "How many records are waiting in the reindex queue.",
+)
+reindex_queue_lag = Histogram(
+    "reindex_queue_lag_seconds",
+    "Time between queueing a record for reindex and reindexing it.",
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600),
+)
+
+# Pops atomically the members queued before ARGV[1], at most ARGV[2] of them.
+POP_DUE_MEMBERS_SCRIPT = """
+local members = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'WITHSCORES', 'LIMIT', 0, ARGV[2])
+for i = 1, #members, 2 do
+    redis.call('ZREM', KEYS[1], members[i])
+end
+return members
+"""
+
+
+class ReindexQueue(object):
+    key = "indexer:reindex_queue"
+    attempts_key = "indexer:reindex_queue:attempts"
+    failed_key = "indexer:reindex_queue:failed"
+
+    def __init__(self, redis=None):
+        """
+        Queue of the records which have to be reindexed because a record they
+        reference has changed.
+
+        The queue is a redis sorted set of uuids scored by the time they were
+        first queued, so queueing again a record which is still waiting is a no-op.
+        The records which failed to be reindexed are scored by the time they are
+        retried.
+        Records are popped only once they have been waiting for the coalescing
+        window ``INDEXER_REINDEX_QUEUE_DEBOUNCE``, which lets the reindexes caused
+        by several edits in a row be done once.
+
+        Args:
+            redis (StrictRedis): the redis client, by default the one of
+                ``CACHE_REDIS_URL``.
+        """
+        if redis is None:
+            redis = StrictRedis.from_url(
+                current_app.config["CACHE_REDIS_URL"], decode_responses=True
+            )
+        self.redis = redis
+        self._pop_due_members = self.redis.register_script(POP_DUE_MEMBERS_SCRIPT)
+
+    def push(self, records_uuids):
+        """Queue the records for reindex, unless they are already queued."""
+        records_uuids = [str(record_uuid) for record_uuid in records_uuids]
+        if not records_uuids:
+            return 0
+        now = time.time()
+        return self.redis.zadd(
+            self.key, {record_uuid: now for record_uuid in records_uuids}, nx=True
+        )
+
+    def pop(self, max_size):
+        """Pop the records waiting for longer than the coalescing window.
+
+        Args:
+            max_size (int): maximum number of records to pop.
+
+        Returns:
+            list(tuple): the uuids of the records with the time they were queued,
+            the oldest first.
+        """
+        debounce = current_app.config["INDEXER_REINDEX_QUEUE_DEBOUNCE"]
+        members = self._pop_due_members(
+            keys=[self.key], args=[time.time() - debounce, max_size]
+        )
+        return [(members[i], float(members[i + 1])) for i in range(0, len(members), 2)]
+
+    def retry(self, records_uuids):
+        """Queue back records which failed to be reindexed, after a backoff.
+
+        The backoff starts at ``INDEXER_REINDEX_QUEUE_RETRY_BACKOFF`` seconds and
+        doubles with every attempt, so the records failing again don't hold back
+        the rest of the queue. After ``INDEXER_REINDEX_QUEUE_MAX_ATTEMPTS``
+        attempts a record is moved to the ``failed_key`` sorted set instead.
+
+        Args:
+            records_uuids (list): the uuids of the records which failed.
+
+        Returns:
+            list: the uuids of the records given up.
+        """
+        if not records_uuids:
+            return []
+        max_attempts = current_app.config["INDEXER_REINDEX_QUEUE_MAX_ATTEMPTS"]
+        backoff = current_app.config["INDEXER_REINDEX_QUEUE_RETRY_BACKOFF"]
+        pipeline = self.redis.pipeline()
+        for record_uuid in records_uuids:
+            pipeline.hincrby(self.attempts_key, record_uuid, 1)
+        attempts = pipeline.execute()
+
+        now = time.time()
+        retried = {}
+        given_up = []
+        for record_uuid, attempt in zip(records_uuids, attempts):
+            if attempt >= max_attempts:
+                given_up.append(record_uuid)
+            else:
+                retried[record_uuid] = now + backoff * 2 ** (attempt - 1)
+        pipeline = self.redis.pipeline()
+        if retried:
+            pipeline.zadd(self.key, retried, nx=True)
+        if given_up:
+            pipeline.zadd(
+                self.failed_key, {record_uuid: now for record_uuid in given_up}
+            )
+            pipeline.hdel(self.attempts_key, *given_up)
+        pipeline.execute()
+        return given_up
+
+    def reset_attempts(self, records_uuids):
+        """Forget the failed attempts of records which have been reindexed."""
+        if records_uuids:
+            self.redis.hdel(self.attempts_key, *records_uuids)
+
+    def __len__(self):
+        return self.redis.zcard(self.key)
+
+
+def _retry_records(queue, records_uuids):
+    given_up = queue.retry(records_uuids)
+    if given_up:
+        LOGGER.error(
+            "Gave up reindexing queued records",
+            records_uuids=given_up,
+            failed_key=queue.failed_key,
+        )
+
+
+def drain_reindex_queue(index_records, batch_size=None, max_batches=None):
+    """Reindex the records popped from the reindex queue in batches.
+
+    Args:
+        index_records (callable): function indexing the list of uuids in bulk.
+        batch_size (int): number of records indexed together.
+        max_batches (int): maximum number of batches processed in one call.
+
+    Returns:
+        int: the number of records popped from the queue.
+    """
+    batch_size = batch_size or current_app.config["INDEXER_REINDEX_QUEUE_BATCH_SIZE"]
+    max_batches = max_batches or current_app.config["INDEXER_REINDEX_QUEUE_MAX_BATCHES"]
+    queue = ReindexQueue()
+    popped = 0
+    for _ in range(max_batches):
+        batch = queue.pop(batch_size)
+        if not batch:
+            break
+        records_uuids = [record_uuid for record_uuid, _ in batch]
+        try:
+            result = index_records(records_uuids)
+        except Exception:
+            _retry_records(queue, records_uuids)
+            raise
+        now = time.time()
+        for _, queued_at in batch:
+            reindex_queue_lag.observe(now - queued_at)
+        popped += len(batch)
+        failed_uuids = set()
+        if result["failures_count"]:
+            LOGGER.warning(
+                "Failed to reindex queued records",
+                failures_count=result["failures_count"],
+                failures=result["failures"],
+            )
+            failed_uuids = {
+                failure_info.get("_id")
+                for failure in result["failures"]
+                for failure_info in failure.values()
+            }
+            _retry_records(
+                queue,
+                [
+                    record_uuid
+                    for record_uuid in records_uuids
+                    if record_uuid in failed_uuids
+                ],
+            )
+        queue.reset_attempts(
+            [
+                record_uuid
+                for record_uuid in records_uuids
+                if record_uuid not in failed_uuids
+            ]
+        )
+    backlog = len(queue)
+    reindex_queue_backlog.set(backlog)
+    LOGGER.info("Drained reindex queue", popped=popped, backlog=backlog)
+    return popped
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 CERN.
+#
+# inspirehep is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+from datetime import datetime, timedelta
+
+import structlog
+from flask import current_app
+from invenio_db import db
+from invenio_pidstore.models import PersistentIdentifier
+from invenio_records.models import RecordMetadata
+from invenio_search import current_search
+from invenio_search.utils import build_alias_name, timestamp_suffix
+
+from inspirehep.indexer.base import InspireRecordIndexer
+from inspirehep.utils import chunker
+
+LOGGER = structlog.getLogger()
+
+# Settings of the new indexes while they are bulk loaded.
+BULK_LOAD_SETTINGS = {"index": {"number_of_replicas": 0, "refresh_interval": "-1"}}
+
+
+class IndexesRebuild(object):
+    def __init__(self, indexes):
+        """
+        Rebuild of indexes into new ones, switching the aliases once done.
+
+        The new indexes are created with the current mappings next to the
+        live ones, which keep serving the searches and the indexing of the
+        updated records while the new ones are loaded.
+
+        Args:
+            indexes (list(str)): the names of the indexes, e.g. ``records-hep``.
+        """
+        self.indexes = indexes
+        self.suffix = timestamp_suffix()
+        self.target_indexes = {index: f"{index}{self.suffix}" for index in indexes}
+        self.pid_types = [
+            pid_type
+            for pid_type, index in current_app.config["PID_TYPE_TO_INDEX"].items()
+            if index in indexes
+        ]
+        self.settings = {}
+
+    def _get_new_index_name(self, index):
+        return build_alias_name(self.target_indexes[index])
+
+    def create_indexes(self):
+        """Create the new indexes, with the settings for a bulk load."""
+        for index in self.indexes:
+            (new_index, _), _ = current_search.create_index(
+                index, suffix=self.suffix, create_write_alias=False
+            )
+            settings = current_search.client.indices.get_settings(
+                index=new_index, name="index.number_of_replicas,index.refresh_interval"
+            )[new_index]["settings"]["index"]
+            self.settings[index] = {
+                "number_of_replicas": settings.get("number_of_replicas"),
+                "refresh_interval": settings.get("refresh_interval"),
+            }
+            current_search.client.indices.put_settings(
+                index=new_index, body=BULK_LOAD_SETTINGS
+            )
+            LOGGER.info("Index created", index=new_index)
+
+    def restore_settings(self):
+        """Restore the settings of the new indexes and refresh them."""
+        for index in self.indexes:
+            new_index = self._get_new_index_name(index)
+            current_search.client.indices.put_settings(
+                index=new_index, body={"index": self.settings[index]}
+            )
+            current_search.client.indices.refresh(index=new_index)
+
+    def delete_indexes(self):
+        """Delete the new indexes, e.g. when the rebuild failed."""
+        new_indexes = [self._get_new_index_name(index) for index in self.indexes]
+        current_search.client.indices.delete(
+            index=",".join(new_indexes), ignore_unavailable=True
+        )
+        LOGGER.info("Indexes deleted", indexes=new_indexes)
+
+    def get_updated_records_uuids(self, since):
+        """Return the uuids of the records of the indexes updated since the date."""
+        query = (
+            db.session.query(RecordMetadata.id)
+            .join(
+                PersistentIdentifier,
+                PersistentIdentifier.object_uuid == RecordMetadata.id,
+            )
+            .filter(
+                PersistentIdentifier.pid_type.in_(self.pid_types),
+                PersistentIdentifier.object_type == "rec",
+                RecordMetadata.updated >= since,
+            )
+            .distinct()
+        )
+        return [str(row.id) for row in query]
+
+    def replay_updated_records(self, since, into_new_indexes=True):
+        """Index again the records updated since the date.
+
+        Args:
+            since (datetime): the date of the last replay, or of the start of
+                the load.
+            into_new_indexes (bool): index into the new indexes, otherwise
+                into the ones of the aliases.
+
+        Returns:
+            tuple(datetime, int): the date to use for the next replay and the
+            number of replayed records.
+        """
+        next_since = datetime.utcnow() - timedelta(
+            seconds=current_app.config["INDEXER_REBUILD_REPLAY_OVERLAP"]
+        )
+        uuids = self.get_updated_records_uuids(since)
+        target_indexes = self.target_indexes if into_new_indexes else None
+        for uuids_chunk in chunker(
+            uuids, current_app.config["INDEXER_REINDEX_MAX_BATCH_SIZE"]
+        ):
+            InspireRecordIndexer().bulk_index(
+                uuids_chunk, target_indexes=target_indexes
+            )
+        LOGGER.info("Updated records replayed", since=since, count=len(uuids))
+        return next_since, len(uuids)
+
+    def swap_aliases(self):
+        """Move atomically all the aliases of the live indexes to the new ones.
+
+        Returns:
+            list(str): the indexes which are not used anymore.
+        """
+        client = current_search.client
+        actions = []
+        old_indexes = []
+        for index in self.indexes:
+            new_index = self._get_new_index_name(index)
+            alias = build_alias_name(index)
+            live_indexes = (
+                client.indices.get_alias(name=alias)
+                if client.indices.exists_alias(name=alias)
+                else {}
+            )
+            if not live_indexes:
+                actions.append({"add": {"index": new_index, "alias": alias}})
+            for live_index in live_indexes:
+                old_indexes.append(live_index)
+                for live_alias in client.indices.get_alias(index=live_index)[
+                    live_index
+                ]["aliases"]:
+                    actions.append(
+                        {"remove": {"index": live_index, "alias": live_alias}}
+                    )
+                    actions.append({"add": {"index": new_index, "alias": live_alias}})
+        client.indices.update_aliases(body={"actions": actions})
+        LOGGER.info("Aliases swapped", actions=actions)
+        return old_indexes
@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 CERN.
+#
+# inspirehep is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+import time
+from collections import deque
+from itertools import cycle
+from os import path, remove, replace
+
+import orjson
+import structlog
+from flask import current_app
+from invenio_db import db
+from invenio_pidstore.models import PersistentIdentifier, PIDStatus
+
+from inspirehep.indexer.tasks import batch_index
+
+LOGGER = structlog.getLogger()
+
+
+def iter_records_uuids(pid_types, page_size, after=None):
+    """Yield the uuids of the records to index, ordered by uuid.
+
+    The uuids are fetched by keyset pagination, every page is a query
+    starting after the last uuid of the previous one, so neither the DB nor
+    this process hold all of them at once.
+
+    Args:
+        pid_types (list(str)): the pid types of the records.
+        page_size (int): the number of uuids fetched by one query.
+        after (str): start after this uuid, e.g. the one of a checkpoint.
+    """
+    while True:
+        query = db.session.query(PersistentIdentifier.object_uuid).filter(
+            PersistentIdentifier.pid_type.in_(pid_types),
+            PersistentIdentifier.object_type == "rec",
+            PersistentIdentifier.status.in_(
+                (PIDStatus.REGISTERED, PIDStatus.REDIRECTED, PIDStatus.DELETED)
+            ),
+        )
+        if after:
+            query = query.filter(PersistentIdentifier.object_uuid > after)
+        page = [
+            str(row.object_uuid)
+            for row in query.order_by(PersistentIdentifier.object_uuid).limit(page_size)
+        ]
+        yield from page
+        if len(page) < page_size:
+            return
+        after = page[-1]
+
+
+class AdaptiveBatchSize(object):
+    def __init__(
+        self,
+        initial_size,
+        min_size,
+        max_size,
+        target_bytes,
+        target_duration,
+        smoothing=0.5,
+    ):
+        """
+        Size of the indexing batches, adapted to the finished batches.
+
+        After each batch the size is moved towards the number of records which
+        would make a batch of ``target_bytes`` serialized bytes indexed in
+        ``target_duration`` seconds, whichever is smaller.
+
+        Args:
+            initial_size (int): the size of the first batches.
+            min_size (int): the minimum size of a batch.
+            max_size (int): the maximum size of a batch.
+            target_bytes (int): the wanted size of a bulk request.
+            target_duration (float): the wanted duration of a bulk request.
+            smoothing (float): weight of the last batch in the new size.
+        """
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_bytes = target_bytes
+        self.target_duration = target_duration
+        self.smoothing = smoothing
+        self.size = self._clamp(initial_size)
+
+    def _clamp(self, size):
+        return max(self.min_size, min(self.max_size, int(size)))
+
+    def update(self, records_count, size, duration):
+        """Adapt the size to a finished batch.
+
+        Args:
+            records_count (int): the number of records in the batch.
+            size (int): the serialized bytes of the batch.
+            duration (float): how long indexing the batch took in seconds.
+
+        Returns:
+            int: the new size.
+        """
+        if not records_count:
+            return self.size
+        wanted_sizes = []
+        if size:
+            wanted_sizes.append(self.target_bytes * records_count / size)
+        if duration:
+            wanted_sizes.append(self.target_duration * records_count / duration)
+        if wanted_sizes:
+            wanted_size = min(wanted_sizes)
+            self.size = self._clamp(
+                self.smoothing * wanted_size + (1 - self.smoothing) * self.size
+            )
+        return self.size
+
+
+class ReindexCheckpoint(object):
+    def __init__(self, file_path, pid_types):
+        """
+        Progress of a reindex, persisted so an interrupted one can resume.
+
+        The checkpoint is the last uuid before which all the batches have
+        finished, batches finish out of order so it only moves forward once
+        the oldest running batch is done.
+
+        Args:
+            file_path (str): the path of the checkpoint file.
+            pid_types (list(str)): the pid types of the reindex.
+        """
+        self.file_path = file_path
+        self.pid_types = sorted(pid_types)
+        self.last_uuid = None
+        self.counters = {
+            "batches": 0,
+            "records": 0,
+            "success": 0,
+            "failures_count": 0,
+            "batch_errors": 0,
+            "size": 0,
+        }
+
+    def load(self):
+        """Load the checkpoint of a previous reindex of the same pid types.
+
+        Returns:
+            bool: whether there was a checkpoint to resume from.
+        """
+        if not path.exists(self.file_path):
+            return False
+        with open(self.file_path, "rb") as checkpoint_file:
+            checkpoint = orjson.loads(checkpoint_file.read())
+        if checkpoint["pid_types"] != self.pid_types:
+            raise ValueError(
+                f"The checkpoint is for the pid types {checkpoint['pid_types']}."
+            )
+        self.last_uuid = checkpoint["last_uuid"]
+        self.counters.update(checkpoint["counters"])
+        return True
+
+    def save(self):
+        checkpoint = {
+            "pid_types": self.pid_types,
+            "last_uuid": self.last_uuid,
+            "counters": self.counters,
+        }
+        temporary_path = f"{self.file_path}.tmp"
+        with open(temporary_path, "wb") as checkpoint_file:
+            checkpoint_file.write(orjson.dumps(checkpoint))
+        replace(temporary_path, self.file_path)
+
+    def clear(self):
+        """Remove the checkpoint file, if it was saved."""
+        try:
+            remove(self.file_path)
+        except FileNotFoundError:
+            pass
+
+
+class ReindexOrchestrator(object):
+    def __init__(
+        self,
+        pid_types,
+        queues,
+        checkpoint,
+        batch_size,
+        page_size=2000,
+        max_in_flight=50,
+        request_timeout=None,
+        poll_interval=0.5,
+        target_indexes=None,
+    ):
+        """
+        Reindex all the records of some pid types with ``batch_index`` tasks.
+
+        The uuids are streamed from the DB and cut in batches whose size adapts
+        to the serialized bytes and the indexing time of the finished batches.
+        At most ``max_in_flight`` tasks are running at once, sent to the
+        queues in turn, and the checkpoint is saved every time a batch finishes.
+
+        Args:
+            pid_types (list(str)): the pid types of the records.
+            queues (list(str)): the queues the tasks are sent to.
+            checkpoint (ReindexCheckpoint): the progress of the reindex.
+            batch_size (int): the size of the first batches.
+            page_size (int): the number of uuids fetched by one query.
+            max_in_flight (int): the maximum number of running tasks.
+            request_timeout (int): timeout of the bulk requests to ES.
+            poll_interval (float): seconds between checks of the running tasks.
+            target_indexes (dict): indexes to use instead of the ones of the
+                records.
+        """
+        self.pid_types = pid_types
+        self.queues = cycle(queues)
+        self.checkpoint = checkpoint
+        self.page_size = page_size
+        self.max_in_flight = max_in_flight
+        self.request_timeout = request_timeout
+        self.poll_interval = poll_interval
+        self.target_indexes = target_indexes
+        self.batch_size = AdaptiveBatchSize(
+            batch_size,
+            min(batch_size, current_app.config["INDEXER_REINDEX_MIN_BATCH_SIZE"]),
+            current_app.config["INDEXER_REINDEX_MAX_BATCH_SIZE"],
+            current_app.config["INDEXER_REINDEX_TARGET_BATCH_BYTES"],
+            current_app.config["INDEXER_REINDEX_TARGET_BATCH_DURATION"],
+        )
+        self.in_flight = deque()
+        self.failures = []
+        self.batch_errors = []
+        self.on_progress = None
+
+    def _send_batch(self, uuids):
+        task = batch_index.apply_async(
+            kwargs={
+                "records_uuids": uuids,
+                "request_timeout": self.request_timeout,
+                "measure_size": True,
+                "target_indexes": self.target_indexes,
+            },
+            queue=next(self.queues),
+        )
+        self.in_flight.append((task, uuids))
+
+    def _collect_finished(self):
+        """Collect the finished tasks and advance the checkpoint.
+
+        Returns:
+            int: the number of finished tasks.
+        """
+        finished = [(task, uuids) for task, uuids in self.in_flight if task.ready()]
+        if not finished:
+            return 0
+        counters = self.checkpoint.counters
+        for task, uuids in finished:
+            counters["batches"] += 1
+            counters["records"] += len(uuids)
+            if self.on_progress:
+                self.on_progress(len(uuids))
+            if task.failed():
+                counters["batch_errors"] += 1
+                self.batch_errors.append(
+                    {"task_id": task.id, "error": str(task.result), "uuids": uuids}
+                )
+                continue
+            result = task.result
+            counters["success"] += result["success"]
+            counters["failures_count"] += result["failures_count"]
+            counters["size"] += result.get("size", 0)
+            self.failures.extend(result["failures"])
+            self.batch_size.update(
+                len(uuids), result.get("size", 0), result.get("duration", 0)
+            )
+
+        finished_ids = {task.id for task, _ in finished}
+        while self.in_flight and self.in_flight[0][0].id in finished_ids:
+            _, uuids = self.in_flight.popleft()
+            self.checkpoint.last_uuid = uuids[-1]
+        self.in_flight = deque(
+            (task, uuids)
+            for task, uuids in self.in_flight
+            if task.id not in finished_ids
+        )
+        self.checkpoint.save()
+        return len(finished)
+
+    def _wait(self, max_in_flight):
+        while len(self.in_flight) > max_in_flight:
+            if not self._collect_finished():
+                time.sleep(self.poll_interval)
+
+    def run(self, on_progress=None):
+        """Index all the records after the checkpoint.
+
+        Args:
+            on_progress (callable): called with the number of records of
+                every finished batch.
+
+        Returns:
+            dict: the throughput report.
+        """
+        self.on_progress = on_progress
+        start = time.monotonic()
+        records_before = self.checkpoint.counters["records"]
+        size_before = self.checkpoint.counters["size"]
+        batch = []
+        for uuid in iter_records_uuids(
+            self.pid_types, self.page_size, after=self.checkpoint.last_uuid
+        ):
+            batch.append(uuid)
+            if len(batch) >= self.batch_size.size:
+                self._wait(self.max_in_flight - 1)
+                self._send_batch(batch)
+                batch = []
+        if batch:
+            self._wait(self.max_in_flight - 1)
+            self._send_batch(batch)
+        self._wait(0)
+
+        duration = time.monotonic() - start
+        counters = self.checkpoint.counters
+        records = counters["records"] - records_before
+        size = counters["size"] - size_before
+        return {
+            "pid_types": self.checkpoint.pid_types,
+            "duration": duration,
+            "records_per_second": records / duration if duration else 0,
+            "bytes_per_second": size / duration if duration else 0,
+            "last_batch_size": self.batch_size.size,
+            "total": counters,
+        }
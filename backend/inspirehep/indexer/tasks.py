@@ -14,6 +14,7 @@ from elasticsearch import (
     NotFoundError,
     RequestError,
 )
+from flask import current_app
 from sqlalchemy.exc import (
     DisconnectionError,
     OperationalError,
@@ -25,7 +26,9 @@ from sqlalchemy.orm.exc import NoResultFound, StaleDataError
 
 from inspirehep.indexer.api import get_references_to_update
 from inspirehep.indexer.base import InspireRecordIndexer
+from inspirehep.indexer.queue import ReindexQueue, drain_reindex_queue
 from inspirehep.records.api import InspireRecord
+from inspirehep.search.cache import invalidate_search_cache
 
 LOGGER = structlog.getLogger()
 
@@ -44,20 +47,44 @@ CELERY_INDEX_RECORD_RETRY_ON_EXCEPTIONS = (
 )
 
 
+def _invalidate_search_cache():
+    """Invalidate the search cache now and once ES has refreshed the indexes.
+
+    The searches sent before the refresh don't see the indexed records yet, so
+    their responses cached meanwhile are invalidated by the second bump.
+    """
+    invalidate_search_cache()
+    if current_app.config.get("FEATURE_FLAG_ENABLE_SEARCH_CACHE"):
+        invalidate_search_cache_after_refresh.apply_async(
+            countdown=current_app.config["SEARCH_CACHE_INVALIDATION_DELAY"]
+        )
+
+
 @shared_task(ignore_result=False, bind=True)
-def batch_index(self, records_uuids, request_timeout=None):
+def batch_index(
+    self, records_uuids, request_timeout=None, measure_size=False, target_indexes=None
+):
     """Process all provided references and index them in bulk.
     Be sure that uuids are not duplicated in batch.
     Args:
         records_uuids (list): list of uuids to process. All duplicates will be removed.
         request_timeout: Timeout in which ES should respond. Otherwise break.
+        measure_size (bool): return the size of the serialized records too.
+        target_indexes (dict): indexes to use instead of the ones of the records.
 
     Returns:
         dict: dict with success count and failure list
                 (with uuids of failed records)
     """
     LOGGER.info(f"Starting task `batch_index for {len(records_uuids)} records")
-    return InspireRecordIndexer().bulk_index(records_uuids, request_timeout)
+    result = InspireRecordIndexer().bulk_index(
+        records_uuids,
+        request_timeout,
+        measure_size=measure_size,
+        target_indexes=target_indexes,
+    )
+    _invalidate_search_cache()
+    return result
 
 
 @shared_task(
@@ -104,7 +131,26 @@ def index_record(self, uuid, record_version=None, force_delete=None):
                 error=err,
             )
 
+    _invalidate_search_cache()
     uuids_to_reindex = get_references_to_update(record)
 
-    if uuids_to_reindex:
+    if not uuids_to_reindex:
+        return
+    if current_app.config.get("FEATURE_FLAG_ENABLE_REINDEX_QUEUE"):
+        ReindexQueue().push(uuids_to_reindex)
+    else:
         batch_index(list(uuids_to_reindex))
+
+
+@shared_task(ignore_result=True)
+def invalidate_search_cache_after_refresh():
+    invalidate_search_cache()
+
+
+@shared_task(ignore_result=True, bind=True)
+def process_reindex_queue(self):
+    """Reindex in bulk the records waiting in the reindex queue."""
+    if not current_app.config.get("FEATURE_FLAG_ENABLE_REINDEX_QUEUE"):
+        return
+    if drain_reindex_queue(InspireRecordIndexer().bulk_index):
+        _invalidate_search_cache()
@@ -5,15 +5,87 @@
 # inspirehep is free software; you can redistribute it and/or modify it under
 # the terms of the MIT License; see LICENSE file for more details.
 
+import time
+from collections import OrderedDict
+
+import orjson
 import requests
+import structlog
 from flask import current_app
 from inspire_dojson.utils import get_recid_from_ref, get_record_ref
 from inspire_matcher import match
+from inspire_matcher.core import compile
 from inspire_utils.dedupers import dedupe_list
 from inspire_utils.record import get_value
+from invenio_search import current_search_client as es
+from invenio_search.utils import prefix_index
+from prometheus_client import Counter
+
+from inspirehep.utils import chunker
 
 from .parsers import GrobidReferenceParser
 
+LOGGER = structlog.getLogger()
+
+reference_matcher_cache_hits = Counter(
+    "reference_matcher_cache_hits",
+    "How many reference matcher queries were answered from the cache.",
+)
+reference_matcher_cache_misses = Counter(
+    "reference_matcher_cache_misses",
+    "How many reference matcher queries were sent to ES.",
+)
+
+
+class MatchedRecidsCache:
+    def __init__(self, max_size, ttl):
+        """
+        LRU cache of the records matched by the matcher queries.
+
+        Args:
+            max_size (int): maximum number of cached queries.
+            ttl (int): time in seconds after which a cached query expires.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, recids = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return recids
+
+    def set(self, key, recids):
+        self._entries[key] = (time.monotonic() + self.ttl, recids)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+_matched_recids_cache = None
+
+
+def get_matched_recids_cache():
+    """Return the cache of the matched records, if it's enabled."""
+    global _matched_recids_cache
+    if not current_app.config.get("FEATURE_FLAG_ENABLE_REFERENCE_MATCHER_CACHE"):
+        return None
+    if _matched_recids_cache is None:
+        _matched_recids_cache = MatchedRecidsCache(
+            current_app.config["REFERENCE_MATCHER_CACHE_SIZE"],
+            current_app.config["REFERENCE_MATCHER_CACHE_TTL"],
+        )
+    return _matched_recids_cache
+
 
 def get_reference_from_grobid(query):
     data = {"citations": query}
@@ -31,6 +103,123 @@ def _add_match_to_reference(reference, matched_recid, es_index):
         reference["record"] = get_record_ref(matched_recid, "literature")
 
 
+def _set_publication_info_year_type(reference, year_type):
+    # XXX: avoid this type casting.
+    try:
+        reference["reference"]["publication_info"]["year"] = year_type(
+            reference["reference"]["publication_info"]["year"]
+        )
+    except KeyError:
+        pass
+
+
+def _compile_queries(reference, config):
+    """Return the bodies of the ES queries ``match`` sends for the reference."""
+    bodies = []
+    for step in config["algorithm"]:
+        for query in step["queries"]:
+            body = compile(
+                query,
+                reference,
+                collections=config.get("collections"),
+                match_deleted=config.get("match_deleted", False),
+            )
+            if body:
+                bodies.append(body)
+    return bodies
+
+
+def _search_matched_recids(bodies, config):
+    """Return the control numbers of the records matched by every query.
+
+    The queries which are not cached are sent in ``_msearch`` requests.
+    """
+    index = prefix_index(config["index"])
+    query_config = {"size": config.get("size", 10)}
+    if config.get("source"):
+        query_config["_source"] = config["source"]
+    cache = get_matched_recids_cache()
+
+    results = [None] * len(bodies)
+    keys = [
+        orjson.dumps([index, query_config, body], option=orjson.OPT_SORT_KEYS)
+        for body in bodies
+    ]
+    if cache:
+        for position, key in enumerate(keys):
+            results[position] = cache.get(key)
+    missing = [position for position, recids in enumerate(results) if recids is None]
+    if cache:
+        reference_matcher_cache_hits.inc(len(bodies) - len(missing))
+        reference_matcher_cache_misses.inc(len(missing))
+
+    max_chunk_size = current_app.config["REFERENCE_MATCHER_MSEARCH_SIZE"]
+    for chunk in chunker(missing, max_chunk_size):
+        request = []
+        for position in chunk:
+            request.extend([{"index": index}, {**bodies[position], **query_config}])
+        responses = es.msearch(body=request)["responses"]
+        for position, response in zip(chunk, responses):
+            if "error" in response:
+                LOGGER.warning("Matcher query failed", error=response["error"])
+                # raises the error like ``match`` would
+                response = es.search(index=index, body=bodies[position], **query_config)
+            recids = [
+                hit["_source"]["control_number"] for hit in response["hits"]["hits"]
+            ]
+            results[position] = recids
+            if cache:
+                cache.set(keys[position], recids)
+    return results
+
+
+def match_references_with_config_in_bulk(references, config):
+    """Return the records matched by every reference, as ``match`` would.
+
+    The queries of all the references are sent together, see
+    :func:`_search_matched_recids`.
+
+    Args:
+        references (list): the metadata of the references.
+        config (dict): the inspire-matcher configuration.
+
+    Returns:
+        list: for every reference the list of matched recids.
+    """
+    for reference in references:
+        _set_publication_info_year_type(reference, str)
+    try:
+        if any(step.get("validator") for step in config["algorithm"]):
+            return [
+                dedupe_list(
+                    [
+                        matched_record["_source"]["control_number"]
+                        for matched_record in match(reference, config)
+                    ]
+                )
+                for reference in references
+            ]
+        bodies_by_reference = [
+            _compile_queries(reference, config) for reference in references
+        ]
+    finally:
+        for reference in references:
+            _set_publication_info_year_type(reference, int)
+
+    recids_by_query = iter(
+        _search_matched_recids(
+            [body for bodies in bodies_by_reference for body in bodies], config
+        )
+    )
+    matched_recids = []
+    for bodies in bodies_by_reference:
+        recids = []
+        for _ in bodies:
+            recids.extend(next(recids_by_query))
+        matched_recids.append(dedupe_list(recids))
+    return matched_recids
+
+
 def match_reference_with_config(reference, config, previous_matched_recid=None):
     """Match a reference using inspire-matcher given the config.
     Args:
@@ -181,20 +370,97 @@ def match_reference_control_numbers_with_relaxed_journal_titles(reference):
     return matches
 
 
+def _match_references_by_config(references, configs_by_reference):
+    """Return the recids matched by every config of every reference.
+
+    The references are matched config by config: the queries of all the
+    references not uniquely matched by the previous configs are sent together.
+
+    Args:
+        references (list): the list of references.
+        configs_by_reference (list): the configs of every reference, ``None``
+            for the references not to match.
+
+    Returns:
+        list: for every reference the list of ``(config, matched_recids)``.
+    """
+    matched_recids_by_reference = [[] for _ in references]
+    unmatched = [
+        position
+        for position, configs in enumerate(configs_by_reference)
+        if configs is not None
+    ]
+    config_position = 0
+    while unmatched:
+        references_by_config = {}
+        for position in unmatched:
+            configs = configs_by_reference[position]
+            if config_position < len(configs):
+                config = configs[config_position]
+                references_by_config.setdefault(id(config), (config, []))[1].append(
+                    position
+                )
+        unmatched = []
+        for config, positions in references_by_config.values():
+            matched_recids = match_references_with_config_in_bulk(
+                [references[position] for position in positions], config
+            )
+            for position, recids in zip(positions, matched_recids):
+                matched_recids_by_reference[position].append((config, recids))
+                # it can still match the previous reference with the next configs
+                if len(recids) != 1:
+                    unmatched.append(position)
+        config_position += 1
+    return matched_recids_by_reference
+
+
+def _add_first_match_to_reference(
+    reference, matched_recids_by_config, previous_matched_recid
+):
+    """Link the reference to the match of the first config matching it.
+
+    As ``match_reference`` does, a config matches the reference if it
+    matches one record or the record of the previous reference.
+    """
+    reference.pop("record", None)
+    for config, matched_recids in matched_recids_by_config:
+        if len(matched_recids) == 1:
+            _add_match_to_reference(reference, matched_recids[0], config["index"])
+        elif previous_matched_recid in matched_recids:
+            _add_match_to_reference(reference, previous_matched_recid, config["index"])
+        if "record" in reference:
+            break
+
+
 def match_references(references):
     """Match references to their respective records in INSPIRE.
+
+    The references are matched in bulk, see :func:`_match_references_by_config`.
     Args:
         references (list): the list of references.
     Returns:
         dict: the match result
     """
+    configs_by_reference = [
+        None if reference.get("curated_relation") else match_reference_config(reference)
+        for reference in references
+    ]
+    matched_recids_by_reference = _match_references_by_config(
+        references, configs_by_reference
+    )
+
     matched_references, previous_matched_recid = [], None
     any_link_modified = False
     added_recids = []
     removed_recids = []
-    for reference in references:
+    for reference, configs, matched_recids_by_config in zip(
+        references, configs_by_reference, matched_recids_by_reference
+    ):
         current_record_ref = get_value(reference, "record.$ref")
-        reference = match_reference(reference, previous_matched_recid)
+        if configs is not None:
+            _add_first_match_to_reference(
+                reference, matched_recids_by_config, previous_matched_recid
+            )
         new_record_ref = get_value(reference, "record.$ref")
 
         if current_record_ref != new_record_ref:
@@ -9,6 +9,15 @@ from .validators import authors_validator
 
 GROBID_URL = "https://grobid.inspirebeta.net"
 
+REFERENCE_MATCHER_MSEARCH_SIZE = 200
+"""Maximum number of queries sent in one ``_msearch`` request."""
+
+REFERENCE_MATCHER_CACHE_SIZE = 100000
+"""Maximum number of queries whose matched records are cached."""
+
+REFERENCE_MATCHER_CACHE_TTL = 60 * 10
+"""Time in seconds for which the records matched by a query are cached."""
+
 REFERENCE_MATCHER_UNIQUE_IDENTIFIERS_CONFIG = {
     "algorithm": [
         {
@@ -78,8 +78,28 @@ def migrate():
     default=False,
     help="Wait for migration to complete. This only has an effect if the -m flag is not set.",
 )
+@click.option(
+    "-p",
+    "--processes",
+    default=1,
+    type=int,
+    help="Number of processes splitting and compressing the records.",
+)
+@click.option(
+    "-c",
+    "--checkpoint-file",
+    type=click.Path(dir_okay=False, resolve_path=True),
+    help="File keeping the position in the file, to resume it if interrupted.",
+)
 @with_appcontext
-def migrate_file(file_name, mirror_only=False, force=False, wait=False):
+def migrate_file(
+    file_name,
+    mirror_only=False,
+    force=False,
+    wait=False,
+    processes=1,
+    checkpoint_file=None,
+):
     """Migrate the records in the provided file.
 
     The file can be an (optionally-gzipped) XML file containing MARCXML, or a
@@ -88,7 +108,9 @@ def migrate_file(file_name, mirror_only=False, force=False, wait=False):
     halt_if_debug_mode(force=force)
     click.echo(f"Migrating records from file: {file_name}")
 
-    populate_mirror_from_file(file_name)
+    populate_mirror_from_file(
+        file_name, processes=processes, checkpoint_file=checkpoint_file
+    )
     if not mirror_only:
         task = migrate_from_mirror()
         if wait:
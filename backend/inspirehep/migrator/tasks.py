@@ -7,12 +7,17 @@
 
 """Manage migration from INSPIRE legacy instance."""
 import gzip
+import os
 import re
 import tarfile
 import time
+from collections import deque
 from concurrent.futures import TimeoutError as ThreadsTimeoutError
 from contextlib import closing
+from datetime import datetime
+from multiprocessing import Pool
 
+import orjson
 import requests
 import structlog
 from billiard.exceptions import SoftTimeLimitExceeded
@@ -31,6 +36,7 @@ from invenio_pidstore.models import PersistentIdentifier
 from jsonschema import ValidationError
 from psycopg2 import OperationalError
 from redis import ResponseError
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import InvalidRequestError, StatementError
 
 from inspirehep.hal.api import push_to_hal
@@ -53,6 +59,8 @@ from inspirehep.utils import chunker
 
 LOGGER = structlog.getLogger()
 CHUNK_SIZE = 100
+MIRROR_BLOCK_SIZE = 8 * 1024 * 1024
+MIRROR_UPSERT_CHUNK_SIZE = 500
 MAX_RETRY_COUNT = 6
 RETRY_BACKOFF = 10
 
@@ -66,42 +74,111 @@ def split_blob(blob):
         yield match.group()
 
 
-def split_stream(stream):
-    """Split the stream using <record.*?>.*?</record> as pattern.
-    This operates line by line in order not to load the entire file in memory.
-    """
-    len_closing_tag = len("</record>")
-    buf = []
-    for row in stream:
-        row = row.decode("utf8")
-        index = row.rfind("</record>")
-        if index >= 0:
-            end_index = index + len_closing_tag
-            buf.append(row[:end_index])
-            for blob in split_blob("".join(buf)):
-                yield blob.encode("utf8")
-                start_index = index + len_closing_tag
-            buf = [row[start_index:]]
-        else:
-            buf.append(row)
+def open_file_streams(source):
+    """Yield the name and the uncompressed stream of every file in the source.
 
-
-def read_file(source):
+    The name is ``None`` unless the source is a prodsync tarball.
+    """
     if source.endswith(".gz"):
         with gzip.open(source, "rb") as fd:
-            for line in fd:
-                yield line
+            yield None, fd
     elif source.endswith(".tar"):  # assuming prodsync tarball
         with closing(tarfile.open(source)) as tar:
             for file_ in tar:
-                echo(f"Processing {file_.name}")
-                unzipped = gzip.GzipFile(fileobj=tar.extractfile(file_), mode="rb")
-                for line in unzipped:
-                    yield line
+                yield file_.name, gzip.GzipFile(
+                    fileobj=tar.extractfile(file_), mode="rb"
+                )
     else:
         with open(source, "rb") as fd:
-            for line in fd:
-                yield line
+            yield None, fd
+
+
+def read_record_blocks(stream, offset=0, block_size=MIRROR_BLOCK_SIZE):
+    """Read the stream in blocks which end with a complete record.
+
+    Args:
+        stream: the uncompressed stream.
+        offset (int): the position in the stream to start reading from.
+        block_size (int): the size of every read.
+
+    Yields:
+        tuple: the block and the position in the stream right after it.
+    """
+    closing_tag = b"</record>"
+    if offset:
+        stream.seek(offset)
+    buf = b""
+    while True:
+        data = stream.read(block_size)
+        if not data:
+            return
+        buf += data
+        end_index = buf.rfind(closing_tag)
+        if end_index < 0:
+            continue
+        end_index += len(closing_tag)
+        offset += end_index
+        yield buf[:end_index], offset
+        buf = buf[end_index:]
+
+
+def read_file_record_blocks(source, checkpoint=None):
+    """Yield the blocks of records of the source with their position.
+
+    Args:
+        source (str): the path of the file.
+        checkpoint (dict): the position to resume from, as yielded previously.
+
+    Yields:
+        tuple: the block and the position right after it in the source, as a
+        dict with the ``name`` of the file in the tarball and the ``offset``.
+    """
+    for name, stream in open_file_streams(source):
+        offset = 0
+        if checkpoint:
+            if name != checkpoint["name"]:
+                continue
+            offset = checkpoint["offset"]
+            checkpoint = None
+        echo(f"Processing {name or source}")
+        for block, offset in read_record_blocks(stream, offset, MIRROR_BLOCK_SIZE):
+            yield block, {"name": name, "offset": offset}
+
+
+def parse_records_block(block):
+    """Split a block of MARCXML and compress its records.
+
+    Returns:
+        list(tuple): the recid and the compressed MARCXML of every record.
+    """
+    records = []
+    for raw_record in split_blob(block.decode("utf8")):
+        prod_record = LegacyRecordsMirror.from_marcxml(raw_record.encode("utf8"))
+        records.append((prod_record.recid, prod_record._marcxml))
+    return records
+
+
+def parse_records_blocks(blocks, processes=1):
+    """Parse the blocks with ``parse_records_block`` in a pool of processes.
+
+    Yields:
+        tuple: the parsed records and the position of their block, in order.
+    """
+    if processes <= 1:
+        for block, position in blocks:
+            yield parse_records_block(block), position
+        return
+
+    with Pool(processes) as pool:
+        pending = deque()
+        for block, position in blocks:
+            pending.append((pool.apply_async(parse_records_block, (block,)), position))
+            if len(pending) >= 2 * processes:
+                result, position = pending.popleft()
+                yield result.get(), position
+        while pending:
+            result, position = pending.popleft()
+            yield result.get(), position
 
 
 def count_consumers_for_queue(queue_name):
@@ -298,11 +375,50 @@ def migrate_from_file(source):
     migrate_from_mirror()
 
 
-def populate_mirror_from_file(source):
-    for i, chunk in enumerate(chunker(split_stream(read_file(source)), CHUNK_SIZE)):
-        insert_into_mirror(chunk)
-        inserted_records = i * CHUNK_SIZE + len(chunk)
+def read_checkpoint(checkpoint_file, source):
+    if not checkpoint_file or not os.path.exists(checkpoint_file):
+        return None
+    with open(checkpoint_file, "rb") as fd:
+        checkpoint = orjson.loads(fd.read())
+    if checkpoint["source"] != source:
+        return None
+    return checkpoint["position"]
+
+
+def write_checkpoint(checkpoint_file, source, position):
+    tmp_file = f"{checkpoint_file}.tmp"
+    with open(tmp_file, "wb") as fd:
+        fd.write(orjson.dumps({"source": source, "position": position}))
+    os.replace(tmp_file, checkpoint_file)
+
+
+def populate_mirror_from_file(source, processes=1, checkpoint_file=None):
+    """Insert or update in the mirror all the records of the source.
+
+    The records are split and compressed by a pool of processes, while this
+    one upserts them in bulk.
+
+    Args:
+        source (str): the path of the file.
+        processes (int): number of processes splitting the file.
+        checkpoint_file (str): path of the file where the position in the source
+            is saved after every block is inserted. The population resumes from
+            it if it exists, and it's removed once the whole source is inserted.
+    """
+    checkpoint = read_checkpoint(checkpoint_file, source)
+    if checkpoint:
+        echo(f"Resuming from {checkpoint}")
+    blocks = read_file_record_blocks(source, checkpoint)
+    inserted_records = 0
+    for records, position in parse_records_blocks(blocks, processes):
+        upsert_into_mirror(records)
+        db.session.commit()
+        if checkpoint_file:
+            write_checkpoint(checkpoint_file, source, position)
+        inserted_records += len(records)
         echo(f"Inserted {inserted_records} records into mirror")
+    if checkpoint_file and os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
 
 
 @shared_task(
@@ -444,15 +560,51 @@ def run_hal_push(uuids):
     return uuids
 
 
+def upsert_into_mirror(records):
+    """Insert the records in the mirror, or update them if they are there.
+
+    Like merging ``LegacyRecordsMirror.from_marcxml``, but with one multi-row
+    ``INSERT ... ON CONFLICT`` per chunk of records.
+
+    Args:
+        records (list(tuple)): the recid and the compressed MARCXML of every
+            record, if a recid is repeated the last one is kept.
+    """
+    table = LegacyRecordsMirror.__table__
+    now = datetime.utcnow()
+    records = dict(records)
+    for chunk in chunker(records.items(), MIRROR_UPSERT_CHUNK_SIZE):
+        statement = insert(table).values(
+            [
+                {
+                    "recid": recid,
+                    "marcxml": marcxml,
+                    "valid": None,
+                    "last_updated": now,
+                    "collection": "",
+                }
+                for recid, marcxml in chunk
+            ]
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.recid],
+            set_={
+                "marcxml": statement.excluded.marcxml,
+                "valid": None,
+                "last_updated": statement.excluded.last_updated,
+            },
+        )
+        db.session.execute(statement)
+
+
 def insert_into_mirror(raw_records):
-    migrated_records = []
-    for raw_record in raw_records:
-        prod_record = LegacyRecordsMirror.from_marcxml(raw_record)
-        db.session.merge(prod_record)
-        if prod_record:
-            migrated_records.append(prod_record.recid)
+    records = [
+        (prod_record.recid, prod_record._marcxml)
+        for prod_record in map(LegacyRecordsMirror.from_marcxml, raw_records)
+    ]
+    upsert_into_mirror(records)
     db.session.commit()
-    return migrated_records
+    return [recid for recid, _ in records]
 
 
 def migrate_and_insert_record(
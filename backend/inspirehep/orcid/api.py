@@ -10,6 +10,7 @@ from flask import current_app
 from flask_celeryext.app import current_celery_app
 
 from inspirehep.orcid import push_access_tokens
+from inspirehep.orcid.push_queue import OrcidPushQueue
 from inspirehep.orcid.utils import get_orcids_for_push
 
 LOGGER = structlog.getLogger()
@@ -21,6 +22,21 @@ def _send_push_task(kwargs):
     )
 
 
+def _send_push_author_task(orcid):
+    current_celery_app.send_task(
+        "inspirehep.orcid.tasks.orcid_push_author",
+        queue="orcid_push",
+        kwargs={"orcid": orcid},
+        countdown=current_app.config["ORCID_PUSH_QUEUE_DEBOUNCE"],
+    )
+
+
+def _queue_push(orcid, recid, oauth_token, kwargs_to_pusher):
+    """Queue the push in the ORCID queue, scheduling its job if needed."""
+    if OrcidPushQueue(orcid).push(recid, oauth_token, kwargs_to_pusher):
+        _send_push_author_task(orcid)
+
+
 def push_to_orcid(record):
     """If needed, queue the push of the new changes to ORCID."""
     if not current_app.config["FEATURE_FLAG_ENABLE_ORCID_PUSH"]:
@@ -37,6 +53,9 @@ def push_to_orcid(record):
     kwargs_to_pusher = dict(record_db_version=record.model.version_id)
 
     for orcid, access_token in orcids_and_tokens:
+        if current_app.config.get("FEATURE_FLAG_ENABLE_ORCID_PUSH_QUEUE"):
+            _queue_push(orcid, record["control_number"], access_token, kwargs_to_pusher)
+            continue
         _send_push_task(
             kwargs={
                 "orcid": orcid,
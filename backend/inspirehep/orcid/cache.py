@@ -8,15 +8,20 @@
 import hashlib
 import io
 
-import flask
+import orjson
 from flask import current_app as app
-from redis import StrictRedis
 from time_execution import time_execution
 
+from inspirehep.utils import get_redis
+
 from .converter import OrcidConverter
 
 CACHE_PREFIX = None
 
+# Bump it whenever ``OrcidConverter`` changes its output for the same values,
+# so all the works are pushed again.
+PROJECTION_HASH_VERSION = 1
+
 
 class OrcidCache(object):
     def __init__(self, orcid, recid):
@@ -33,12 +38,7 @@ class OrcidCache(object):
 
     @property
     def redis(self):
-        redis = getattr(flask.g, "redis_client", None)
-        if redis is None:
-            url = app.config.get("CACHE_REDIS_URL")
-            redis = StrictRedis.from_url(url, decode_responses=True)
-            flask.g.redis_client = redis
-        return redis
+        return get_redis()
 
     @property
     def _key(self):
@@ -68,7 +68,9 @@ class OrcidCache(object):
 
         if inspire_record:
             if not self._new_hash_value:
-                self._new_hash_value = _OrcidHasher(inspire_record).compute_hash()
+                self._new_hash_value = _OrcidHasher(
+                    inspire_record
+                ).compute_projection_hash()
             data["hash"] = self._new_hash_value
 
         self.redis.hmset(self._key, data)
@@ -96,14 +98,129 @@ class OrcidCache(object):
         """
         if not self._cached_hash_value:
             self.read_work_putcode()
+        has_changed = self._has_content_changed(_OrcidHasher(inspire_record))
+        if self._is_hash_outdated(has_changed):
+            self.redis.hset(self._key, "hash", self._new_hash_value)
+        return has_changed
+
+    def _has_content_changed(self, hasher):
+        """Compare the cached hash with the one of the hasher's record.
+
+        The hashes written before the projection hash was introduced are the
+        hashes of the whole XML, those are compared with the XML hash instead.
+        """
         if not self._new_hash_value:
-            self._new_hash_value = _OrcidHasher(inspire_record).compute_hash()
-        return self._cached_hash_value != self._new_hash_value
+            self._new_hash_value = hasher.compute_projection_hash()
+        if self._cached_hash_value == self._new_hash_value:
+            return False
+        if _OrcidHasher.is_xml_hash(self._cached_hash_value):
+            return self._cached_hash_value != hasher.compute_hash()
+        return True
+
+    def _is_hash_outdated(self, has_changed):
+        """True if the content didn't change but the cached hash is an XML hash."""
+        return not has_changed and self._cached_hash_value != self._new_hash_value
+
+
+class OrcidCacheBatch(object):
+    def __init__(self, works):
+        """
+        Orcid cached data of many works, read and written in redis pipelines.
+
+        Args:
+            works (list(tuple)): the (orcid, recid) pairs of the works.
+        """
+        self.caches = [OrcidCache(orcid, str(recid)) for orcid, recid in works]
+
+    @property
+    def redis(self):
+        return get_redis()
+
+    @time_execution
+    def read_works_putcodes(self):
+        """Read the putcodes of all the works.
+
+        Returns:
+            dict: the putcodes by (orcid, recid), ``None`` for the works which
+            are not cached.
+        """
+        pipeline = self.redis.pipeline(transaction=False)
+        for cache in self.caches:
+            pipeline.hgetall(cache._key)
+        putcodes = {}
+        for cache, value in zip(self.caches, pipeline.execute()):
+            cache._cached_hash_value = value.get("hash")
+            putcodes[(cache.orcid, cache.recid)] = value.get("putcode")
+        return putcodes
+
+    @time_execution
+    def write_works_putcodes(self, putcodes, inspire_records=None):
+        """Write the putcodes, and the hashes if the records are given.
+
+        Args:
+            putcodes (dict): the putcodes by (orcid, recid).
+            inspire_records (dict): InspireRecord instances by recid. If
+                provided, the hashes of their content are re-computed.
+
+        Raises:
+            ValueError: when a putcode is empty.
+        """
+        inspire_records = inspire_records or {}
+        hashers = {}
+        pipeline = self.redis.pipeline(transaction=False)
+        for cache in self.caches:
+            putcode = putcodes.get((cache.orcid, cache.recid))
+            if not putcode:
+                raise ValueError("Empty putcode not allowed")
+            data = {"putcode": putcode}
+            inspire_record = inspire_records.get(cache.recid)
+            if inspire_record:
+                if not cache._new_hash_value:
+                    hasher = hashers.setdefault(
+                        cache.recid, _OrcidHasher(inspire_record)
+                    )
+                    cache._new_hash_value = hasher.compute_projection_hash()
+                data["hash"] = cache._new_hash_value
+            pipeline.hmset(cache._key, data)
+        pipeline.execute()
+
+    @time_execution
+    def get_works_with_changed_content(self, inspire_records):
+        """Return the works whose content changed compared to the cached version.
+
+        The hash of a record is computed once even if the record is a work of
+        many ORCIDs. The outdated XML hashes of the unchanged works are
+        replaced by their projection hash.
+
+        Args:
+            inspire_records (dict): InspireRecord instances by recid.
+
+        Returns:
+            list(tuple): the (orcid, recid) pairs of the changed works.
+        """
+        self.read_works_putcodes()
+        hashers = {}
+        changed_works = []
+        pipeline = self.redis.pipeline(transaction=False)
+        for cache in self.caches:
+            hasher = hashers.get(cache.recid)
+            if hasher is None:
+                hasher = _OrcidHasher(inspire_records[cache.recid])
+                hashers[cache.recid] = hasher
+            has_changed = cache._has_content_changed(hasher)
+            if has_changed:
+                changed_works.append((cache.orcid, cache.recid))
+            elif cache._is_hash_outdated(has_changed):
+                pipeline.hset(cache._key, "hash", cache._new_hash_value)
+        pipeline.execute()
+        return changed_works
 
 
 class _OrcidHasher(object):
     def __init__(self, inspire_record):
         self.inspire_record = inspire_record
+        self._hash = None
+        self._projection_hash = None
 
     def compute_hash(self):
         """Generate hash for an ORCID-serialised HEP record.
@@ -111,11 +228,36 @@ class _OrcidHasher(object):
         Return:
             string: hash of the record
         """
-        orcid_record = OrcidConverter(
-            self.inspire_record, app.config["LEGACY_RECORD_URL_PATTERN"]
-        )
-        xml = orcid_record.get_xml()  # lxml.etree._Element
-        return self._hash_xml_element(xml)
+        if self._hash is None:
+            orcid_record = OrcidConverter(
+                self.inspire_record, app.config["LEGACY_RECORD_URL_PATTERN"]
+            )
+            xml = orcid_record.get_xml()  # lxml.etree._Element
+            self._hash = self._hash_xml_element(xml)
+        return self._hash
+
+    def compute_projection_hash(self):
+        """Generate hash for the values of a HEP record serialised to ORCID.
+
+        Return:
+            string: hash of the record
+        """
+        if self._projection_hash is None:
+            orcid_record = OrcidConverter(
+                self.inspire_record, app.config["LEGACY_RECORD_URL_PATTERN"]
+            )
+            canonical_string = orjson.dumps(
+                orcid_record.get_projection(), option=orjson.OPT_SORT_KEYS
+            )
+            hash_value = hashlib.sha1(canonical_string)
+            self._projection_hash = "p{}:sha1:{}".format(
+                PROJECTION_HASH_VERSION, hash_value.hexdigest()
+            )
+        return self._projection_hash
+
+    @staticmethod
+    def is_xml_hash(hash_value):
+        return bool(hash_value) and hash_value.startswith("sha1:")
 
     @classmethod
     def _hash_xml_element(cls, element):
@@ -8,6 +8,10 @@
 # Inspire service client for ORCID.
 ORCID_APP_CREDENTIALS = {"consumer_key": "CHANGE_ME", "consumer_secret": "CHANGE_ME"}
 ORCID_ALLOW_PUSH_DEFAULT = False
+# Seconds an `orcid_push_author` job waits for more pushes of the same ORCID
+ORCID_PUSH_QUEUE_DEBOUNCE = 30
+# Seconds after which an ORCID whose job got lost can schedule a new one
+ORCID_PUSH_QUEUE_SCHEDULED_TTL = 60 * 60
 
 # App metrics
 APPMETRICS_ELASTICSEARCH_HOSTS = ["localhost"]
@@ -154,6 +154,51 @@ class OrcidConverter(object):
 
         return builder.get_xml()
 
+    def get_projection(self):
+        """Values of the record used to build the ORCID XML.
+
+        It's much cheaper than ``get_xml`` to tell whether the content of the
+        work changed: the linked conference is represented by its reference
+        instead of being fetched for its title.
+
+        Returns:
+            dict: the values, serializable to JSON.
+        """
+        publication_date = self.publication_date
+        contributors = []
+        for author in self.record.get("authors", []):
+            orcid_role = self.orcid_role_for_inspire_author(author)
+            if not orcid_role:
+                continue
+            contributors.append(
+                [
+                    author["full_name"],
+                    orcid_role,
+                    self.orcid_for_inspire_author(author),
+                    get_value(author, "emails[0]"),
+                ]
+            )
+
+        return {
+            "title": self.title,
+            "subtitle": self.subtitle,
+            "title_translation": self.title_translation,
+            "journal_title": self.journal_title,
+            "conference_record": get_value(
+                self.record, "publication_info.conference_record.$ref[0]"
+            ),
+            "book_series_title": self.book_series_title,
+            "type": self.orcid_work_type,
+            "publication_date": publication_date.dumps() if publication_date else None,
+            "recid": self.recid,
+            "url": record_url_by_pattern(self.url_pattern, self.recid),
+            "doi": self.doi,
+            "arxiv_eprint": self.arxiv_eprint,
+            "isbns": get_value(self.record, "isbns.value", []),
+            "contributors": contributors,
+            "country": self.conference_country,
+        }
+
     def orcid_role_for_inspire_author(self, author):
         """ORCID role for an INSPIRE author field.
 
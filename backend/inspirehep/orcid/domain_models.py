@@ -36,7 +36,16 @@ class OrcidPusher(object):
         oauth_token,
         pushing_duplicated_identifier=False,
         record_db_version=None,
+        cached_author_putcodes=None,
     ):
+        """
+        Push a record to the works of an ORCID.
+
+        Args:
+            cached_author_putcodes (dict): putcodes of the author's works by
+                recid, shared by the pushers of the same ORCID so they are
+                fetched from ORCID only once.
+        """
         self.orcid = orcid
         self.recid = str(recid)
         self.oauth_token = oauth_token
@@ -47,7 +56,9 @@ class OrcidPusher(object):
         self.lock_name = "orcid:{}".format(self.orcid)
         self.client = OrcidClient(self.oauth_token, self.orcid)
         self.converter = None
-        self.cached_author_putcodes = {}
+        if cached_author_putcodes is None:
+            cached_author_putcodes = {}
+        self.cached_author_putcodes = cached_author_putcodes
 
     @time_execution
     def _get_inspire_record(self):
@@ -236,8 +247,8 @@ class OrcidPusher(object):
             putcodes_recids = list(
                 putcode_getter.get_all_inspire_putcodes_and_recids_iter()
             )
-            self.cached_author_putcodes = self._delete_works_with_duplicated_putcodes(
-                putcodes_recids
+            self.cached_author_putcodes.update(
+                self._delete_works_with_duplicated_putcodes(putcodes_recids)
             )
 
         putcode = None
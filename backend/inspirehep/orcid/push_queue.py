@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 CERN.
+#
+# inspirehep is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+import orjson
+from flask import current_app
+from redis import StrictRedis
+
+
+class OrcidPushQueue(object):
+    def __init__(self, orcid, redis=None):
+        """
+        Pushes waiting to be done for an ORCID by a single ``orcid_push_author`` job.
+
+        The pending pushes are kept in a redis hash by recid, so pushing again
+        a record which is still waiting only refreshes its arguments. A flag
+        tells whether a job is already scheduled for the ORCID, it expires after
+        ``ORCID_PUSH_QUEUE_SCHEDULED_TTL`` so a lost job doesn't block the
+        pushes forever.
+
+        Args:
+            orcid (str): the ORCID.
+            redis (StrictRedis): the redis client, by default the one of
+                ``CACHE_REDIS_URL``.
+        """
+        if redis is None:
+            redis = StrictRedis.from_url(
+                current_app.config["CACHE_REDIS_URL"], decode_responses=True
+            )
+        self.redis = redis
+        self.orcid = orcid
+        self.pending_key = f"orcidpush:pending:{orcid}"
+        self.scheduled_key = f"orcidpush:scheduled:{orcid}"
+
+    def push(self, recid, oauth_token, kwargs_to_pusher=None):
+        """Queue the push of the record.
+
+        Returns:
+            bool: whether a job has to be scheduled for the ORCID, i.e. there
+            isn't already one waiting.
+        """
+        push = {"oauth_token": oauth_token, "kwargs_to_pusher": kwargs_to_pusher}
+        pipeline = self.redis.pipeline()
+        pipeline.hset(self.pending_key, str(recid), orjson.dumps(push))
+        pipeline.set(
+            self.scheduled_key,
+            1,
+            nx=True,
+            ex=current_app.config["ORCID_PUSH_QUEUE_SCHEDULED_TTL"],
+        )
+        _, scheduled = pipeline.execute()
+        return bool(scheduled)
+
+    def pop_all(self):
+        """Pop all the pending pushes, the next push will schedule a new job.
+
+        Returns:
+            dict: the pushes by recid, with the ``oauth_token`` and the
+            ``kwargs_to_pusher``.
+        """
+        pipeline = self.redis.pipeline()
+        pipeline.delete(self.scheduled_key)
+        pipeline.hgetall(self.pending_key)
+        pipeline.delete(self.pending_key)
+        _, pending, _ = pipeline.execute()
+        return {recid: orjson.loads(push) for recid, push in pending.items()}
+
+    def __len__(self):
+        return self.redis.hlen(self.pending_key)
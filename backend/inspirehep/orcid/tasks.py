@@ -24,13 +24,19 @@ from sqlalchemy.orm.exc import FlushError
 from time_execution import time_execution
 
 from inspirehep.orcid import exceptions as domain_exceptions
+from inspirehep.orcid.cache import OrcidCacheBatch
+from inspirehep.orcid.push_queue import OrcidPushQueue
 from inspirehep.orcid.utils import get_literature_recids_for_orcid
+from inspirehep.records.api import LiteratureRecord
+from inspirehep.utils import chunker
 
 from . import domain_models, exceptions
 
 LOGGER = structlog.getLogger()
 USER_EMAIL_EMPTY_PATTERN = "{}@FAKEEMAILINSPIRE.FAKE"
 ORCID_REGEX = r"\d{4}-\d{4}-\d{4}-\d{3}[0-9X]"
+# Notes which make ``OrcidPusher`` push the record whatever its cached hash.
+ORCID_PUSH_FORCE_NOTES = {"orcid-push-force-cache-miss", "orcid-push-force-delete"}
 
 
 def legacy_orcid_arrays():
@@ -267,6 +273,89 @@ def orcid_push(self, orcid, rec_id, oauth_token, kwargs_to_pusher=None):
     return putcode
 
 
+@shared_task(bind=True, soft_time_limit=30 * 60, time_limit=31 * 60)
+@time_execution
+def orcid_push_author(self, orcid):
+    """Celery task to push all the records queued for an ORCID.
+
+    The pushers share the author's putcodes, so they are fetched from ORCID
+    at most once per job. Pushes failing for network issues or conflicts are
+    handed over to ``orcid_push`` tasks, which retry them with their backoff.
+
+    Args:
+        self (celery.Task): the task
+        orcid (String): an orcid identifier.
+    """
+    queue = OrcidPushQueue(orcid)
+    pending_pushes = queue.pop_all()
+    if not current_app.config["FEATURE_FLAG_ENABLE_ORCID_PUSH"]:
+        LOGGER.info("ORCID push feature flag not enabled")
+        return
+
+    if not re.match(
+        current_app.config.get("FEATURE_FLAG_ORCID_PUSH_WHITELIST_REGEX", "^$"), orcid
+    ):
+        LOGGER.info("ORCID push not enabled", orcid=orcid)
+        return
+
+    LOGGER.info("New orcid_push_author task", orcid=orcid, records=len(pending_pushes))
+    cached_author_putcodes = {}
+    recids = list(pending_pushes)
+    for index, recid in enumerate(recids):
+        push = pending_pushes[recid]
+        try:
+            pusher = domain_models.OrcidPusher(
+                orcid,
+                recid,
+                push["oauth_token"],
+                cached_author_putcodes=cached_author_putcodes,
+                **(push["kwargs_to_pusher"] or {}),
+            )
+            pusher.push()
+        except SoftTimeLimitExceeded:
+            LOGGER.warning(
+                "Orcid_push_author task timed out, queueing back the records",
+                orcid=orcid,
+                recids=recids[index:],
+            )
+            _queue_back_pushes(queue, orcid, recids[index:], pending_pushes)
+            return
+        except (
+            RequestException,
+            exceptions.DuplicatedExternalIdentifierPusherException,
+            domain_exceptions.RecordNotFoundException,
+            domain_exceptions.StaleRecordDBVersionException,
+        ):
+            LOGGER.warning(
+                "Orcid push failed, retrying in a separate task",
+                recid=recid,
+                orcid=orcid,
+                exc_info=True,
+            )
+            orcid_push.apply_async(
+                queue="orcid_push", kwargs=dict(orcid=orcid, rec_id=recid, **push)
+            )
+        except exceptions.TokenInvalidDeletedException:
+            LOGGER.warning("Orcid push token deleted", recid=recid, orcid=orcid)
+            return
+        except Exception:
+            LOGGER.exception("Orcid push failed", recid=recid, orcid=orcid)
+    LOGGER.info("Orcid_push_author task successfully completed", orcid=orcid)
+
+
+def _queue_back_pushes(queue, orcid, recids, pending_pushes):
+    scheduled = False
+    for recid in recids:
+        push = pending_pushes[recid]
+        scheduled |= queue.push(recid, push["oauth_token"], push["kwargs_to_pusher"])
+    if scheduled:
+        orcid_push_author.apply_async(
+            queue="orcid_push",
+            kwargs={"orcid": orcid},
+            countdown=current_app.config["ORCID_PUSH_QUEUE_DEBOUNCE"],
+        )
+
+
 def _find_user_matching(orcid, email):
     """Attempt to find a user in our DB on either ORCID or email."""
     user_identity = UserIdentity.query.filter_by(id=orcid, method="orcid").first()
@@ -275,9 +364,48 @@ def _find_user_matching(orcid, email):
     return User.query.filter_by(email=email).one_or_none()
 
 
+def _is_push_forced(record):
+    if record.get("deleted", False):
+        return True
+    return any(
+        note.get("value") in ORCID_PUSH_FORCE_NOTES
+        for note in record.get("_private_notes", [])
+    )
+
+
+def get_recids_with_changed_works(orcid, recids, max_chunk_size=500):
+    """Filter out the recids whose work is unchanged since it was pushed.
+
+    The records which cannot be found are kept, so their push reports it.
+    """
+    for recids_chunk in chunker(recids, max_chunk_size):
+        records = {
+            str(record["control_number"]): record
+            for record in LiteratureRecord.get_records_by_pids(
+                [("lit", str(recid)) for recid in recids_chunk]
+            )
+        }
+        checked_records = {
+            recid: record
+            for recid, record in records.items()
+            if not _is_push_forced(record)
+        }
+        changed_recids = {
+            recid
+            for _, recid in OrcidCacheBatch(
+                [(orcid, recid) for recid in checked_records]
+            ).get_works_with_changed_content(checked_records)
+        }
+        for recid in recids_chunk:
+            if str(recid) not in checked_records or str(recid) in changed_recids:
+                yield recid
+
+
 @shared_task
 def push_account_literature_to_orcid(orcid, token):
-    recids = get_literature_recids_for_orcid(orcid)
+    recids = get_recids_with_changed_works(
+        orcid, get_literature_recids_for_orcid(orcid)
+    )
     for recid in recids:
         orcid_push.apply_async(
             queue="orcid_push_legacy_tokens",
@@ -14,6 +14,7 @@ from invenio_pidstore.models import PersistentIdentifier
 
 from inspirehep.pidstore.errors import MissingSchema
 from inspirehep.pidstore.minters.bai import BAIMinter
+from inspirehep.pidstore.models import InspirePidCounter
 from inspirehep.records.api import AuthorsRecord
 
 LOGGER = structlog.getLogger()
@@ -190,3 +191,22 @@ def fast_mint_bais(yes_i_know):
             db.session.rollback()
             return
     db.session.commit()
+
+
+@inspire_pidstore.command("backfill-counters")
+@click.option(
+    "-p",
+    "--pid-type",
+    "pid_types",
+    multiple=True,
+    default=["bai"],
+    show_default=True,
+    help="The pid types whose counters are set from the pidstore.",
+)
+@with_appcontext
+def backfill_counters(pid_types):
+    """Set the counters used to allocate the pids from the existing ones."""
+    for pid_type in pid_types:
+        counters_count = InspirePidCounter.backfill(pid_type)
+        db.session.commit()
+        click.echo(f"{counters_count} {pid_type} counters set.")
@@ -9,7 +9,9 @@
 import structlog
 from invenio_db import db
 from invenio_pidstore.errors import PIDInvalidAction
-from invenio_pidstore.models import PIDStatus
+from invenio_pidstore.models import PersistentIdentifier, PIDStatus
+from sqlalchemy import Integer, cast, func
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.orm import backref
 from sqlalchemy_utils.models import Timestamp
@@ -146,3 +148,88 @@ class InspireRedirect(db.Model, Timestamp):
             db.session.expire(self)
             db.session.expire(self.original_pid)
             db.session.expire(self.new_pid)
+
+
+class InspirePidCounter(db.Model):
+    """Keeps the last number allocated for every prefix of the pids ending with
+    a number, so allocating the next one doesn't need to read all of them."""
+
+    __tablename__ = "inspire_pidstore_counters"
+
+    pid_type = db.Column(db.String(6), primary_key=True)
+    prefix = db.Column(db.String(255), primary_key=True)
+    last_number = db.Column(db.Integer, nullable=False)
+
+    @classmethod
+    def exists(cls, pid_type, prefix):
+        return (
+            db.session.query(cls.last_number)
+            .filter_by(pid_type=pid_type, prefix=prefix)
+            .scalar()
+            is not None
+        )
+
+    @classmethod
+    def allocate(cls, pid_type, prefix, initial_number=1):
+        """Allocate atomically the next number of the prefix.
+
+        The counter row stays locked until the end of the transaction, so the
+        number is not allocated twice and it's released on rollback.
+
+        Args:
+            pid_type (str): the pid type.
+            prefix (str): the prefix of the pid, e.g. ``J.Smith.`` for BAIs.
+            initial_number (int): the number allocated if there is no counter
+                for the prefix yet.
+
+        Returns:
+            int: the allocated number.
+        """
+        statement = insert(cls).values(
+            pid_type=pid_type, prefix=prefix, last_number=initial_number
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[cls.pid_type, cls.prefix],
+            set_={"last_number": cls.last_number + 1},
+        ).returning(cls.last_number)
+        return db.session.execute(statement).scalar()
+
+    @classmethod
+    def bump(cls, pid_type, prefix, number):
+        """Make sure the counter of the prefix, if any, is at least the number."""
+        cls.query.filter_by(pid_type=pid_type, prefix=prefix).update(
+            {"last_number": func.greatest(cls.last_number, number)},
+            synchronize_session=False,
+        )
+
+    @classmethod
+    def backfill(cls, pid_type):
+        """Set the counters of the pid type from the pids in the pidstore.
+
+        Returns:
+            int: the number of counters set.
+        """
+        prefix = func.substring(PersistentIdentifier.pid_value, r"^(.*\.)[0-9]+$")
+        number = cast(
+            func.substring(PersistentIdentifier.pid_value, r"\.([0-9]+)$"), Integer
+        )
+        last_numbers = (
+            db.session.query(PersistentIdentifier.pid_type, prefix, func.max(number))
+            .filter(
+                PersistentIdentifier.pid_type == pid_type,
+                PersistentIdentifier.pid_value.op("~")(r"\.[0-9]+$"),
+            )
+            .group_by(PersistentIdentifier.pid_type, prefix)
+        )
+        statement = insert(cls).from_select(
+            [cls.pid_type, cls.prefix, cls.last_number], last_numbers
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[cls.pid_type, cls.prefix],
+            set_={
+                "last_number": func.greatest(
+                    cls.last_number, statement.excluded.last_number
+                )
+            },
+        )
+        return db.session.execute(statement).rowcount
@@ -18,6 +18,7 @@ from sqlalchemy.exc import IntegrityError
 from unidecode import unidecode
 
 from inspirehep.pidstore.errors import PIDAlreadyExistsError
+from inspirehep.pidstore.models import InspirePidCounter
 from inspirehep.pidstore.providers.base import InspireBaseProvider
 from inspirehep.records.marshmallow.utils import get_first_value_for_schema
 
@@ -54,28 +55,54 @@ class InspireBAIProvider(InspireBaseProvider):
         )
 
     @classmethod
-    def next_bai_number(cls, bai):
-        """Returns next possible free id for BAI
+    def last_bai_number(cls, bai):
+        """Returns the highest number of the BAIs in the pidstore
 
         Args:
-            bai(str): Bai without number at the end (ex. K.Janeway)
+            bai(str): Bai without number at the end (ex. K.Janeway.)
 
         Returns:
-            int: first free available id for specified BAI
+            int: highest number of the specified BAI, 0 if there is none
         """
-        all_similar_bais = [
+        all_similar_bais = (
             result[0]
             for result in PersistentIdentifier.query.with_entities(
                 PersistentIdentifier.pid_value
             )
             .filter(PersistentIdentifier.pid_value.startswith(bai))
             .filter(PersistentIdentifier.pid_type == cls.pid_type)
+        )
+        all_bais_numbers = [
+            int(number)
+            for number in (similar_bai[len(bai) :] for similar_bai in all_similar_bais)
+            if number.isdigit()
         ]
-        last_number = 0
-        if all_similar_bais:
-            all_bais_numbers = [int(x.rsplit(".", 1)[-1]) for x in all_similar_bais]
-            last_number = max(all_bais_numbers)
-        return int(last_number) + 1
+        return max(all_bais_numbers, default=0)
+
+    @classmethod
+    def next_bai_number(cls, bai):
+        """Returns next possible free id for BAI
+
+        The number is allocated from the counter of the BAI, which is created
+        from the BAIs in the pidstore the first time the BAI is allocated.
+
+        Args:
+            bai(str): Bai without number at the end (ex. K.Janeway.)
+
+        Returns:
+            int: first free available id for specified BAI
+        """
+        initial_number = 1
+        if not InspirePidCounter.exists(cls.pid_type, bai):
+            initial_number = cls.last_bai_number(bai) + 1
+        return InspirePidCounter.allocate(cls.pid_type, bai, initial_number)
+
+    @classmethod
+    def bump_bai_counter(cls, pid_value):
+        """Keep the counter of the BAI above the number of a given BAI."""
+        bai, _, number = pid_value.rpartition(".")
+        if number.isdigit():
+            InspirePidCounter.bump(cls.pid_type, f"{bai}.", int(number))
 
     @classmethod
     @backoff.on_exception(
@@ -97,6 +124,8 @@ class InspireBAIProvider(InspireBaseProvider):
         new_pid = pid_value or cls.generate_bai(data)
         pid_from_db = cls.query_pid_value(new_pid)
         if not pid_from_db:
+            if pid_value:
+                cls.bump_bai_counter(new_pid)
             provider_object = super().create(
                 pid_value=new_pid,
                 object_type=object_type,
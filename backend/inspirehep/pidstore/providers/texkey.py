@@ -76,23 +76,28 @@ class InspireTexKeyProvider(InspireBaseProvider):
     def get_texkey_with_random_part(cls, texkey):
         retry_count = current_app.config.get("PIDSTORE_TEXKEY_MAX_RETRY_COUNT", 5)
         size = current_app.config.get("PIDSTORE_TEXKEY_RANDOM_PART_SIZE", 3)
-        used_texkeys = cls.query_all_texkeys_starting_with(texkey)
-        for _ in range(retry_count):
-            random_part = "".join(random.choices(string.ascii_lowercase, k=size))
-            pid_value = f"{texkey}{random_part}"
+        candidates = [
+            "{}{}".format(
+                texkey, "".join(random.choices(string.ascii_lowercase, k=size))
+            )
+            for _ in range(retry_count)
+        ]
+        used_texkeys = cls.query_used_texkeys(candidates)
+        for pid_value in candidates:
             if pid_value not in used_texkeys:
                 return pid_value
         raise CannotGenerateUniqueTexKey
 
     @classmethod
-    def query_all_texkeys_starting_with(cls, texkey):
+    def query_used_texkeys(cls, texkeys):
+        """Return which of the texkeys are already in the pidstore."""
         return {
             result[0]
             for result in PersistentIdentifier.query.with_entities(
                 PersistentIdentifier.pid_value
             )
             .filter(PersistentIdentifier.pid_type == cls.pid_type)
-            .filter(PersistentIdentifier.pid_value.startswith(texkey))
+            .filter(PersistentIdentifier.pid_value.in_(texkeys))
         }
 
     @classmethod
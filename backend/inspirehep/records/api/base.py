@@ -31,6 +31,7 @@ from sqlalchemy.orm.exc import NoResultFound, StaleDataError
 from sqlalchemy_continuum import version_class
 
 from inspirehep.indexer.base import InspireRecordIndexer
+from inspirehep.indexer.batch import get_current_records_batch
 from inspirehep.pidstore.api import PidStoreBase
 from inspirehep.pidstore.models import InspireRedirect
 from inspirehep.records.errors import (
@@ -103,6 +104,13 @@ class InspireRecord(Record):
         """
         if not pid_type:
             pid_type = cls.pid_type
+        records_batch = get_current_records_batch()
+        if records_batch and with_deleted and not original_record:
+            try:
+                model = records_batch.get_linked_model_by_pid_value(pid_type, pid_value)
+                return cls.get_class_for_record(model.json)(model.json, model=model)
+            except KeyError:
+                pass
         record_uuid = cls.get_uuid_from_pid_value(pid_value, pid_type, original_record)
         with_deleted = original_record or with_deleted
         try:
@@ -171,6 +179,11 @@ class InspireRecord(Record):
 
     @classmethod
     def get_records_by_pids(cls, pids, max_batch=100):
+        records_batch = get_current_records_batch()
+        if records_batch:
+            models, pids = records_batch.get_linked_models(pids)
+            for model in models:
+                yield cls(model.json, model=model)
         for batch in chunker(pids, max_chunk_size=max_batch):
             query = cls.get_record_metadata_by_pids(batch)
             for data in query.yield_per(100):
@@ -8,9 +8,7 @@ import datetime
 import threading
 import uuid
 from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
-from io import BytesIO
 
-import magic
 import orjson
 import requests
 import structlog
@@ -47,7 +45,7 @@ from inspirehep.records.errors import (
 )
 from inspirehep.records.marshmallow.literature import LiteratureElasticSearchSchema
 from inspirehep.records.utils import (
-    download_file_from_url,
+    download_file_to_temporary_file,
     get_authors_phonetic_blocks,
     get_literature_earliest_date,
     get_pid_for_pid,
@@ -55,7 +53,7 @@ from inspirehep.records.utils import (
     remove_author_bai_from_id_list,
 )
 from inspirehep.search.api import LiteratureSearch
-from inspirehep.utils import chunker, hash_data
+from inspirehep.utils import chunker
 
 from .base import InspireRecord
 
@@ -478,40 +476,41 @@ class LiteratureRecord(
                     thread=threading.get_ident(),
                 )
                 return result
-            file_data = download_file_from_url(url)
-            new_key = hash_data(file_data)
-            mimetype = magic.from_buffer(file_data, mime=True)
-            file_data = BytesIO(file_data)
-            filename = filename or key
-            if not filename:
-                filename = new_key
-            if mimetype in current_app.config.get("FILES_RESTRICTED_MIMETYPES"):
-                LOGGER.error(
-                    "Unsupported file type - Aborting",
-                    key=key,
-                    mimetype=mimetype,
-                    thread=threading.get_ident(),
-                )
-                raise UnsupportedFileError(mimetype)
-            acl = current_app.config["S3_FILE_ACL"]
-            if current_s3_instance.file_exists(new_key):
-                LOGGER.info(
-                    "Replacing file metadata",
-                    key=new_key,
-                    thread=threading.get_ident(),
-                )
-                current_s3_instance.replace_file_metadata(
-                    new_key, filename, mimetype, acl
-                )
-            else:
-                LOGGER.info(
-                    "Uploading file to s3",
-                    key=new_key,
-                    thread=threading.get_ident(),
-                )
-                current_s3_instance.upload_file(
-                    file_data, new_key, filename, mimetype, acl
-                )
+            with download_file_to_temporary_file(url) as (
+                file_data,
+                new_key,
+                mimetype,
+            ):
+                filename = filename or key
+                if not filename:
+                    filename = new_key
+                if mimetype in current_app.config.get("FILES_RESTRICTED_MIMETYPES"):
+                    LOGGER.error(
+                        "Unsupported file type - Aborting",
+                        key=key,
+                        mimetype=mimetype,
+                        thread=threading.get_ident(),
+                    )
+                    raise UnsupportedFileError(mimetype)
+                acl = current_app.config["S3_FILE_ACL"]
+                if current_s3_instance.file_exists(new_key):
+                    LOGGER.info(
+                        "Replacing file metadata",
+                        key=new_key,
+                        thread=threading.get_ident(),
+                    )
+                    current_s3_instance.replace_file_metadata(
+                        new_key, filename, mimetype, acl
+                    )
+                else:
+                    LOGGER.info(
+                        "Uploading file to s3",
+                        key=new_key,
+                        thread=threading.get_ident(),
+                    )
+                    current_s3_instance.upload_file(
+                        file_data, new_key, filename, mimetype, acl
+                    )
             result = {
                 "key": new_key,
                 "filename": filename,
@@ -12,8 +12,10 @@ from inspire_utils.date import fill_missing_date_parts
 from inspire_utils.record import get_values_for_schema
 from invenio_db import db
 from invenio_pidstore.models import PersistentIdentifier
-from sqlalchemy import and_, func, not_, or_, text
+from sqlalchemy import and_, delete, func, not_, or_, text, update
 
+from inspirehep.indexer.batch import get_prefetched_value
+from inspirehep.records.citations import CitationCountsDeltas, delete_citation_counts
 from inspirehep.records.models import (
     AuthorSchemaType,
     ConferenceLiterature,
@@ -21,6 +23,8 @@ from inspirehep.records.models import (
     ExperimentLiterature,
     InstitutionLiterature,
     RecordCitations,
+    RecordCitationsByYear,
+    RecordCitationsCount,
     RecordsAuthors,
     StudentsAdvisors,
 )
@@ -127,6 +131,26 @@ class CitationMixin(PapersAuthorsExtensionMixin):
             query = query.filter(RecordCitations.is_self_citation.is_(False))
         return query
 
+    @staticmethod
+    def _citation_counts_table_enabled():
+        return current_app.config.get("FEATURE_FLAG_ENABLE_CITATION_COUNTS_TABLE")
+
+    def _stored_citation_counts(self):
+        """Read the citation counts kept in ``records_citations_counts``.
+
+        Returns:
+            tuple: citation count and citation count without self-citations.
+        """
+        counts = (
+            RecordCitationsCount.query.filter_by(record_id=self.id)
+            .with_entities(
+                RecordCitationsCount.citation_count,
+                RecordCitationsCount.citation_count_without_self_citations,
+            )
+            .one_or_none()
+        )
+        return counts or (0, 0)
+
     @property
     def citation_count(self):
         """Gives citation count number
@@ -134,6 +158,11 @@ class CitationMixin(PapersAuthorsExtensionMixin):
             int: Citation count number for this record if it is literature or data
             record.
         """
+        citation_count = get_prefetched_value("citation_count", self.id)
+        if citation_count is not None:
+            return citation_count
+        if self._citation_counts_table_enabled():
+            return self._stored_citation_counts()[0]
         return self._citation_query().count()
 
     @property
@@ -144,6 +173,13 @@ class CitationMixin(PapersAuthorsExtensionMixin):
             record.
         """
         if current_app.config.get("FEATURE_FLAG_ENABLE_SELF_CITATIONS"):
+            citation_count = get_prefetched_value(
+                "citation_count_without_self_citations", self.id
+            )
+            if citation_count is not None:
+                return citation_count
+            if self._citation_counts_table_enabled():
+                return self._stored_citation_counts()[1]
             return self._citation_query(exclude_self_citations=True).count()
         return 0
 
@@ -155,6 +191,16 @@ class CitationMixin(PapersAuthorsExtensionMixin):
         Returns:
             dict: citation summary for this record.
         """
+        if self._citation_counts_table_enabled():
+            db_query = (
+                RecordCitationsByYear.query.filter(
+                    RecordCitationsByYear.record_id == self.id,
+                    RecordCitationsByYear.count > 0,
+                )
+                .with_entities(RecordCitationsByYear.year, RecordCitationsByYear.count)
+                .order_by(RecordCitationsByYear.year)
+            )
+            return [{"year": r.year, "count": r.count} for r in db_query.all()]
         db_query = self._citation_query()
         db_query = db_query.with_entities(
             func.count(RecordCitations.citation_date).label("sum"),
@@ -165,19 +211,43 @@ class CitationMixin(PapersAuthorsExtensionMixin):
 
     @property
     def citations_by_year(self):
+        citations_by_year = get_prefetched_value("citations_by_year", self.id)
+        if citations_by_year is not None:
+            return citations_by_year
         return self._citations_by_year()
 
+    def _delete_citations(self, *criteria):
+        """Delete citations keeping the citation counts up to date.
+
+        Args:
+            criteria: filters selecting the ``records_citations`` rows to delete.
+        """
+        deleted_citations = db.session.execute(
+            delete(RecordCitations.__table__)
+            .where(or_(*criteria))
+            .returning(
+                RecordCitations.cited_id,
+                RecordCitations.citation_date,
+                RecordCitations.is_self_citation,
+            )
+        )
+        citation_counts_deltas = CitationCountsDeltas()
+        for cited_id, citation_date, is_self_citation in deleted_citations:
+            citation_counts_deltas.remove_citation(
+                cited_id, citation_date, is_self_citation
+            )
+        citation_counts_deltas.apply()
+
     def hard_delete(self):
         with db.session.begin_nested():
             LOGGER.warning("Hard Deleting citations")
             # Removing citations from RecordCitations table and
             # Removing references to this record from RecordCitations table
-            RecordCitations.query.filter(
-                or_(
-                    RecordCitations.citer_id == self.id,
-                    RecordCitations.cited_id == self.id,
-                )
-            ).delete()
+            self._delete_citations(
+                RecordCitations.citer_id == self.id,
+                RecordCitations.cited_id == self.id,
+            )
+            delete_citation_counts(self.id)
         super().hard_delete()
 
     def is_superseded(self):
@@ -187,28 +257,21 @@ class CitationMixin(PapersAuthorsExtensionMixin):
         """
         return "successor" in self.get_value("related_records.relation", "")
 
-    def update_refs_in_citation_table(self, save_every=100):
-        """Updates all references in citation table.
-        First removes all references (where citer is this record),
-        then adds all from the record again.
-        Args:
-            save_every (int): How often data should be saved into session.
-            One by one is very inefficient, but so is 10000 at once.
-        """
-        RecordCitations.query.filter_by(citer_id=self.id).delete()
-        if (
+    def is_eligible_to_cite(self):
+        return not (
             self.is_superseded()
             or self.get("deleted")
             or self.pid_type not in ["lit"]
             or "Literature" not in self["_collections"]
-        ):
-            # Record is not eligible to cite
-            LOGGER.info(
-                "Record's is not eligible to cite.",
-                recid=self.get("control_number"),
-                uuid=str(self.id),
-            )
-            return
+        )
+
+    def get_cited_records_pids(self):
+        """Return the pids of the references which count as citations.
+
+        Returns:
+            list: tuples containing (pid_type, pid_value) of the referenced
+                literature and data records, excluding the record itself.
+        """
         current_record_control_number = str(self.get("control_number"))
         records_pids = self.get_linked_pids_from_field("references.record")
         # Limit records to literature and data as only this types can be cited
@@ -220,6 +283,26 @@ class CitationMixin(PapersAuthorsExtensionMixin):
             if pid_value == current_record_control_number:
                 continue
             proper_records_pids.append((pid_type, pid_value))
+        return proper_records_pids
+
+    def update_refs_in_citation_table(self, save_every=100):
+        """Updates all references in citation table.
+        First removes all references (where citer is this record),
+        then adds all from the record again.
+        Args:
+            save_every (int): How often data should be saved into session.
+            One by one is very inefficient, but so is 10000 at once.
+        """
+        self._delete_citations(RecordCitations.citer_id == self.id)
+        if not self.is_eligible_to_cite():
+            LOGGER.info(
+                "Record's is not eligible to cite.",
+                recid=self.get("control_number"),
+                uuid=str(self.id),
+            )
+            return
+        current_record_control_number = str(self.get("control_number"))
+        proper_records_pids = self.get_cited_records_pids()
 
         LOGGER.info(
             f"Record has {len(proper_records_pids)} linked references",
@@ -229,6 +312,7 @@ class CitationMixin(PapersAuthorsExtensionMixin):
         records_uuids = self.get_records_ids_by_pids(proper_records_pids)
         referenced_records = set()
         references_waiting_for_commit = []
+        citation_counts_deltas = CitationCountsDeltas()
         citation_date = fill_missing_date_parts(self.earliest_date)
         for reference in records_uuids:
             if reference not in referenced_records:
@@ -241,11 +325,13 @@ class CitationMixin(PapersAuthorsExtensionMixin):
                         is_self_citation=False,
                     )
                 )
+                citation_counts_deltas.add_citation(reference, citation_date, False)
             if len(references_waiting_for_commit) >= save_every:
                 db.session.bulk_save_objects(references_waiting_for_commit)
                 references_waiting_for_commit = []
         if references_waiting_for_commit:
             db.session.bulk_save_objects(references_waiting_for_commit)
+        citation_counts_deltas.apply()
 
         if current_app.config.get("FEATURE_FLAG_ENABLE_SELF_CITATIONS"):
             LOGGER.info("Starting self citations check")
@@ -303,33 +389,47 @@ class CitationMixin(PapersAuthorsExtensionMixin):
             recid=self.get("control_number"),
         )
         uuid = self.model.id
+        citation_counts_deltas = CitationCountsDeltas()
         if self_citations:
             # update self-citations
-            RecordCitations.query.filter(
-                and_(
-                    or_(
-                        and_(
-                            RecordCitations.cited_id == uuid,
-                            RecordCitations.citer_id.in_(self_citations),
-                        ),
-                        and_(
-                            RecordCitations.cited_id.in_(self_citations),
-                            RecordCitations.citer_id == uuid,
+            marked_citations = db.session.execute(
+                update(RecordCitations.__table__)
+                .where(
+                    and_(
+                        or_(
+                            and_(
+                                RecordCitations.cited_id == uuid,
+                                RecordCitations.citer_id.in_(self_citations),
+                            ),
+                            and_(
+                                RecordCitations.cited_id.in_(self_citations),
+                                RecordCitations.citer_id == uuid,
+                            ),
                         ),
-                    ),
-                    RecordCitations.is_self_citation.is_(False),
+                        RecordCitations.is_self_citation.is_(False),
+                    )
                 )
-            ).update(
-                {RecordCitations.is_self_citation: True}, synchronize_session=False
+                .values(is_self_citation=True)
+                .returning(RecordCitations.cited_id)
             )
+            for (cited_id,) in marked_citations:
+                citation_counts_deltas.mark_self_citation(cited_id, True)
         # update not-self_citations
-        RecordCitations.query.filter(
-            and_(
-                RecordCitations.cited_id == uuid,
-                not_(RecordCitations.citer_id.in_(self_citations)),
-                RecordCitations.is_self_citation.is_(True),
+        unmarked_citations = db.session.execute(
+            update(RecordCitations.__table__)
+            .where(
+                and_(
+                    RecordCitations.cited_id == uuid,
+                    not_(RecordCitations.citer_id.in_(self_citations)),
+                    RecordCitations.is_self_citation.is_(True),
+                )
             )
-        ).update({RecordCitations.is_self_citation: False}, synchronize_session=False)
+            .values(is_self_citation=False)
+            .returning(RecordCitations.cited_id)
+        )
+        for (cited_id,) in unmarked_citations:
+            citation_counts_deltas.mark_self_citation(cited_id, False)
+        citation_counts_deltas.apply()
 
     def get_all_connected_records_uuids_of_modified_authors(self):
         prev_version = self._previous_version
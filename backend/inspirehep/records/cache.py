@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 CERN.
+#
+# inspirehep is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+import hashlib
+from itertools import chain
+
+import orjson
+import structlog
+from flask import current_app
+from invenio_records.models import RecordMetadata
+from prometheus_client import Counter
+from redis.exceptions import RedisError
+
+from inspirehep.utils import get_redis
+
+LOGGER = structlog.getLogger()
+
+render_cache_hits = Counter(
+    "render_cache_hits",
+    "How many display formats were reused from the render cache.",
+    ["format"],
+)
+render_cache_misses = Counter(
+    "render_cache_misses",
+    "How many display formats had to be rendered again.",
+    ["format"],
+)
+
+# Linked records which are resolved while rendering the display formats,
+# a new revision of any of them invalidates the cached formats.
+LINKED_RECORDS_FIELDS = [
+    "accelerator_experiments.record",
+    "publication_info.conference_record",
+    "publication_info.parent_record",
+]
+
+# Configuration values used while rendering, per format.
+CONFIG_INPUTS_BY_FORMAT = {
+    "ui_display": ["FEATURE_FLAG_ENABLE_FILES"],
+    "cv_format": ["SERVER_NAME"],
+}
+
+
+class RenderCache(object):
+    def __init__(self, record):
+        """
+        Cache of the display formats rendered for a record.
+
+        Every format is stored together with the hash of the inputs it was
+        rendered from, so it is reused only as long as those inputs don't change.
+
+        Args:
+            record (InspireRecord): the record which formats are cached.
+        """
+        self.record = record
+        self._cached_values = None
+        self._record_hash = None
+        self._linked_records_revisions = None
+
+    @classmethod
+    def is_enabled(cls):
+        return current_app.config.get("FEATURE_FLAG_ENABLE_RENDER_CACHE", False)
+
+    @property
+    def redis(self):
+        return get_redis()
+
+    @property
+    def _key(self):
+        """Return the string 'rendercache:`pid_type`:`control_number`'"""
+        return "rendercache:{}:{}".format(
+            self.record.pid_type, self.record["control_number"]
+        )
+
+    @property
+    def record_hash(self):
+        if not self._record_hash:
+            self._record_hash = hash_render_inputs(self.record)
+        return self._record_hash
+
+    @property
+    def linked_records_revisions(self):
+        """Revisions of all the linked records resolved during rendering."""
+        if self._linked_records_revisions is None:
+            pids = list(
+                chain.from_iterable(
+                    self.record.get_linked_pids_from_field(field)
+                    for field in LINKED_RECORDS_FIELDS
+                )
+            )
+            revisions = []
+            if pids:
+                query = self.record.get_record_metadata_by_pids(pids).with_entities(
+                    RecordMetadata.id, RecordMetadata.version_id
+                )
+                revisions = sorted(
+                    [str(record_id), version_id] for record_id, version_id in query
+                )
+            self._linked_records_revisions = revisions
+        return self._linked_records_revisions
+
+    def get_inputs_hash(self, format_name):
+        """Compute the hash of all the inputs the given format depends on."""
+        config_inputs = {
+            key: current_app.config.get(key)
+            for key in CONFIG_INPUTS_BY_FORMAT.get(format_name, [])
+        }
+        return hash_render_inputs(
+            {
+                "format": format_name,
+                "version": current_app.config.get("RENDER_CACHE_VERSION"),
+                "record": self.record_hash,
+                "linked_records": self.linked_records_revisions,
+                "config": config_inputs,
+            }
+        )
+
+    def read_formats(self):
+        if self._cached_values is None:
+            try:
+                self._cached_values = self.redis.hgetall(self._key)
+            except RedisError:
+                LOGGER.warning(
+                    "Cannot read render cache", recid=self.record["control_number"]
+                )
+                self._cached_values = {}
+        return self._cached_values
+
+    def write_format(self, format_name, inputs_hash, value):
+        data = {format_name: value, f"{format_name}:hash": inputs_hash}
+        try:
+            with self.redis.pipeline() as pipeline:
+                pipeline.hmset(self._key, data)
+                pipeline.expire(self._key, current_app.config["RENDER_CACHE_TTL"])
+                pipeline.execute()
+        except RedisError:
+            LOGGER.warning(
+                "Cannot write render cache",
+                recid=self.record["control_number"],
+                format=format_name,
+            )
+            return
+        self._cached_values.update(data)
+
+    def get_or_render(self, format_name, render):
+        """Return the cached format or render and cache it if it's stale.
+
+        Args:
+            format_name (str): name of the format, e.g. ``bibtex_display``.
+            render (callable): renders the format, called only on cache miss.
+
+        Returns:
+            str: the rendered format.
+        """
+        inputs_hash = self.get_inputs_hash(format_name)
+        cached_values = self.read_formats()
+        if cached_values.get(f"{format_name}:hash") == inputs_hash:
+            render_cache_hits.labels(format_name).inc()
+            return cached_values[format_name]
+
+        render_cache_misses.labels(format_name).inc()
+        value = render()
+        self.write_format(format_name, inputs_hash, value)
+        return value
+
+
+def hash_render_inputs(inputs):
+    """Generate a stable hash for json serializable inputs.
+
+    Return:
+        string: hash of the inputs
+    """
+    canonical_string = orjson.dumps(inputs, option=orjson.OPT_SORT_KEYS)
+    return "sha1:" + hashlib.sha1(canonical_string).hexdigest()
@@ -0,0 +1,441 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 CERN.
+#
+# inspirehep is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+import csv
+import io
+import re
+from collections import Counter
+from datetime import date
+
+import structlog
+from flask import current_app
+from inspire_utils.date import fill_missing_date_parts
+from invenio_db import db
+from invenio_pidstore.models import PersistentIdentifier
+from invenio_records.models import RecordMetadata
+from sqlalchemy import Integer, cast, extract, func, not_, text, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB, insert
+
+from inspirehep.records.models import (
+    RecordCitations,
+    RecordCitationsByYear,
+    RecordCitationsCount,
+    RecordsAuthors,
+)
+
+LOGGER = structlog.getLogger()
+
+CITATIONS_TABLE = RecordCitations.__tablename__
+STAGING_CITATIONS_TABLE = f"{CITATIONS_TABLE}_staging"
+OLD_CITATIONS_TABLE = f"{CITATIONS_TABLE}_old"
+REFERENCES_TABLE = f"{CITATIONS_TABLE}_references"
+SELF_CITATIONS_TABLE = f"{CITATIONS_TABLE}_self_citations"
+
+
+class CitationCountsDeltas:
+    def __init__(self):
+        """
+        Changes to the citation counts caused by changes in ``records_citations``.
+
+        The deltas are accumulated while the citations are modified and applied
+        at once to ``records_citations_counts`` and ``records_citations_by_year``.
+        """
+        self.citation_count = Counter()
+        self.citation_count_without_self_citations = Counter()
+        self.citations_by_year = Counter()
+
+    def add_citation(self, cited_id, citation_date, is_self_citation, delta=1):
+        self.citation_count[cited_id] += delta
+        if not is_self_citation:
+            self.citation_count_without_self_citations[cited_id] += delta
+        if citation_date:
+            # Dates read from the table are ``date``, the new ones are strings
+            if isinstance(citation_date, date):
+                year = citation_date.year
+            else:
+                year = int(citation_date[:4])
+            self.citations_by_year[(cited_id, year)] += delta
+
+    def remove_citation(self, cited_id, citation_date, is_self_citation):
+        self.add_citation(cited_id, citation_date, is_self_citation, delta=-1)
+
+    def mark_self_citation(self, cited_id, is_self_citation):
+        delta = -1 if is_self_citation else 1
+        self.citation_count_without_self_citations[cited_id] += delta
+
+    def apply(self):
+        without_self_citations = self.citation_count_without_self_citations
+        counts = [
+            {
+                "record_id": record_id,
+                "citation_count": self.citation_count[record_id],
+                "citation_count_without_self_citations": without_self_citations[
+                    record_id
+                ],
+            }
+            # sorted so concurrent transactions lock the rows in the same order
+            for record_id in sorted(
+                set(self.citation_count) | set(without_self_citations), key=str
+            )
+            if self.citation_count[record_id] or without_self_citations[record_id]
+        ]
+        if counts:
+            statement = insert(RecordCitationsCount).values(counts)
+            excluded = statement.excluded
+            statement = statement.on_conflict_do_update(
+                index_elements=[RecordCitationsCount.record_id],
+                set_={
+                    "citation_count": RecordCitationsCount.citation_count
+                    + excluded.citation_count,
+                    "citation_count_without_self_citations": (
+                        RecordCitationsCount.citation_count_without_self_citations
+                        + excluded.citation_count_without_self_citations
+                    ),
+                },
+            )
+            db.session.execute(statement)
+
+        counts_by_year = [
+            {"record_id": record_id, "year": year, "count": count}
+            for (record_id, year), count in sorted(
+                self.citations_by_year.items(),
+                key=lambda item: (str(item[0][0]), item[0][1]),
+            )
+            if count
+        ]
+        if counts_by_year:
+            statement = insert(RecordCitationsByYear).values(counts_by_year)
+            statement = statement.on_conflict_do_update(
+                index_elements=[
+                    RecordCitationsByYear.record_id,
+                    RecordCitationsByYear.year,
+                ],
+                set_={"count": RecordCitationsByYear.count + statement.excluded.count},
+            )
+            db.session.execute(statement)
+
+        self.citation_count.clear()
+        self.citation_count_without_self_citations.clear()
+        self.citations_by_year.clear()
+
+
+def delete_citation_counts(record_id):
+    """Remove the citation counts of a record."""
+    RecordCitationsCount.query.filter_by(record_id=record_id).delete()
+    RecordCitationsByYear.query.filter_by(record_id=record_id).delete()
+
+
+def recompute_citation_counts():
+    """Recompute the citation counts of all the records from ``records_citations``.
+
+    Returns:
+        int: the number of records with citations.
+    """
+    with db.session.begin_nested():
+        # Block writes to the citations while the counts are rebuilt
+        db.session.execute(f"LOCK TABLE {RecordCitations.__tablename__} IN SHARE MODE")
+        RecordCitationsByYear.query.delete()
+        RecordCitationsCount.query.delete()
+
+        counts_query = db.session.query(
+            RecordCitations.cited_id,
+            func.count(),
+            func.count().filter(not_(RecordCitations.is_self_citation)),
+        ).group_by(RecordCitations.cited_id)
+        db.session.execute(
+            insert(RecordCitationsCount).from_select(
+                [
+                    RecordCitationsCount.record_id,
+                    RecordCitationsCount.citation_count,
+                    RecordCitationsCount.citation_count_without_self_citations,
+                ],
+                counts_query.statement,
+            )
+        )
+
+        year = cast(extract("year", RecordCitations.citation_date), Integer)
+        counts_by_year_query = (
+            db.session.query(RecordCitations.cited_id, year, func.count())
+            .filter(RecordCitations.citation_date.isnot(None))
+            .group_by(RecordCitations.cited_id, year)
+        )
+        db.session.execute(
+            insert(RecordCitationsByYear).from_select(
+                [
+                    RecordCitationsByYear.record_id,
+                    RecordCitationsByYear.year,
+                    RecordCitationsByYear.count,
+                ],
+                counts_by_year_query.statement,
+            )
+        )
+    cited_records_count = RecordCitationsCount.query.count()
+    LOGGER.info("Citation counts recomputed", cited_records=cited_records_count)
+    return cited_records_count
+
+
+def _iter_citing_references(batch_size):
+    """Yield a row for every reference of literature records which counts as citation.
+
+    Yields:
+        tuple: citer uuid, pid type, pid value and citation date.
+    """
+    from inspirehep.records.api import LiteratureRecord
+
+    record_json = type_coerce(RecordMetadata.json, JSONB)
+    query = RecordMetadata.query.filter(
+        record_json["$schema"].astext.endswith("/hep.json")
+    ).yield_per(batch_size)
+    for model in query:
+        record = LiteratureRecord(model.json, model=model)
+        if not record.is_eligible_to_cite():
+            continue
+        citation_date = fill_missing_date_parts(record.earliest_date)
+        for pid_type, pid_value in record.get_cited_records_pids():
+            yield model.id, pid_type, pid_value, citation_date
+
+
+def _copy_rows(cursor, table, columns, rows, batch_size):
+    """Load rows into a table with ``COPY``, ``batch_size`` rows at a time.
+
+    Returns:
+        int: number of rows loaded.
+    """
+    statement = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    rows_count = 0
+    for row in rows:
+        writer.writerow(row)
+        rows_count += 1
+        if rows_count % batch_size == 0:
+            buffer.seek(0)
+            cursor.copy_expert(statement, buffer)
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        buffer.seek(0)
+        cursor.copy_expert(statement, buffer)
+    return rows_count
+
+
+def _get_constraints(table):
+    query = text(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = CAST(:table AS regclass) "
+        "AND contype IN ('p', 'u', 'f', 'c')"
+    )
+    return db.session.execute(query, {"table": table}).fetchall()
+
+
+def _get_indexes(table):
+    """Return the indexes of the table which don't back a constraint."""
+    query = text(
+        "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = :table "
+        "AND indexname NOT IN (SELECT conname FROM pg_constraint "
+        "WHERE conrelid = CAST(:table AS regclass))"
+    )
+    return db.session.execute(query, {"table": table}).fetchall()
+
+
+def _load_staging_citations(batch_size):
+    """Create the staging table and load the citations resolved from references."""
+    cursor = db.session.connection().connection.cursor()
+    db.session.execute(
+        f"CREATE TEMPORARY TABLE {REFERENCES_TABLE} (citer_id uuid NOT NULL, "
+        "pid_type varchar NOT NULL, pid_value varchar NOT NULL, citation_date date)"
+    )
+    references_count = _copy_rows(
+        cursor,
+        REFERENCES_TABLE,
+        ["citer_id", "pid_type", "pid_value", "citation_date"],
+        _iter_citing_references(batch_size),
+        batch_size * 10,
+    )
+    LOGGER.info("References loaded", references=references_count)
+
+    db.session.execute(
+        f"CREATE TABLE {STAGING_CITATIONS_TABLE} "
+        f"(LIKE {CITATIONS_TABLE} INCLUDING DEFAULTS)"
+    )
+    db.session.execute(
+        f"""
+        INSERT INTO {STAGING_CITATIONS_TABLE}
+            (citer_id, cited_id, citation_date, is_self_citation)
+        SELECT DISTINCT refs.citer_id, pid.object_uuid, refs.citation_date, false
+        FROM {REFERENCES_TABLE} refs
+        JOIN {PersistentIdentifier.__tablename__} pid
+            ON pid.pid_type = refs.pid_type
+            AND pid.pid_value = refs.pid_value
+            AND pid.object_type = 'rec'
+        """
+    )
+    db.session.execute(f"DROP TABLE {REFERENCES_TABLE}")
+
+
+def _mark_staging_self_citations():
+    """Mark the citations between records sharing an author or a collaboration.
+
+    The self-citations are first selected with a single ``CREATE TABLE AS``,
+    which Postgres can run with parallel workers, and then marked at once.
+    """
+    db.session.execute(
+        f"""
+        CREATE TEMPORARY TABLE {SELF_CITATIONS_TABLE} AS
+        SELECT citations.citer_id, citations.cited_id
+        FROM {STAGING_CITATIONS_TABLE} citations
+        WHERE EXISTS (
+            SELECT 1
+            FROM {RecordsAuthors.__tablename__} citer_authors
+            JOIN {RecordsAuthors.__tablename__} cited_authors
+                ON citer_authors.author_id = cited_authors.author_id
+                AND citer_authors.id_type = cited_authors.id_type
+            WHERE citer_authors.record_id = citations.citer_id
+                AND cited_authors.record_id = citations.cited_id
+                AND citer_authors.id_type IN ('INSPIRE BAI', 'collaboration')
+        )
+        """
+    )
+    db.session.execute(
+        f"""
+        UPDATE {STAGING_CITATIONS_TABLE} citations
+        SET is_self_citation = true
+        FROM {SELF_CITATIONS_TABLE} self_citations
+        WHERE citations.citer_id = self_citations.citer_id
+            AND citations.cited_id = self_citations.cited_id
+        """
+    )
+    db.session.execute(f"DROP TABLE {SELF_CITATIONS_TABLE}")
+
+
+def _add_staging_constraints_and_indexes():
+    """Copy constraints and indexes of the citations table to the staging one.
+
+    They get a ``_staging`` suffix, removed when the tables are swapped.
+
+    Returns:
+        list: the names of the constraints and indexes.
+    """
+    table_pattern = re.compile(rf" ON (\w+\.)?{CITATIONS_TABLE} ")
+    constraints = _get_constraints(CITATIONS_TABLE)
+    for name, definition in constraints:
+        db.session.execute(
+            f"ALTER TABLE {STAGING_CITATIONS_TABLE} "
+            f"ADD CONSTRAINT {name}_staging {definition}"
+        )
+    indexes = _get_indexes(CITATIONS_TABLE)
+    for name, definition in indexes:
+        definition = definition.replace(f" {name} ON", f" {name}_staging ON", 1)
+        definition = table_pattern.sub(f" ON {STAGING_CITATIONS_TABLE} ", definition)
+        db.session.execute(definition)
+    return [name for name, _ in constraints], [name for name, _ in indexes]
+
+
+def _swap_staging_citations(constraints, indexes):
+    db.session.execute(f"LOCK TABLE {CITATIONS_TABLE} IN ACCESS EXCLUSIVE MODE")
+    db.session.execute(f"ALTER TABLE {CITATIONS_TABLE} RENAME TO {OLD_CITATIONS_TABLE}")
+    db.session.execute(f"DROP TABLE {OLD_CITATIONS_TABLE}")
+    db.session.execute(
+        f"ALTER TABLE {STAGING_CITATIONS_TABLE} RENAME TO {CITATIONS_TABLE}"
+    )
+    for name in constraints:
+        db.session.execute(
+            f"ALTER TABLE {CITATIONS_TABLE} RENAME CONSTRAINT {name}_staging TO {name}"
+        )
+    for name in indexes:
+        db.session.execute(f"ALTER INDEX {name}_staging RENAME TO {name}")
+
+
+def diff_staging_citations(most_changed_records_limit=10):
+    """Compare the citations in the staging table with the current ones.
+
+    Returns:
+        dict: the report of the differences.
+    """
+    totals = db.session.execute(
+        f"""
+        SELECT
+            count(old.citer_id) AS old_citations,
+            count(new.citer_id) AS new_citations,
+            count(*) FILTER (WHERE old.citer_id IS NULL) AS added,
+            count(*) FILTER (WHERE new.citer_id IS NULL) AS removed,
+            count(*) FILTER (
+                WHERE old.is_self_citation <> new.is_self_citation
+            ) AS self_citations_changed,
+            count(*) FILTER (
+                WHERE old.citation_date IS DISTINCT FROM new.citation_date
+                AND old.citer_id IS NOT NULL AND new.citer_id IS NOT NULL
+            ) AS citation_dates_changed
+        FROM {CITATIONS_TABLE} old
+        FULL OUTER JOIN {STAGING_CITATIONS_TABLE} new
+            ON old.citer_id = new.citer_id AND old.cited_id = new.cited_id
+        """
+    ).first()
+    most_changed_records = db.session.execute(
+        text(
+            f"""
+            SELECT records.json ->> 'control_number' AS control_number,
+                changes.old_citation_count, changes.new_citation_count
+            FROM (
+                SELECT COALESCE(old.cited_id, new.cited_id) AS cited_id,
+                    count(old.citer_id) AS old_citation_count,
+                    count(new.citer_id) AS new_citation_count
+                FROM {CITATIONS_TABLE} old
+                FULL OUTER JOIN {STAGING_CITATIONS_TABLE} new
+                    ON old.citer_id = new.citer_id AND old.cited_id = new.cited_id
+                GROUP BY 1
+                HAVING count(old.citer_id) <> count(new.citer_id)
+                ORDER BY abs(count(new.citer_id) - count(old.citer_id)) DESC
+                LIMIT :limit
+            ) AS changes
+            JOIN {RecordMetadata.__tablename__} records
+                ON records.id = changes.cited_id
+            """
+        ),
+        {"limit": most_changed_records_limit},
+    )
+    report = dict(totals)
+    report["most_changed_records"] = [dict(row) for row in most_changed_records]
+    return report
+
+
+def rebuild_citations(batch_size=1000, dry_run=False, most_changed_records_limit=10):
+    """Rebuild ``records_citations`` from the references of all literature records.
+
+    The references are streamed into a temporary table with ``COPY``, resolved
+    against ``pidstore_pid`` with a single join into a staging table, which
+    replaces the citations table once it's fully built. Everything runs in the
+    current transaction, so the swap is atomic on commit, and the writes to
+    the citations are blocked from the start of the build so none of them is
+    lost by the swap.
+
+    Args:
+        batch_size (int): how many records are read at a time.
+        dry_run (bool): if True only the report is generated and the current
+            citations are kept.
+        most_changed_records_limit (int): how many of the records which
+            citation count changed the most are included in the report.
+
+    Returns:
+        dict: the report of the differences between the old and new citations.
+    """
+    if not dry_run:
+        db.session.execute(f"LOCK TABLE {CITATIONS_TABLE} IN SHARE MODE")
+    _load_staging_citations(batch_size)
+    if current_app.config.get("FEATURE_FLAG_ENABLE_SELF_CITATIONS"):
+        _mark_staging_self_citations()
+    report = diff_staging_citations(most_changed_records_limit)
+    LOGGER.info("Citations rebuilt in staging table", **report)
+
+    if dry_run:
+        db.session.execute(f"DROP TABLE {STAGING_CITATIONS_TABLE}")
+        return report
+
+    constraints, indexes = _add_staging_constraints_and_indexes()
+    _swap_staging_citations(constraints, indexes)
+    recompute_citation_counts()
+    return report
@@ -22,6 +22,7 @@ from sqlalchemy.dialects.postgresql import JSONB
 from inspirehep.mailing.api.jobs import send_job_deadline_reminder
 from inspirehep.pidstore.api import PidStoreBase
 from inspirehep.records.api import InspireRecord, JobsRecord
+from inspirehep.records.citations import rebuild_citations, recompute_citation_counts
 
 LOGGER = structlog.getLogger()
 
@@ -151,6 +152,55 @@ def citations():
     """Command for citations"""
 
 
+@citations.command(
+    "recompute-counts",
+    help="Recompute the citation counts of all records from the citations table",
+)
+@with_appcontext
+def recompute_counts():
+    cited_records_count = recompute_citation_counts()
+    db.session.commit()
+    click.secho(
+        f"Citation counts recomputed for {cited_records_count} records.", fg="green"
+    )
+
+
+@citations.command(
+    "rebuild",
+    help="Rebuild the citations table from the references of all literature records",
+)
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    default=False,
+    show_default=True,
+    help="Only report the differences, keeping the current citations.",
+)
+@click.option(
+    "-s",
+    "--batch-size",
+    default=1000,
+    show_default=True,
+    help="How many records are read at a time.",
+)
+@click.option(
+    "-l",
+    "--report-limit",
+    default=10,
+    show_default=True,
+    help="How many of the records which citations changed the most are reported.",
+)
+@with_appcontext
+def rebuild(dry_run, batch_size, report_limit):
+    report = rebuild_citations(
+        batch_size=batch_size,
+        dry_run=dry_run,
+        most_changed_records_limit=report_limit,
+    )
+    db.session.commit()
+    click.echo(orjson.dumps(report, option=orjson.OPT_INDENT_2).decode())
+
+
 @click.group()
 def jobs():
     """Command for jobs"""
@@ -663,6 +663,12 @@ LITERATURE_SOURCE_EXCLUDES_BY_CONTENT_TYPE = {
     ],
 }
 
+# Streaming export of the literature search results: number of records fetched
+# from ES at once, and number of exports which can run at once for a client,
+# whose count expires after the given number of seconds.
+LITERATURE_EXPORT_PAGE_SIZE = 1000
+LITERATURE_EXPORT_MAX_CONCURRENT = 2
+LITERATURE_EXPORT_SLOT_TTL = 3600
 
 ADDITIONAL_LINKS = {"LITERATURE": {"citations": build_citation_search_link}}
 
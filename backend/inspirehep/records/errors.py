@@ -70,6 +70,11 @@ class MaxResultWindowRESTError(RESTException):
     code = 400
 
 
+class ExportConcurrencyLimitExceeded(RESTException):
+    code = 429
+    description = "Too many exports running at once, please wait for them to finish."
+
+
 class CannotUndeleteRedirectedRecord(RecordsError):
     def __init__(self, pid_type, pid_value, **kwargs):
         self.description = f"Cannot undelete redirected article ({pid_type}:{pid_value}). First remove redirection then try again."
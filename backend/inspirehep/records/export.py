@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 CERN.
+#
+# inspirehep is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+"""Streaming export of the literature search results."""
+
+import orjson
+from elasticsearch_dsl.connections import get_connection
+from flask import current_app, request
+from flask_login import current_user
+from redis import StrictRedis
+
+from inspirehep.records.serializers.json.literature import literature_json_search
+from inspirehep.search.utils import RecursionLimit
+
+EXPORT_FORMATS = {
+    "bibtex": {
+        "mimetype": "application/x-bibtex",
+        "includes": ["_bibtex_display"],
+        "separator": "\n",
+    },
+    "latex-eu": {
+        "mimetype": "application/vnd+inspire.latex.eu+x-latex",
+        "includes": ["_latex_eu_display"],
+        "separator": "\n\n",
+    },
+    "latex-us": {
+        "mimetype": "application/vnd+inspire.latex.us+x-latex",
+        "includes": ["_latex_us_display"],
+        "separator": "\n\n",
+    },
+    "json": {"mimetype": "application/json", "includes": None, "separator": ","},
+}
+
+# Takes a slot if less than ARGV[1] are taken, the count expires after ARGV[2]
+# seconds from the first slot taken.
+ACQUIRE_SLOT_SCRIPT = """
+local running = redis.call('INCR', KEYS[1])
+if running == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+if running > tonumber(ARGV[1]) then
+    redis.call('DECR', KEYS[1])
+    return 0
+end
+return 1
+"""
+
+# Releases a slot, unless the count has expired in the meantime.
+RELEASE_SLOT_SCRIPT = """
+if tonumber(redis.call('GET', KEYS[1]) or '0') > 0 then
+    redis.call('DECR', KEYS[1])
+end
+"""
+
+
+def get_export_client():
+    """Identify the client of the request, by user if it's logged in."""
+    if current_user.is_authenticated:
+        return f"user:{current_user.get_id()}"
+    return f"ip:{request.remote_addr}"
+
+
+class ExportSlots(object):
+    def __init__(self, client, redis=None):
+        """
+        Exports running at once for a client.
+
+        The slots are counted in redis, so the limit holds across the web
+        processes. The count expires ``LITERATURE_EXPORT_SLOT_TTL`` seconds
+        after it was created, so an export killed without releasing its slot
+        doesn't block the client.
+
+        Args:
+            client (str): the client, e.g. ``ip:127.0.0.1``.
+            redis (StrictRedis): the redis client, by default the one of
+                ``CACHE_REDIS_URL``.
+        """
+        if redis is None:
+            redis = StrictRedis.from_url(
+                current_app.config["CACHE_REDIS_URL"], decode_responses=True
+            )
+        self.redis = redis
+        self.key = f"literatureexport:{client}"
+        self.max_slots = current_app.config["LITERATURE_EXPORT_MAX_CONCURRENT"]
+        self.ttl = current_app.config["LITERATURE_EXPORT_SLOT_TTL"]
+        self._acquire_slot = self.redis.register_script(ACQUIRE_SLOT_SCRIPT)
+        self._release_slot = self.redis.register_script(RELEASE_SLOT_SCRIPT)
+
+    def acquire(self):
+        """Take a slot for an export.
+
+        Returns:
+            bool: whether a slot was free.
+        """
+        return bool(
+            self._acquire_slot(keys=[self.key], args=[self.max_slots, self.ttl])
+        )
+
+    def release(self):
+        self._release_slot(keys=[self.key])
+
+
+def iter_search_hits(search, page_size):
+    """Yield all the hits of the search, fetching them by pages.
+
+    The pages are fetched with ``search_after`` on the sort of the search and
+    the control number, so the depth of the export doesn't make the pages
+    slower and there is no scroll context to keep alive in ES.
+
+    Args:
+        search (elasticsearch_dsl.Search): the search to export.
+        page_size (int): the number of hits fetched by one request.
+    """
+    with RecursionLimit(current_app.config.get("SEARCH_MAX_RECURSION_LIMIT", 5000)):
+        body = search.to_dict()
+    body["sort"] = [*body.get("sort", []), {"control_number": "asc"}]
+    body["size"] = page_size
+    body["track_total_hits"] = False
+    body.pop("from", None)
+    es = get_connection(search._using)
+    while True:
+        hits = es.search(index=search._index, body=body, **search._params)["hits"][
+            "hits"
+        ]
+        yield from hits
+        if len(hits) < page_size:
+            return
+        body["search_after"] = hits[-1]["sort"]
+
+
+def iter_export(search, export_format, page_size):
+    """Yield the chunks of the export of the search in a format.
+
+    Only the fields needed by the format are fetched, the precomputed
+    displays for BibTeX and LaTeX, so the memory used doesn't depend on the
+    number of exported records.
+    """
+    export = EXPORT_FORMATS[export_format]
+    # replaces the source filter of the search, set by its Accept header
+    if export["includes"]:
+        search = search.source(includes=export["includes"], excludes=None)
+    else:
+        search = search.source(
+            includes=None,
+            excludes=current_app.config["LITERATURE_SOURCE_EXCLUDES_BY_CONTENT_TYPE"][
+                export["mimetype"]
+            ],
+        )
+
+    if export_format == "json":
+        yield "["
+    separator = ""
+    for hit in iter_search_hits(search, page_size):
+        if export_format == "json":
+            chunk = orjson.dumps(
+                literature_json_search.dump({"metadata": hit["_source"]})
+            ).decode()
+        else:
+            chunk = hit["_source"].get(export["includes"][0], "")
+        yield f"{separator}{chunk}"
+        separator = export["separator"]
+    if export_format == "json":
+        yield "]"
@@ -5,6 +5,7 @@
 # inspirehep is free software; you can redistribute it and/or modify it under
 # the terms of the MIT License; see LICENSE file for more details.
 
+from functools import partial
 from itertools import chain
 
 import orjson
@@ -15,9 +16,11 @@ from inspire_utils.record import get_value
 from invenio_db import db
 from marshmallow import fields, missing, pre_dump
 
+from inspirehep.indexer.batch import get_prefetched_value
 from inspirehep.oai.utils import is_cds_set, is_cern_arxiv_set
 from inspirehep.pidstore.api import PidStoreBase
 from inspirehep.records.api import InspireRecord
+from inspirehep.records.cache import RenderCache
 from inspirehep.records.marshmallow.literature.common.abstract import AbstractSource
 from inspirehep.records.marshmallow.literature.common.author import (
     AuthorsInfoSchemaForES,
@@ -32,10 +35,17 @@ from inspirehep.records.models import RecordCitations, RecordsAuthors
 from ..base import ElasticSearchBaseSchema
 from ..utils import get_display_name_for_author_name, get_facet_author_name_for_author
 from .base import LiteratureRawSchema
+from .latex import LatexSchema
 from .ui import LiteratureDetailSchema
 
 LOGGER = structlog.getLogger()
 
+# Values that change without the record being modified, they are left out of
+# the cached formats and filled in after reading them from the render cache.
+UI_DISPLAY_CITATION_FIELDS = ["citation_count", "citation_count_without_self_citations"]
+LATEX_CITATIONS_PLACEHOLDER = "\x00citations\x00"
+LATEX_TODAY_PLACEHOLDER = "\x00today\x00"
+
 
 class LiteratureElasticSearchSchema(ElasticSearchBaseSchema, LiteratureRawSchema):
     """Elasticsearch serialzier"""
@@ -64,6 +74,11 @@ class LiteratureElasticSearchSchema(ElasticSearchBaseSchema, LiteratureRawSchema
 
     @staticmethod
     def get_referenced_authors_bais(record):
+        referenced_authors_bais = get_prefetched_value(
+            "referenced_authors_bais", record.id
+        )
+        if referenced_authors_bais is not None:
+            return referenced_authors_bais
         return [
             result.author_id
             for result in db.session.query(RecordsAuthors.author_id)
@@ -76,16 +91,71 @@ class LiteratureElasticSearchSchema(ElasticSearchBaseSchema, LiteratureRawSchema
             .all()
         ]
 
+    def get_render_cache(self, record):
+        """Return the render cache for the record being dumped, if enabled."""
+        if not isinstance(record, InspireRecord) or not record.get("control_number"):
+            return None
+        if not RenderCache.is_enabled():
+            return None
+        render_cache = getattr(self, "_render_cache", None)
+        if render_cache is None or render_cache.record is not record:
+            render_cache = self._render_cache = RenderCache(record)
+        return render_cache
+
     def get_ui_display(self, record):
-        return orjson.dumps(LiteratureDetailSchema().dump(record).data).decode("utf-8")
+        render_cache = self.get_render_cache(record)
+        if not render_cache:
+            return orjson.dumps(LiteratureDetailSchema().dump(record).data).decode(
+                "utf-8"
+            )
+
+        ui_display = orjson.loads(
+            render_cache.get_or_render(
+                "ui_display", partial(self._render_ui_display_without_citations, record)
+            )
+        )
+        ui_display["citation_count"] = record.citation_count
+        ui_display[
+            "citation_count_without_self_citations"
+        ] = record.citation_count_without_self_citations
+        return orjson.dumps(ui_display).decode("utf-8")
+
+    @staticmethod
+    def _render_ui_display_without_citations(record):
+        ui_display = LiteratureDetailSchema().dump(record).data
+        for field in UI_DISPLAY_CITATION_FIELDS:
+            ui_display.pop(field, None)
+        return orjson.dumps(ui_display).decode("utf-8")
+
+    def _render_latex_display(self, record, serializer):
+        render_cache = self.get_render_cache(record)
+        if not render_cache:
+            return serializer.latex_template().render(
+                data=serializer.dump(record), format=serializer.format
+            )
+
+        latex = render_cache.get_or_render(
+            f"latex_{serializer.format.lower()}_display",
+            partial(self._render_latex_with_placeholders, record, serializer),
+        )
+        return latex.replace(
+            LATEX_CITATIONS_PLACEHOLDER, str(record.citation_count)
+        ).replace(LATEX_TODAY_PLACEHOLDER, LatexSchema().get_current_date(record))
+
+    @staticmethod
+    def _render_latex_with_placeholders(record, serializer):
+        """Render latex with placeholders for the values changing independently
+        from the record, so that the result can be cached."""
+        data = serializer.dump(record)
+        data["citations"] = LATEX_CITATIONS_PLACEHOLDER
+        data["today"] = LATEX_TODAY_PLACEHOLDER
+        return serializer.latex_template().render(data=data, format=serializer.format)
 
     def get_latex_us_display(self, record):
         from inspirehep.records.serializers.latex import latex_US
 
         try:
-            return latex_US.latex_template().render(
-                data=latex_US.dump(record), format=latex_US.format
-            )
+            return self._render_latex_display(record, latex_US)
         except Exception:
             LOGGER.exception("Cannot get latex us display", record=record)
             return " "
@@ -94,9 +164,7 @@ class LiteratureElasticSearchSchema(ElasticSearchBaseSchema, LiteratureRawSchema
         from inspirehep.records.serializers.latex import latex_EU
 
         try:
-            return latex_EU.latex_template().render(
-                data=latex_EU.dump(record), format=latex_EU.format
-            )
+            return self._render_latex_display(record, latex_EU)
         except Exception:
             LOGGER.exception("Cannot get latex eu display", record=record)
             return " "
@@ -104,13 +172,21 @@ class LiteratureElasticSearchSchema(ElasticSearchBaseSchema, LiteratureRawSchema
     def get_bibtex_display(self, record):
         from inspirehep.records.serializers.bibtex import literature_bibtex
 
-        return literature_bibtex.serialize(None, record)
+        render = partial(literature_bibtex.serialize, None, record)
+        render_cache = self.get_render_cache(record)
+        if not render_cache:
+            return render()
+        return render_cache.get_or_render("bibtex_display", render)
 
     def get_cv_format(self, record):
         from inspirehep.records.serializers.cv import literature_cv_html
 
+        render = partial(literature_cv_html.serialize_inner, None, record)
         try:
-            return literature_cv_html.serialize_inner(None, record)
+            render_cache = self.get_render_cache(record)
+            if not render_cache:
+                return render()
+            return render_cache.get_or_render("cv_format", render)
         except Exception:
             LOGGER.exception("Cannot get cv format", record=record)
             return " "
@@ -10,7 +10,7 @@ import enum
 
 from invenio_db import db
 from invenio_records.models import RecordMetadata
-from sqlalchemy import Boolean, Date, Enum, Text
+from sqlalchemy import Boolean, Date, Enum, Integer, Text
 from sqlalchemy.dialects.postgresql import ENUM
 from sqlalchemy_utils import UUIDType
 
@@ -62,6 +62,43 @@ class RecordCitations(db.Model):
     is_self_citation = db.Column(Boolean, nullable=False, default=False)
 
 
+class RecordCitationsCount(db.Model):
+    """Keeps the number of citations of every cited record,
+    so they don't have to be counted on every read."""
+
+    __tablename__ = "records_citations_counts"
+
+    record_id = db.Column(
+        UUIDType,
+        db.ForeignKey(
+            "records_metadata.id", name="fk_records_citations_counts_record_id"
+        ),
+        nullable=False,
+        primary_key=True,
+    )
+    citation_count = db.Column(Integer, nullable=False, default=0)
+    citation_count_without_self_citations = db.Column(
+        Integer, nullable=False, default=0
+    )
+
+
+class RecordCitationsByYear(db.Model):
+    """Keeps the number of citations received per year by every cited record."""
+
+    __tablename__ = "records_citations_by_year"
+
+    record_id = db.Column(
+        UUIDType,
+        db.ForeignKey(
+            "records_metadata.id", name="fk_records_citations_by_year_record_id"
+        ),
+        nullable=False,
+        primary_key=True,
+    )
+    year = db.Column(Integer, nullable=False, primary_key=True)
+    count = db.Column(Integer, nullable=False, default=0)
+
+
 class ConferenceToLiteratureRelationshipType(enum.Enum):
     conference_paper = "conference paper"
     proceedings = "proceedings"
@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 CERN.
+#
+# inspirehep is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+from itertools import chain
+
+import structlog
+from flask import current_app
+from inspire_utils.date import fill_missing_date_parts
+from invenio_db import db
+from invenio_pidstore.models import PersistentIdentifier
+from invenio_records.models import RecordMetadata
+from sqlalchemy import bindparam, delete, insert, text, tuple_, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
+
+from inspirehep.records.citations import CitationCountsDeltas
+from inspirehep.records.models import (
+    ConferenceLiterature,
+    ConferenceToLiteratureRelationshipType,
+    ExperimentLiterature,
+    InstitutionLiterature,
+    RecordCitations,
+    RecordsAuthors,
+)
+from inspirehep.utils import chunker
+
+LOGGER = structlog.getLogger()
+
+CONFERENCES_FIELD = "publication_info.conference_record"
+
+# Flips the citations of the batch whose self-citation flag is out of date.
+UPDATE_SELF_CITATIONS_QUERY = text(
+    f"""
+    UPDATE {RecordCitations.__tablename__} citations
+    SET is_self_citation = NOT citations.is_self_citation
+    WHERE (citations.citer_id IN :ids OR citations.cited_id IN :ids)
+        AND citations.is_self_citation <> EXISTS (
+            SELECT 1
+            FROM {RecordsAuthors.__tablename__} citer_authors
+            JOIN {RecordsAuthors.__tablename__} cited_authors
+                ON citer_authors.author_id = cited_authors.author_id
+                AND citer_authors.id_type = cited_authors.id_type
+            WHERE citer_authors.record_id = citations.citer_id
+                AND cited_authors.record_id = citations.cited_id
+                AND citer_authors.id_type IN ('INSPIRE BAI', 'collaboration')
+        )
+    RETURNING citations.cited_id, citations.is_self_citation
+    """
+).bindparams(bindparam("ids", expanding=True))
+
+
+class RecordsRelationsBatch:
+    def __init__(self, records, max_chunk_size=1000):
+        """
+        Relations of a batch of literature records updated together.
+
+        Instead of replacing the relations record by record, the pids linked by
+        all the records are resolved together and every relation table gets
+        one ``DELETE`` and one multi-row ``INSERT`` for the whole batch.
+
+        Args:
+            records (list(InspireRecord)): the records of the batch, the ones
+                which are not literature are ignored.
+            max_chunk_size (int): maximum number of values in one ``IN`` clause
+                and of rows in one ``INSERT``.
+        """
+        from inspirehep.records.api import LiteratureRecord
+
+        self.records = [
+            record for record in records if isinstance(record, LiteratureRecord)
+        ]
+        self.records_ids = [record.id for record in self.records]
+        self.max_chunk_size = max_chunk_size
+        self.linked_records = {}
+
+    def update(self):
+        """Replace all the relations of the records of the batch."""
+        if not self.records:
+            return
+        self.resolve_linked_pids()
+        authors_count = self.update_authors_records()
+        citations_count = self.update_citations()
+        conferences_count = self.replace_rows(
+            ConferenceLiterature,
+            ConferenceLiterature.literature_uuid,
+            self.generate_conferences_rows(),
+        )
+        institutions_count = self.replace_rows(
+            InstitutionLiterature,
+            InstitutionLiterature.literature_uuid,
+            self.generate_linked_records_rows(
+                "linked_institutions_pids", "institution_uuid"
+            ),
+        )
+        experiments_count = self.replace_rows(
+            ExperimentLiterature,
+            ExperimentLiterature.literature_uuid,
+            self.generate_linked_records_rows(
+                "linked_experiments_pids", "experiment_uuid"
+            ),
+        )
+        LOGGER.info(
+            "Records relations updated",
+            records=len(self.records),
+            authors=authors_count,
+            citations=citations_count,
+            conferences=conferences_count,
+            institutions=institutions_count,
+            experiments=experiments_count,
+        )
+
+    @staticmethod
+    def _get_conferences_relationship_type(record):
+        document_types = set(record.get("document_type", []))
+        allowed_types = set(
+            [option.value for option in list(ConferenceToLiteratureRelationshipType)]
+        )
+        relationship_types = allowed_types.intersection(document_types)
+        if relationship_types and record.get("deleted") is not True:
+            return ConferenceToLiteratureRelationshipType(relationship_types.pop())
+
+    def _get_linked_pids(self, record):
+        pids = []
+        if record.is_eligible_to_cite():
+            pids.extend(record.get_cited_records_pids())
+        if record.get("deleted") is not True:
+            pids.extend(record.get_linked_pids_from_field(CONFERENCES_FIELD))
+            pids.extend(record.linked_institutions_pids)
+            pids.extend(record.linked_experiments_pids)
+        return pids
+
+    def resolve_linked_pids(self):
+        """Resolve the pids linked by all the records to uuids and deleted flags."""
+        pids = set(chain.from_iterable(map(self._get_linked_pids, self.records)))
+        record_json = type_coerce(RecordMetadata.json, JSONB)
+        for pids_chunk in chunker(pids, self.max_chunk_size):
+            query = (
+                db.session.query(
+                    PersistentIdentifier.pid_type,
+                    PersistentIdentifier.pid_value,
+                    PersistentIdentifier.object_uuid,
+                    record_json["deleted"].astext,
+                )
+                .join(
+                    RecordMetadata,
+                    RecordMetadata.id == PersistentIdentifier.object_uuid,
+                )
+                .filter(
+                    PersistentIdentifier.object_type == "rec",
+                    tuple_(
+                        PersistentIdentifier.pid_type, PersistentIdentifier.pid_value
+                    ).in_(pids_chunk),
+                )
+            )
+            for pid_type, pid_value, object_uuid, deleted in query:
+                self.linked_records[(pid_type, pid_value)] = (
+                    object_uuid,
+                    deleted == "true",
+                )
+
+    def get_linked_records_ids(self, pids, with_deleted=False):
+        """Return the uuids of the linked records, without duplicates."""
+        records_ids = {}
+        for pid in pids:
+            linked_record = self.linked_records.get(pid)
+            if linked_record is None:
+                continue
+            record_id, deleted = linked_record
+            if with_deleted or not deleted:
+                records_ids[record_id] = None
+        return list(records_ids)
+
+    def _insert_rows(self, model, rows):
+        for rows_chunk in chunker(rows, self.max_chunk_size):
+            db.session.execute(insert(model.__table__).values(rows_chunk))
+
+    def replace_rows(self, model, record_id_column, rows):
+        """Replace the rows of the records of the batch in a relation table.
+
+        Returns:
+            int: the number of rows inserted.
+        """
+        rows = list(rows)
+        db.session.execute(
+            delete(model.__table__).where(record_id_column.in_(self.records_ids))
+        )
+        self._insert_rows(model, rows)
+        return len(rows)
+
+    def generate_authors_rows(self):
+        for record in self.records:
+            if (
+                record.get("deleted", False)
+                or "Literature" not in record["_collections"]
+            ):
+                continue
+            entries = record.generate_entries_for_authors_in_authors_records_table()
+            entries.extend(
+                record.generate_entries_for_collaborations_in_authors_records_table()
+            )
+            for entry in entries:
+                yield {
+                    "author_id": entry.author_id,
+                    "id_type": entry.id_type,
+                    "record_id": entry.record_id,
+                }
+
+    def update_authors_records(self):
+        return self.replace_rows(
+            RecordsAuthors, RecordsAuthors.record_id, self.generate_authors_rows()
+        )
+
+    def generate_citations_rows(self):
+        for record in self.records:
+            if not record.is_eligible_to_cite():
+                continue
+            citation_date = fill_missing_date_parts(record.earliest_date)
+            cited_ids = self.get_linked_records_ids(
+                record.get_cited_records_pids(), with_deleted=True
+            )
+            for cited_id in cited_ids:
+                yield {
+                    "citer_id": record.id,
+                    "cited_id": cited_id,
+                    "citation_date": citation_date,
+                    "is_self_citation": False,
+                }
+
+    def update_citations(self):
+        """Replace the citations of the batch keeping the citation counts up to date.
+
+        Returns:
+            int: the number of citations inserted.
+        """
+        citation_counts_deltas = CitationCountsDeltas()
+        deleted_citations = db.session.execute(
+            delete(RecordCitations.__table__)
+            .where(RecordCitations.citer_id.in_(self.records_ids))
+            .returning(
+                RecordCitations.cited_id,
+                RecordCitations.citation_date,
+                RecordCitations.is_self_citation,
+            )
+        )
+        for cited_id, citation_date, is_self_citation in deleted_citations:
+            citation_counts_deltas.remove_citation(
+                cited_id, citation_date, is_self_citation
+            )
+
+        rows = list(self.generate_citations_rows())
+        self._insert_rows(RecordCitations, rows)
+        for row in rows:
+            citation_counts_deltas.add_citation(
+                row["cited_id"], row["citation_date"], False
+            )
+
+        if current_app.config.get("FEATURE_FLAG_ENABLE_SELF_CITATIONS"):
+            for ids_chunk in chunker(self.records_ids, self.max_chunk_size):
+                marked_citations = db.session.execute(
+                    UPDATE_SELF_CITATIONS_QUERY,
+                    {"ids": [str(record_id) for record_id in ids_chunk]},
+                )
+                for cited_id, is_self_citation in marked_citations:
+                    citation_counts_deltas.mark_self_citation(
+                        cited_id, is_self_citation
+                    )
+        citation_counts_deltas.apply()
+        return len(rows)
+
+    def generate_conferences_rows(self):
+        for record in self.records:
+            relationship_type = self._get_conferences_relationship_type(record)
+            if relationship_type is None:
+                continue
+            conferences_ids = self.get_linked_records_ids(
+                record.get_linked_pids_from_field(CONFERENCES_FIELD)
+            )
+            for conference_id in conferences_ids:
+                yield {
+                    "conference_uuid": conference_id,
+                    "literature_uuid": record.id,
+                    "relationship_type": relationship_type,
+                }
+
+    def generate_linked_records_rows(self, pids_attribute, column):
+        for record in self.records:
+            if record.get("deleted") is True:
+                continue
+            linked_records_ids = self.get_linked_records_ids(
+                getattr(record, pids_attribute)
+            )
+            for linked_record_id in linked_records_ids:
+                yield {column: linked_record_id, "literature_uuid": record.id}
@@ -16,35 +16,57 @@ from invenio_db import db
 from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm.exc import StaleDataError
 
+from inspirehep.indexer.base import InspireRecordIndexer
 from inspirehep.matcher.utils import (
     generate_matcher_config_for_nested_reference_field,
     generate_matcher_config_for_reference_field,
 )
 from inspirehep.pidstore.api import PidStoreBase
 from inspirehep.records.api import InspireRecord, LiteratureRecord
+from inspirehep.records.relations import RecordsRelationsBatch
 from inspirehep.utils import flatten_list
 
 LOGGER = structlog.getLogger()
 
 
 def update_records_relations(uuids):
-    """Task which updates records_citations, institution_literature, experiment_literature and conference_literature tables with
-    relation to proper literature records.
+    """Task which updates records_authors, records_citations, institution_literature,
+    experiment_literature and conference_literature tables with relation to proper
+    literature records.
+
+    The relations of all the records are replaced together with set-based
+    statements, when that fails they are updated record by record.
 
     Args:
         uuids: records uuids for which relations should be reprocessed
     Returns:
         set: set of properly processed records uuids
     """
+    try:
+        with db.session.begin_nested():
+            records = InspireRecordIndexer.get_records(uuids)
+            RecordsRelationsBatch(records).update()
+    except OperationalError:
+        LOGGER.exception("OperationalError on recalculate relations in batch.")
+        raise
+    except Exception:
+        LOGGER.exception(
+            "Cannot recalculate relations in batch, falling back to one by one",
+            uuids=[str(uuid) for uuid in uuids],
+        )
+        update_records_relations_one_by_one(uuids)
+
+    db.session.commit()
+    return uuids
+
+
+def update_records_relations_one_by_one(uuids):
     for uuid in uuids:
         try:
             with db.session.begin_nested():
                 record = InspireRecord.get_record(uuid, with_deleted=True)
                 if isinstance(record, LiteratureRecord):
-                    record.update_refs_in_citation_table()
-                    record.update_conference_paper_and_proccedings()
-                    record.update_institution_relations()
-                    record.update_experiment_relations()
+                    record.update_record_relationships()
         except OperationalError:
             LOGGER.exception(
                 "OperationalError on recalculate relations.", uuid=str(uuid)
@@ -53,9 +75,6 @@ def update_records_relations(uuids):
         except Exception:
             LOGGER.exception("Cannot recalculate relations", uuid=str(uuid))
 
-    db.session.commit()
-    return uuids
-
 
 @shared_task(
     bind=True,
@@ -5,8 +5,12 @@
 # inspirehep is free software; you can redistribute it and/or modify it under
 # the terms of the MIT License; see LICENSE file for more details.
 
+import hashlib
+import tempfile
+from contextlib import contextmanager
 from itertools import chain
 
+import magic
 import numpy as np
 import requests
 from beard.clustering import block_phonetic
@@ -79,7 +83,11 @@ def requests_retry_session(retries=3):
     return session
 
 
-def download_file_from_url(url):
+# libmagic doesn't look further than the first MiB of a file to guess its type
+MIMETYPE_SNIFF_SIZE = 1024 * 1024
+
+
+def _request_file(url):
     download_url = url if url.startswith("http") else f"{get_inspirehep_url()}{url}"
     max_retries = current_app.config.get("FILES_DOWNLOAD_MAX_RETRIES", 3)
     try:
@@ -93,7 +101,58 @@ def download_file_from_url(url):
         raise DownloadFileError(
             f"Cannot download file from url {download_url}. Reason: {exc}"
         )
-    return request.content
+    return request
+
+
+def download_file_from_url(url):
+    return _request_file(url).content
+
+
+@contextmanager
+def download_file_to_temporary_file(url):
+    """Download a file chunk by chunk, hashing it and guessing its type on the fly.
+
+    The chunks are written to a temporary file which stays in memory only up
+    to ``FILES_SPOOL_MAX_MEMORY_SIZE`` bytes and is moved to disk afterwards,
+    so the memory used doesn't depend on the size of the file.
+
+    Args:
+        url (str): the url of the file, relative urls are on inspirehep.
+
+    Yields:
+        tuple: the temporary file positioned at its start, the md5 hash and
+        the mimetype of the file.
+
+    Raises:
+        DownloadFileError: when the file cannot be downloaded.
+        ValueError: when the file is empty.
+    """
+    request = _request_file(url)
+    md5 = hashlib.md5()
+    head = b""
+    size = 0
+    with tempfile.SpooledTemporaryFile(
+        max_size=current_app.config["FILES_SPOOL_MAX_MEMORY_SIZE"]
+    ) as file_data:
+        try:
+            for chunk in request.iter_content(
+                chunk_size=current_app.config["FILES_DOWNLOAD_CHUNK_SIZE"]
+            ):
+                md5.update(chunk)
+                if len(head) < MIMETYPE_SNIFF_SIZE:
+                    head += chunk[: MIMETYPE_SNIFF_SIZE - len(head)]
+                file_data.write(chunk)
+                size += len(chunk)
+        except requests.exceptions.RequestException as exc:
+            raise DownloadFileError(
+                f"Cannot download file from url {url}. Reason: {exc}"
+            )
+        finally:
+            request.close()
+        if not size:
+            raise ValueError("Data for hashing cannot be empty")
+        file_data.seek(0)
+        yield file_data, md5.hexdigest(), magic.from_buffer(head, mime=True)
 
 
 def get_pid_for_pid(pid_type, pid_value, provider):
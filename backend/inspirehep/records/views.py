@@ -5,22 +5,30 @@
 # inspirehep is free software; you can redistribute it and/or modify it under
 # the terms of the MIT License; see LICENSE file for more details.
 import structlog
-from flask import Blueprint, abort, current_app, request
+from flask import Blueprint, Response, abort, current_app, request, stream_with_context
 from flask.views import MethodView
 from invenio_records_rest.views import pass_record
 
 from inspirehep.records.api.literature import import_article
 from inspirehep.records.errors import (
     ExistingArticleError,
+    ExportConcurrencyLimitExceeded,
     ImportArticleError,
     ImportConnectionError,
     ImportParsingError,
     MaxResultWindowRESTError,
     UnknownImportIdentifierError,
 )
+from inspirehep.records.export import (
+    EXPORT_FORMATS,
+    ExportSlots,
+    get_export_client,
+    iter_export,
+)
 from inspirehep.records.marshmallow.literature.references import (
     LiteratureReferencesSchema,
 )
+from inspirehep.search.factories.search import search_factory_without_aggs
 from inspirehep.serializers import jsonify
 from inspirehep.submissions.serializers import literature_v1
 
@@ -108,6 +116,30 @@ def import_article_view(identifier):
         return jsonify(message=f"{identifier} is not a recognized identifier."), 400
 
 
+@blueprint.route("/literature/export", methods=("GET",))
+def export_literature_view():
+    """Stream all the results of a literature search in a format."""
+    export_format = request.values.get("format", "bibtex", type=str)
+    if export_format not in EXPORT_FORMATS:
+        abort(400)
+
+    search, _ = search_factory_without_aggs(None, LiteratureSearch())
+    slots = ExportSlots(get_export_client())
+    if not slots.acquire():
+        raise ExportConcurrencyLimitExceeded()
+
+    response = Response(
+        stream_with_context(
+            iter_export(
+                search, export_format, current_app.config["LITERATURE_EXPORT_PAGE_SIZE"]
+            )
+        ),
+        mimetype=EXPORT_FORMATS[export_format]["mimetype"],
+    )
+    response.call_on_close(slots.release)
+    return response
+
+
 literature_citations_view = LiteratureCitationsResource.as_view(
     LiteratureCitationsResource.view_name
 )
@@ -610,3 +610,44 @@ def experiment_institution_aggregation(order):
             "meta": {"title": "Institution", "order": order, "type": "checkbox"},
         }
     }
+
+
+def hep_h_index_aggregation(field, size=2000):
+    """Highest citation counts the h-index is computed from.
+
+    The h-index itself is computed while serializing the facets, see
+    :func:`inspirehep.search.utils.get_h_index`. It needs at most ``h + 1``
+    distinct citation counts, so only the ``size`` highest are aggregated,
+    which keeps the number of buckets bounded for broad queries.
+    """
+    return {
+        "h-index": {
+            "filters": {
+                "filters": {
+                    "published": {"term": {"refereed": "true"}},
+                    "all": {"match_all": {}},
+                }
+            },
+            "aggs": {
+                "citation_count": {
+                    "terms": {"field": field, "size": size, "order": {"_key": "desc"}}
+                }
+            },
+            "meta": {"is_h_index_aggregation": True},
+        }
+    }
+
+
+def hep_citations_by_year_aggregation():
+    return {
+        "citations_by_year": {
+            "nested": {"path": "citations_by_year"},
+            "aggs": {
+                "years": {
+                    "terms": {"field": "citations_by_year.year", "size": 1000},
+                    "aggs": {"count": {"sum": {"field": "citations_by_year.count"}}},
+                }
+            },
+            "meta": {"is_citations_by_year_aggregation": True},
+        }
+    }
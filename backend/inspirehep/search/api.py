@@ -8,6 +8,7 @@
 
 import structlog
 from elasticsearch import RequestError
+from elasticsearch_dsl.connections import get_connection
 from elasticsearch_dsl.query import Match, Q
 from flask import current_app, request
 from inspire_schemas.utils import convert_old_publication_info_to_new
@@ -22,6 +23,7 @@ from inspirehep.matcher.api import (
     match_reference_control_numbers_with_relaxed_journal_titles,
 )
 from inspirehep.pidstore.api import PidStoreBase
+from inspirehep.search.cache import SearchCache
 from inspirehep.search.errors import MaximumSearchPageSizeExceeded
 from inspirehep.search.factories import inspire_query_factory
 from inspirehep.search.utils import RecursionLimit
@@ -112,14 +114,31 @@ class InspireSearch(RecordsSearch, SearchMixin):
         includes.extend(["control_number", "_updated", "_created"])
         return self.source(includes=includes)
 
-    def execute(self, *args, **kwargs):
+    def execute(self, ignore_cache=False):
         if request:
             size = request.args.get("size", default=25, type=int)
             max_page_size = current_app.config.get("SEARCH_MAX_SEARCH_PAGE_SIZE", 500)
             if size > max_page_size:
                 raise MaximumSearchPageSizeExceeded(max_size=max_page_size)
         with RecursionLimit(current_app.config.get("SEARCH_MAX_RECURSION_LIMIT", 5000)):
-            return super().execute(*args, **kwargs)
+            search_cache = SearchCache.for_current_request()
+            if search_cache is None or (
+                hasattr(self, "_response") and not ignore_cache
+            ):
+                return super().execute(ignore_cache=ignore_cache)
+            return self._execute_with_cache(search_cache)
+
+    def _execute_with_cache(self, search_cache):
+        es = get_connection(self._using)
+        body = self.to_dict()
+        raw_response = search_cache.get_or_search(
+            self._index,
+            body,
+            self._params,
+            lambda: es.search(index=self._index, body=body, **self._params),
+        )
+        self._response = self._response_class(self, raw_response)
+        return self._response
 
 
 class LiteratureSearch(InspireSearch):
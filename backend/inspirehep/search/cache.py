@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 CERN.
+#
+# inspirehep is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+import hashlib
+import time
+from collections import OrderedDict
+from datetime import date
+
+import inspire_query_parser
+import orjson
+import pkg_resources
+import structlog
+from flask import current_app, request
+from prometheus_client import Counter, Histogram
+from redis.exceptions import RedisError
+
+from inspirehep.utils import get_redis
+
+LOGGER = structlog.getLogger()
+
+search_cache_hits = Counter(
+    "search_cache_hits",
+    "How many search responses were reused from the search cache.",
+    ["endpoint"],
+)
+search_cache_misses = Counter(
+    "search_cache_misses",
+    "How many search responses had to be requested from ES.",
+    ["endpoint"],
+)
+
+parsed_query_cache_hits = Counter(
+    "parsed_query_cache_hits",
+    "How many queries were not parsed thanks to the parsed queries cache.",
+    ["tier"],
+)
+parsed_query_cache_misses = Counter(
+    "parsed_query_cache_misses",
+    "How many queries had to be parsed by the query parser.",
+)
+query_parse_time = Histogram(
+    "query_parse_seconds",
+    "Time spent parsing a query with the query parser.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+GENERATION_KEY = "searchcache:generation"
+QUERY_PARSER_VERSION = pkg_resources.get_distribution("inspire-query-parser").version
+
+
+class SearchCache(object):
+    def __init__(self, endpoint, ttl):
+        """
+        Cache of the raw ES responses of a search endpoint.
+
+        Responses are keyed on the index and the whole search body (query,
+        filters, aggregations, size and page) together with the index
+        generation, which is bumped whenever records are indexed, so responses
+        are never reused after an indexing.
+
+        Args:
+            endpoint (str): the endpoint of the cached searches.
+            ttl (int): expiration time in seconds of the cached responses.
+        """
+        self.endpoint = endpoint
+        self.ttl = ttl
+
+    @classmethod
+    def for_current_request(cls):
+        """Return the cache of the current endpoint or ``None`` if it's not cached."""
+        if (
+            not current_app.config.get("FEATURE_FLAG_ENABLE_SEARCH_CACHE")
+            or not request
+        ):
+            return None
+        ttl = current_app.config["SEARCH_CACHE_TTL_BY_ENDPOINT"].get(request.endpoint)
+        if not ttl:
+            return None
+        return cls(request.endpoint, ttl)
+
+    @property
+    def redis(self):
+        return get_redis()
+
+    def get_key(self, index, body, params):
+        generation = self.redis.get(GENERATION_KEY) or 0
+        canonical_string = orjson.dumps(
+            [index, body, params], option=orjson.OPT_SORT_KEYS
+        )
+        return "searchcache:{}:{}:{}".format(
+            self.endpoint, generation, hashlib.sha1(canonical_string).hexdigest()
+        )
+
+    def get_or_search(self, index, body, params, search):
+        """Return the cached ES response or search and cache it.
+
+        Args:
+            index (list): the indexes searched.
+            body (dict): the search body.
+            params (dict): the search parameters.
+            search (callable): sends the search to ES, called only on cache miss.
+
+        Returns:
+            dict: the raw ES response.
+        """
+        key = None
+        try:
+            key = self.get_key(index, body, params)
+            cached_response = self.redis.get(key)
+        except RedisError:
+            LOGGER.warning("Cannot read search cache", endpoint=self.endpoint)
+            cached_response = None
+        if cached_response is not None:
+            search_cache_hits.labels(self.endpoint).inc()
+            return orjson.loads(cached_response)
+
+        search_cache_misses.labels(self.endpoint).inc()
+        response = search()
+        if key is not None and not response.get("timed_out"):
+            try:
+                self.redis.set(key, orjson.dumps(response), ex=self.ttl)
+            except RedisError:
+                LOGGER.warning("Cannot write search cache", endpoint=self.endpoint)
+        return response
+
+
+def invalidate_search_cache():
+    """Bump the index generation, so all the cached searches become stale."""
+    if not current_app.config.get("FEATURE_FLAG_ENABLE_SEARCH_CACHE"):
+        return
+    try:
+        get_redis().incr(GENERATION_KEY)
+    except RedisError:
+        LOGGER.warning("Cannot invalidate search cache")
+
+
+class ParsedQueriesCache(object):
+    def __init__(self, max_size, redis_ttl=None):
+        """
+        LRU cache of the ES queries generated by the query parser.
+
+        The queries are keyed on the query string, the version of the parser
+        and the current day, as the parser resolves relative dates like
+        ``today``. With ``redis_ttl`` the queries missing in the process are
+        looked up in redis, shared by all the processes.
+
+        Args:
+            max_size (int): maximum number of queries cached in the process.
+            redis_ttl (int): expiration time in seconds of the queries cached
+                in redis, they are not cached in redis if it's not set.
+        """
+        self.max_size = max_size
+        self.redis_ttl = redis_ttl
+        self._entries = OrderedDict()
+
+    @property
+    def redis(self):
+        return get_redis()
+
+    @staticmethod
+    def get_key(query_string):
+        return "parsedquery:{}:{}:{}".format(
+            QUERY_PARSER_VERSION,
+            date.today().isoformat(),
+            hashlib.sha1(query_string.encode("utf-8")).hexdigest(),
+        )
+
+    def _get_local(self, key):
+        query = self._entries.get(key)
+        if query is not None:
+            self._entries.move_to_end(key)
+        return query
+
+    def _set_local(self, key, query):
+        self._entries[key] = query
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _get_redis(self, key):
+        try:
+            return self.redis.get(key)
+        except RedisError:
+            LOGGER.warning("Cannot read parsed queries cache")
+
+    def _set_redis(self, key, query):
+        try:
+            self.redis.set(key, query, ex=self.redis_ttl)
+        except RedisError:
+            LOGGER.warning("Cannot write parsed queries cache")
+
+    def parse_query(self, query_string):
+        """Return the ES query of the query string, parsing it on cache miss.
+
+        Returns:
+            dict: the ES query, a new one at each call so it can be modified.
+        """
+        key = self.get_key(query_string)
+        query = self._get_local(key)
+        if query is not None:
+            parsed_query_cache_hits.labels("local").inc()
+            return orjson.loads(query)
+
+        if self.redis_ttl:
+            query = self._get_redis(key)
+            if query is not None:
+                parsed_query_cache_hits.labels("redis").inc()
+                self._set_local(key, query)
+                return orjson.loads(query)
+
+        parsed_query_cache_misses.inc()
+        start = time.monotonic()
+        parsed_query = inspire_query_parser.parse_query(query_string)
+        query_parse_time.observe(time.monotonic() - start)
+        query = orjson.dumps(parsed_query)
+        self._set_local(key, query)
+        if self.redis_ttl:
+            self._set_redis(key, query)
+        return parsed_query
+
+    def clear(self):
+        self._entries.clear()
+
+
+_parsed_queries_cache = None
+
+
+def get_parsed_queries_cache():
+    """Return the cache of the parsed queries, if it's enabled."""
+    global _parsed_queries_cache
+    if not current_app.config.get("FEATURE_FLAG_ENABLE_PARSED_QUERY_CACHE"):
+        return None
+    if _parsed_queries_cache is None:
+        _parsed_queries_cache = ParsedQueriesCache(
+            current_app.config["SEARCH_PARSED_QUERY_CACHE_SIZE"],
+            current_app.config.get("SEARCH_PARSED_QUERY_CACHE_REDIS_TTL"),
+        )
+    return _parsed_queries_cache
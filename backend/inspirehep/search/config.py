@@ -7,6 +7,23 @@
 
 FEATURE_FLAG_ENABLE_QUERY_PARSER_ENDPOINT = True
 SEARCH_MAX_SEARCH_PAGE_SIZE = 1000
+# Cache the ES responses of the endpoints below in redis, for the given
+# number of seconds. Indexing any record invalidates all the cached responses.
+FEATURE_FLAG_ENABLE_SEARCH_CACHE = False
+SEARCH_CACHE_TTL_BY_ENDPOINT = {
+    "invenio_records_rest.literature_facets_list": 60 * 10,
+    "invenio_records_rest.literature_list": 60,
+    "invenio_records_rest.authors_list": 60,
+    "invenio_records_rest.institutions_list": 60,
+}
+# Seconds after an indexing when the cached responses are invalidated again,
+# longer than the refresh interval of the indexes.
+SEARCH_CACHE_INVALIDATION_DELAY = 5
+# Cache the ES queries generated by the query parser in each process, and
+# in redis for the given number of seconds if it's set.
+FEATURE_FLAG_ENABLE_PARSED_QUERY_CACHE = False
+SEARCH_PARSED_QUERY_CACHE_SIZE = 10000
+SEARCH_PARSED_QUERY_CACHE_REDIS_TTL = None
 FORBIDDEN_MIMETYPES_FOR_API_FILTERING = [
     "application/vnd+inspire.record.ui+json",
     "application/x-bibtex",
@@ -20,12 +20,14 @@ from inspirehep.search.aggregations import (
     hep_author_affiliations_aggregation,
     hep_author_aggregation,
     hep_author_count_aggregation,
+    hep_citations_by_year_aggregation,
     hep_collaboration_aggregation,
     hep_collection_aggregation,
     hep_curation_collection_aggregation,
     hep_doc_type_aggregation,
     hep_earliest_date_aggregation,
     hep_experiments_aggregation,
+    hep_h_index_aggregation,
     hep_rpp,
     hep_self_author_affiliations_aggregation,
     hep_self_author_claimed_papers_aggregation,
@@ -349,47 +351,13 @@ def citation_summary():
     else:
         field = "citation_count"
 
-    map_script = (
-        "if (doc.refereed.length >0 && doc.refereed[0]) {"
-        f"    state.citations_refereed.add(doc.{field}[0])"
-        "} else {"
-        f"    state.citations_non_refereed.add(doc.{field}[0])"
-        "}"
-    )
-    reduce_script = """
-        def flattened_all = [];
-        def flattened_refereed = [];
-        int i = 0;
-        int j = 0;
-        for (a in states) {
-            flattened_all.addAll(a.citations_non_refereed);
-            flattened_refereed.addAll(a.citations_refereed)
-        }
-        flattened_refereed.sort(Comparator.reverseOrder());
-        while (i < flattened_refereed.size() && i < flattened_refereed[i]) {
-            i++
-        }
-        flattened_all.addAll(flattened_refereed);
-        flattened_all.sort(Comparator.reverseOrder());
-        while (j < flattened_all.size() && j < flattened_all[j]) {
-            j++
-        }
-        return ['published': i, 'all': j]
-    """
     return {
         "filters": {**filters},
         "aggs": {
             "citation_summary": {
                 "filter": {"term": {"citeable": "true"}},
                 "aggs": {
-                    "h-index": {
-                        "scripted_metric": {
-                            "init_script": "state.citations_non_refereed = []; state.citations_refereed = []",
-                            "map_script": minify_painless(map_script),
-                            "combine_script": "return state",
-                            "reduce_script": minify_painless(reduce_script),
-                        }
-                    },
+                    **hep_h_index_aggregation(field),
                     "citations": {
                         "filters": {
                             "filters": {
@@ -434,6 +402,13 @@ def citations_by_year():
     ]
     filters = get_filters_without_excluded(hep_filters(), excluded_filters)
 
+    if current_app.config.get("FEATURE_FLAG_ENABLE_NESTED_CITATIONS_BY_YEAR"):
+        return {
+            "filters": {**filters},
+            "filter": {"term": {"citeable": "true"}},
+            "aggs": {**hep_citations_by_year_aggregation()},
+        }
+
     map_script = """
         def years = params._source.citations_by_year != null ? params._source.citations_by_year : [];
         for (element in years) {
@@ -8,6 +8,7 @@ import inspire_query_parser
 from elasticsearch_dsl import Q
 from flask import current_app
 
+from inspirehep.search.cache import get_parsed_queries_cache
 from inspirehep.search.utils import RecursionLimit
 
 
@@ -16,6 +17,9 @@ def inspire_query_factory():
 
     def inspire_query(query_string, search):
         with RecursionLimit(current_app.config.get("SEARCH_MAX_RECURSION_LIMIT", 5000)):
-            return Q(inspire_query_parser.parse_query(query_string))
+            parsed_queries_cache = get_parsed_queries_cache()
+            if parsed_queries_cache is None:
+                return Q(inspire_query_parser.parse_query(query_string))
+            return Q(parsed_queries_cache.parse_query(query_string))
 
     return inspire_query
@@ -49,6 +49,30 @@ def minify_painless(script):
     return " ".join(script.split())
 
 
+def get_h_index(citation_count_buckets):
+    """Compute the h-index from the buckets of the highest citation counts.
+
+    Args:
+        citation_count_buckets (list): buckets with the citation count as ``key``
+            and the number of papers with that many citations as ``doc_count``,
+            at least the ``h + 1`` highest ones.
+
+    Returns:
+        int: the highest ``h`` such that ``h`` papers have at least ``h`` citations.
+    """
+    h_index = 0
+    papers_count = 0
+    for bucket in sorted(
+        citation_count_buckets, key=lambda bucket: bucket["key"], reverse=True
+    ):
+        citation_count = int(bucket["key"])
+        papers_count += bucket["doc_count"]
+        h_index = max(h_index, min(citation_count, papers_count))
+        if papers_count >= citation_count:
+            break
+    return h_index
+
+
 class RecursionLimit(AbstractContextManager):
     def __init__(self, limit):
         self.limit = limit
@@ -18,6 +18,7 @@ from invenio_search.utils import build_alias_name
 from inspirehep.assign.utils import is_assign_view_enabled
 from inspirehep.records.links import inspire_search_links
 from inspirehep.search.api import LiteratureSearch
+from inspirehep.search.utils import get_h_index
 
 
 class ORJSONSerializerMixin:
@@ -132,12 +133,41 @@ class JSONSerializerFacets(ORJSONSerializerMixin, InvenioJSONSerializer):
             ``inspirehep.search.factories.search.search_factory_only_with_aggs``.
         """
 
-        search_result["aggregations"] = self.flatten_aggregations(
-            search_result.get("aggregations", {})
-        )
+        aggregations = search_result.get("aggregations", {})
+        self.compute_aggregations_values(aggregations)
+        search_result["aggregations"] = self.flatten_aggregations(aggregations)
 
         return orjson.dumps(search_result, **self._format_args())
 
+    @classmethod
+    def compute_aggregations_values(cls, aggregations):
+        """Replace the aggregations which values are computed from their buckets.
+
+        Note:
+            The h-index and the citations by year are aggregated by ES with
+            doc values only, and summed up here in the format of a metric.
+        """
+        for agg_key, agg_value in aggregations.items():
+            if not isinstance(agg_value, dict):
+                continue
+            meta = agg_value.get("meta", {})
+            if meta.get("is_h_index_aggregation"):
+                aggregations[agg_key] = {
+                    "value": {
+                        bucket_key: get_h_index(bucket["citation_count"]["buckets"])
+                        for bucket_key, bucket in agg_value["buckets"].items()
+                    }
+                }
+            elif meta.get("is_citations_by_year_aggregation"):
+                aggregations[agg_key] = {
+                    "value": {
+                        str(bucket["key"]): int(bucket["count"]["value"])
+                        for bucket in agg_value["years"]["buckets"]
+                    }
+                }
+            else:
+                cls.compute_aggregations_values(agg_value)
+
     @staticmethod
     def flatten_aggregations(aggregations):
         """Flatten the aggregation dict in case there are nested or filters aggregations.
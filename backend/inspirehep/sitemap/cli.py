@@ -22,10 +22,15 @@ def sitemap():
 @sitemap.command(
     help="Generates sitemaps for records that should be indexed by search engines"
 )
+@click.option(
+    "--incremental",
+    is_flag=True,
+    help="Write only the pages which records changed since the last generation.",
+)
 @with_appcontext
-def generate():
+def generate(incremental):
     try:
-        create_sitemap()
+        create_sitemap(incremental=incremental)
         click.secho("Task started.", fg="green")
     except Exception:
         click.secho("Failed.", fg="red")
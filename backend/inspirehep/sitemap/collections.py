@@ -47,13 +47,13 @@ def institutions():
     return InstitutionsSearch()
 
 
-def get_indexable_record_searches():
-    return [
-        jobs(),
-        literature(),
-        authors(),
-        conferences(),
-        seminars(),
-        experiments(),
-        institutions(),
-    ]
+# Collections in the order they appear in the sitemap.
+INDEXABLE_RECORD_SEARCHES = {
+    "jobs": jobs,
+    "literature": literature,
+    "authors": authors,
+    "conferences": conferences,
+    "seminars": seminars,
+    "experiments": experiments,
+    "institutions": institutions,
+}
@@ -7,6 +7,8 @@
 
 
 SITEMAP_PAGE_SIZE = 10000
+# Number of sitemap pages written in parallel.
+SITEMAP_WORKERS = 4
 
 S3_SITEMAP_BUCKET = "sitemap"
 
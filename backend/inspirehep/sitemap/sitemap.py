@@ -8,8 +8,6 @@
 from inspirehep.pidstore.api import PidStoreBase
 from inspirehep.utils import get_inspirehep_url
 
-from .collections import get_indexable_record_searches
-
 
 # TODO: maybe move to PidStoreBase ?
 def get_endpoint_from_schema(schema):
@@ -31,7 +29,101 @@ def generate_sitemap_items_from_search(record_search):
         }
 
 
-def generate_sitemap_items():
-    for record_search in get_indexable_record_searches():
-        for sitemap_item in generate_sitemap_items_from_search(record_search):
-            yield sitemap_item
+def iter_control_numbers(record_search, after=None, batch_size=10000):
+    """Yield the sorted control numbers of the records, after the given one."""
+    record_search = (
+        record_search.sort("control_number")
+        .source(["control_number"])
+        .extra(size=batch_size)
+    )
+    if after is not None:
+        record_search = record_search.filter("range", control_number={"gt": after})
+    while True:
+        hits = record_search.execute().hits
+        if not hits:
+            return
+        for hit in hits:
+            yield hit.control_number
+        record_search = record_search.extra(search_after=[hits[-1].control_number])
+
+
+def get_pages_stats(record_search, pages):
+    """Count the records of every page and get when they were last updated.
+
+    Args:
+        record_search (InspireSearch): the search of the collection of the pages.
+        pages (list): the pages, with their ``first_recid`` and ``last_recid``.
+
+    Returns:
+        dict: ``(count, last_updated)`` by page number.
+    """
+    if not pages:
+        return {}
+    record_search = record_search.extra(size=0)
+    record_search.aggs.bucket(
+        "pages",
+        "range",
+        field="control_number",
+        ranges=[
+            {
+                "key": str(page["page"]),
+                "from": page["first_recid"],
+                "to": page["last_recid"] + 1,
+            }
+            for page in pages
+        ],
+    ).metric("last_updated", "max", field="_updated")
+    buckets = record_search.execute().aggregations.pages.buckets
+    return {
+        int(bucket.key): (bucket.doc_count, bucket.last_updated.value)
+        for bucket in buckets
+    }
+
+
+def allocate_sitemap_pages(record_search, collection, pages, page_size, next_page):
+    """Assign the records not in any page yet to sitemap pages.
+
+    New records are added to the last page of the collection while it's not
+    full, and then to new pages, so the records of the other pages never change.
+
+    Args:
+        record_search (InspireSearch): the search of the collection.
+        collection (str): the name of the collection.
+        pages (list): the current pages of the collection, modified in place.
+        page_size (int): maximum number of records in a page.
+        next_page (int): the number of the first new page.
+
+    Returns:
+        int: the number of the next new page.
+    """
+    last_page = pages[-1] if pages else None
+    after = last_page["last_recid"] if last_page else None
+    for control_number in iter_control_numbers(record_search, after=after):
+        if last_page is None or last_page["count"] >= page_size:
+            last_page = {
+                "page": next_page,
+                "collection": collection,
+                "first_recid": last_page["last_recid"] + 1 if last_page else 0,
+                "last_recid": control_number,
+                "count": 0,
+                "last_updated": None,
+            }
+            pages.append(last_page)
+            next_page += 1
+        last_page["last_recid"] = control_number
+        last_page["count"] += 1
+        # the page must be written again
+        last_page["last_updated"] = None
+    return next_page
+
+
+def generate_sitemap_items_for_page(record_search, page):
+    record_search = (
+        record_search.filter(
+            "range",
+            control_number={"gte": page["first_recid"], "lte": page["last_recid"]},
+        )
+        .sort("control_number")
+        .params(preserve_order=True)
+    )
+    return generate_sitemap_items_from_search(record_search)
@@ -5,6 +5,8 @@
 # inspirehep is free software; you can redistribute it and/or modify it under
 # the terms of the MIT License; see LICENSE file for more details.
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import structlog
 from celery import shared_task
 from elasticsearch import (
@@ -16,10 +18,18 @@ from elasticsearch import (
 )
 from flask import current_app, render_template
 
-from inspirehep.utils import chunker
-
-from .sitemap import generate_sitemap_items
-from .utils import get_sitemap_page_absolute_url, write_sitemap_page_content
+from .collections import INDEXABLE_RECORD_SEARCHES
+from .sitemap import (
+    allocate_sitemap_pages,
+    generate_sitemap_items_for_page,
+    get_pages_stats,
+)
+from .utils import (
+    get_sitemap_page_absolute_url,
+    read_sitemap_manifest,
+    write_sitemap_manifest,
+    write_sitemap_page_content,
+)
 
 LOGGER = structlog.getLogger()
 
@@ -38,20 +48,63 @@ LOGGER = structlog.getLogger()
         RequestError,
     ),
 )
-def create_sitemap():
+def create_sitemap(incremental=False):
+    """Generate the sitemap pages and their index.
+
+    Every page contains the records of a collection in a range of control
+    numbers. The ranges, the number of records and when they were last updated
+    are kept in a manifest, which is saved after every page is written.
+
+    Args:
+        incremental (bool): write only the pages which records changed since
+            the previous generation, according to its manifest. Also used to
+            resume a generation which didn't finish.
+    """
     page_size = current_app.config["SITEMAP_PAGE_SIZE"]
-    sitemap_items = generate_sitemap_items()
-    page = 1
-    pages = chunker(sitemap_items, page_size)
-    for page_items in pages:
-        page_content = render_template("sitemap/page.xml", urlset=page_items)
-        write_sitemap_page_content(page, page_content)
-        page += 1
+    pages = read_sitemap_manifest() if incremental else []
+    next_page = max((page["page"] for page in pages), default=0) + 1
+
+    stale_pages = []
+    for collection, record_search in INDEXABLE_RECORD_SEARCHES.items():
+        collection_pages = [page for page in pages if page["collection"] == collection]
+        new_page = next_page
+        next_page = allocate_sitemap_pages(
+            record_search(), collection, collection_pages, page_size, next_page
+        )
+        pages.extend(page for page in collection_pages if page["page"] >= new_page)
+        pages_stats = get_pages_stats(record_search(), collection_pages)
+        for page in collection_pages:
+            stats = pages_stats[page["page"]]
+            if (page["count"], page["last_updated"]) != stats:
+                stale_pages.append((page, stats))
+
+    pages.sort(key=lambda page: page["page"])
+    LOGGER.info("Writing sitemap pages", pages=len(pages), stale_pages=len(stale_pages))
+    write_sitemap_manifest(pages)
+    app = current_app._get_current_object()
+    with ThreadPoolExecutor(current_app.config["SITEMAP_WORKERS"]) as executor:
+        futures = {
+            executor.submit(write_sitemap_page, app, page): stats
+            for page, stats in stale_pages
+        }
+        for future in as_completed(futures):
+            page = future.result()
+            page["count"], page["last_updated"] = futures[future]
+            write_sitemap_manifest(pages)
 
-    page_range = range(1, page)
     index_items = [
-        {"loc": get_sitemap_page_absolute_url(page_number)}
-        for page_number in page_range
+        {"loc": get_sitemap_page_absolute_url(page["page"])}
+        for page in pages
+        if page["count"]
     ]
     index_content = render_template("sitemap/index.xml", urlset=index_items)
     write_sitemap_page_content("", index_content)
+
+
+def write_sitemap_page(app, page):
+    with app.app_context():
+        record_search = INDEXABLE_RECORD_SEARCHES[page["collection"]]()
+        page_items = generate_sitemap_items_for_page(record_search, page)
+        page_content = render_template("sitemap/page.xml", urlset=page_items)
+        write_sitemap_page_content(page["page"], page_content)
+    return page
@@ -7,12 +7,15 @@
 
 from io import BytesIO
 
+import orjson
+from botocore.exceptions import ClientError
 from flask import current_app
 
 from inspirehep.files.api import current_s3_instance
 from inspirehep.utils import get_inspirehep_url
 
 SITEMAP_MIME_TYPE = "application/xml"
+SITEMAP_MANIFEST_FILENAME = "sitemap-manifest.json"
 
 
 def get_sitemap_page_filename(page):
@@ -39,3 +42,30 @@ def write_sitemap_page_content(page, page_content):
         current_app.config["S3_FILE_ACL"],
         bucket,
     )
+
+
+def read_sitemap_manifest():
+    """Return the pages written by the previous sitemap generation, if any."""
+    bucket = current_app.config["S3_SITEMAP_BUCKET"]
+    file_data = BytesIO()
+    try:
+        current_s3_instance.client.download_fileobj(
+            bucket, SITEMAP_MANIFEST_FILENAME, file_data
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+            return []
+        raise
+    return orjson.loads(file_data.getvalue())["pages"]
+
+
+def write_sitemap_manifest(pages):
+    bucket = current_app.config["S3_SITEMAP_BUCKET"]
+    current_s3_instance.upload_file(
+        BytesIO(orjson.dumps({"pages": pages})),
+        SITEMAP_MANIFEST_FILENAME,
+        SITEMAP_MANIFEST_FILENAME,
+        "application/json",
+        current_app.config["S3_FILE_ACL"],
+        bucket,
+    )
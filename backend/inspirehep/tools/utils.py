@@ -9,9 +9,13 @@
 import re
 from os.path import splitext
 
+from elasticsearch_dsl import MultiSearch
+from flask import current_app
 from werkzeug.utils import secure_filename
 
 from inspirehep.search.api import LiteratureSearch
+from inspirehep.search.utils import RecursionLimit
+from inspirehep.utils import chunker
 
 FORMAT_TO_SOURCE_FIELD = {
     "latex_eu": "_latex_eu_display",
@@ -24,6 +28,7 @@ def get_references(f):
     """Extract references from LaTeX string (whole file)"""
 
     references = []
+    seen_references = set()
     cstrip = re.compile(r"(?<!\\)%.*$", re.M)
 
     for num, line in enumerate(f, 1):
@@ -36,43 +41,67 @@ def get_references(f):
                 one_ref = re.sub(r"\s", "", one_ref)
                 if re.match(r"^#\d{1,2}$", one_ref):
                     continue
-                if not any(r[0] == one_ref for r in references):
+                if one_ref not in seen_references:
+                    seen_references.add(one_ref)
                     references.append((one_ref, num))
 
     return references
 
 
+def get_reference_query(ref):
+    """Build the search query of a reference from the type of its key."""
+    query = ref
+    keyword = None
+    if re.search(r"^\d{4}[\w.&]{15}$", ref):
+        # ads
+        keyword = "external_system_identifiers.value"
+    elif re.search(r".*\:\d{4}\w\w\w?", ref):
+        keyword = "texkey"
+    elif re.search(r".*\/\d{7}", ref):
+        keyword = "eprint"
+    elif re.search(r"\d{4}\.\d{4,5}", ref):
+        keyword = "eprint"
+    elif re.search(r"\w\.\w+\.\w", ref):
+        keyword = "j"
+        query = re.sub(r"\.", ",", ref)
+    elif re.search(r"\w\-\w", ref):
+        keyword = "r"
+    return f"{keyword}:{query}"
+
+
+def search_references(references, display_format):
+    """Yield the hits of every reference, searching them with few ES requests.
+
+    The searches of the references are sent together in ``_msearch``
+    requests of ``BIBLIOGRAPHY_GENERATOR_MSEARCH_SIZE`` searches.
+    """
+    for references_chunk in chunker(
+        references, current_app.config["BIBLIOGRAPHY_GENERATOR_MSEARCH_SIZE"]
+    ):
+        # the default connection of elasticsearch_dsl is not registered
+        literature_search = LiteratureSearch()
+        multi_search = MultiSearch(
+            using=literature_search._using, index=literature_search._index
+        )
+        for ref, _ in references_chunk:
+            multi_search = multi_search.add(
+                LiteratureSearch()
+                .query_from_iq(get_reference_query(ref))
+                .extra(size=2)
+                .source([display_format, "texkeys", "control_number"])
+            )
+        with RecursionLimit(current_app.config.get("SEARCH_MAX_RECURSION_LIMIT", 5000)):
+            results = multi_search.execute()
+        for (ref, line), result in zip(references_chunk, results):
+            yield ref, line, result.hits.hits
+
+
 def find_references(references, requested_format):
     display_format = FORMAT_TO_SOURCE_FIELD[requested_format]
 
     ret = []
     errors = []
-    for ref, line in references:
-        query = ref
-        keyword = None
-        if re.search(r"^\d{4}[\w.&]{15}$", ref):
-            # ads
-            keyword = "external_system_identifiers.value"
-        elif re.search(r".*\:\d{4}\w\w\w?", ref):
-            keyword = "texkey"
-        elif re.search(r".*\/\d{7}", ref):
-            keyword = "eprint"
-        elif re.search(r"\d{4}\.\d{4,5}", ref):
-            keyword = "eprint"
-        elif re.search(r"\w\.\w+\.\w", ref):
-            keyword = "j"
-            query = re.sub(r"\.", ",", ref)
-        elif re.search(r"\w\-\w", ref):
-            keyword = "r"
-
-        results = (
-            LiteratureSearch()
-            .query_from_iq(f"{keyword}:{query}")
-            .params(size=2, _source=[display_format, "texkeys", "control_number"])
-            .execute()
-        )
-
-        hits = results.hits.hits
+    for ref, line, hits in search_references(references, display_format):
         if len(hits) == 0:
             errors.append({"ref": ref, "line": line, "type": "not found"})
         elif len(hits) > 1:
@@ -9,7 +9,7 @@ import hashlib
 from contextlib import contextmanager
 from math import ceil
 
-from flask import current_app
+from flask import current_app, g
 from redis import StrictRedis
 from redis_lock import Lock
 
@@ -26,6 +26,16 @@ def get_inspirehep_url():
     return f"{PROTOCOL}://{SERVER}"
 
 
+def get_redis():
+    """Return the redis client of ``CACHE_REDIS_URL``, shared by the request."""
+    redis = getattr(g, "redis_client", None)
+    if redis is None:
+        url = current_app.config.get("CACHE_REDIS_URL")
+        redis = StrictRedis.from_url(url, decode_responses=True)
+        g.redis_client = redis
+    return redis
+
+
 def chunker(iterable, max_chunk_size, min_num_chunks=0):
     """Split iterable into iterator over chunks.
 
@@ -13,6 +13,13 @@ from sqlalchemy.engine import reflection
 
 def test_downgrade(inspire_app):
     alembic = Alembic(current_app)
+    alembic.downgrade(target="b7c2c3f0e6a1")
+    assert "inspire_pidstore_counters" not in _get_table_names()
+
+    alembic.downgrade(target="232af38d2604")
+    assert "records_citations_counts" not in _get_table_names()
+    assert "records_citations_by_year" not in _get_table_names()
+
     alembic.downgrade(target="2d7ea622feda")
     assert "students_advisors" not in _get_table_names()
     alembic.downgrade(target="412aeb064d68")
@@ -258,6 +265,13 @@ def test_upgrade(inspire_app):
     assert "enum_degree_type" in _get_custom_enums()
     assert "ix_students_advisors_student_id" in _get_indexes("students_advisors")
 
+    alembic.upgrade(target="b7c2c3f0e6a1")
+    assert "records_citations_counts" in _get_table_names()
+    assert "records_citations_by_year" in _get_table_names()
+
+    alembic.upgrade(target="5a1d2e8c4f3b")
+    assert "inspire_pidstore_counters" in _get_table_names()
+
 
 def _get_indexes(tablename):
     query = text(
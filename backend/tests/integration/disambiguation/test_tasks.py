@@ -6,12 +6,16 @@
 # the terms of the MIT License; see LICENSE file for more details.
 
 
+import mock
 import orjson
+import pytest
 from freezegun import freeze_time
 from helpers.utils import create_record
+from invenio_db import db
 from invenio_pidstore.models import PersistentIdentifier
 
 from inspirehep.disambiguation.tasks import disambiguate_signatures
+from inspirehep.records.api import LiteratureRecord
 from inspirehep.records.api.authors import AuthorsRecord
 
 
@@ -167,3 +171,122 @@ def test_disambiguate_signatures_cluster_with_no_authors_and_invalid_signature_u
     disambiguate_signatures(clusters)
     # check it does not create a new author
     assert len(PersistentIdentifier.query.filter_by(pid_type="aut").all()) == 0
+
+
+@mock.patch("inspirehep.disambiguation.utils.batch_index")
+def test_disambiguate_signatures_updates_each_publication_once(
+    mock_batch_index, inspire_app
+):
+    data = {
+        "authors": [
+            {"full_name": "Doe, John", "uuid": "94fc2b0a-dc17-42c2-bae3-ca0024079e51"},
+            {"full_name": "Doe, Jane", "uuid": "94fc2b0a-dc17-42c2-bae3-ca0024079e52"},
+        ]
+    }
+    record = create_record("lit", data=data)
+    other_record = create_record("lit", data=data)
+    version_id = record.model.version_id
+    clusters = [
+        {
+            "signatures": [
+                {
+                    "publication_id": record["control_number"],
+                    "signature_uuid": "94fc2b0a-dc17-42c2-bae3-ca0024079e51",
+                }
+            ],
+            "authors": [{"author_id": 100, "has_claims": True}],
+        },
+        {
+            "signatures": [
+                {
+                    "publication_id": record["control_number"],
+                    "signature_uuid": "94fc2b0a-dc17-42c2-bae3-ca0024079e52",
+                },
+                {
+                    "publication_id": other_record["control_number"],
+                    "signature_uuid": "94fc2b0a-dc17-42c2-bae3-ca0024079e52",
+                },
+            ],
+            "authors": [{"author_id": 101, "has_claims": True}],
+        },
+    ]
+
+    disambiguate_signatures(clusters)
+
+    record = LiteratureRecord.get_record_by_pid_value(record["control_number"])
+    assert record.model.version_id == version_id + 1
+    assert [author["record"]["$ref"] for author in record["authors"]] == [
+        "http://localhost:5000/api/authors/100",
+        "http://localhost:5000/api/authors/101",
+    ]
+    mock_batch_index.delay.assert_called_once()
+    assert sorted(mock_batch_index.delay.call_args[0][0]) == sorted(
+        [str(record.id), str(other_record.id)]
+    )
+
+
+@mock.patch("inspirehep.disambiguation.utils.batch_index")
+@mock.patch(
+    "inspirehep.disambiguation.utils.RecordsRelationsBatch.update",
+    side_effect=[None, ValueError],
+)
+def test_disambiguate_signatures_keeps_no_stub_author_of_failed_chunk(
+    mock_relations_update, mock_batch_index, inspire_app, override_config
+):
+    record = create_record(
+        "lit",
+        data={
+            "authors": [
+                {
+                    "full_name": "Doe, John",
+                    "uuid": "94fc2b0a-dc17-42c2-bae3-ca0024079e51",
+                }
+            ]
+        },
+    )
+    other_record = create_record(
+        "lit",
+        data={
+            "authors": [
+                {
+                    "full_name": "Doe, Jane",
+                    "uuid": "94fc2b0a-dc17-42c2-bae3-ca0024079e52",
+                }
+            ]
+        },
+    )
+    clusters = [
+        {
+            "signatures": [
+                {
+                    "publication_id": record["control_number"],
+                    "signature_uuid": "94fc2b0a-dc17-42c2-bae3-ca0024079e51",
+                }
+            ],
+            "authors": [],
+        },
+        {
+            "signatures": [
+                {
+                    "publication_id": other_record["control_number"],
+                    "signature_uuid": "94fc2b0a-dc17-42c2-bae3-ca0024079e52",
+                }
+            ],
+            "authors": [],
+        },
+    ]
+
+    with override_config(DISAMBIGUATION_LINK_CHUNK_SIZE=1), pytest.raises(ValueError):
+        disambiguate_signatures(clusters)
+    db.session.rollback()
+
+    author_pids = PersistentIdentifier.query.filter_by(pid_type="aut").all()
+    assert len(author_pids) == 1
+    author = AuthorsRecord.get_record_by_pid_value(author_pids[0].pid_value)
+    assert author["name"]["value"] == "Doe, John"
+    record = LiteratureRecord.get_record_by_pid_value(record["control_number"])
+    assert record["authors"][0]["record"]["$ref"] == author["self"]["$ref"]
+    other_record = LiteratureRecord.get_record_by_pid_value(
+        other_record["control_number"]
+    )
+    assert "record" not in other_record["authors"][0]
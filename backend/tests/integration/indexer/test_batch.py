@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 CERN.
+#
+# inspirehep is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+import uuid
+
+import orjson
+import pytest
+from helpers.utils import create_record
+from mock import patch
+
+from inspirehep.indexer.base import InspireRecordIndexer
+from inspirehep.indexer.batch import get_current_records_batch, records_batch
+from inspirehep.records.api import ConferencesRecord, InspireRecord, LiteratureRecord
+
+
+def test_get_records_keeps_order_and_skips_missing(inspire_app):
+    record_1 = create_record("lit")
+    record_2 = create_record("aut")
+
+    records = InspireRecordIndexer.get_records(
+        [str(record_2.id), str(uuid.uuid4()), str(record_1.id)]
+    )
+
+    assert [record.id for record in records] == [record_2.id, record_1.id]
+    assert [record.pid_type for record in records] == ["aut", "lit"]
+
+
+def test_records_batch_prefetches_citations(inspire_app, enable_self_citations):
+    author_data = {
+        "authors": [
+            {
+                "full_name": "John Doe",
+                "ids": [{"schema": "INSPIRE BAI", "value": "J.Doe.1"}],
+            }
+        ]
+    }
+    cited = create_record("lit", data=author_data)
+    create_record(
+        "lit",
+        data={
+            "references": [{"record": {"$ref": cited["self"]["$ref"]}}],
+            "preprint_date": "2020-01-01",
+        },
+    )
+    citer = create_record(
+        "lit",
+        data={
+            **author_data,
+            "references": [{"record": {"$ref": cited["self"]["$ref"]}}],
+            "preprint_date": "2021-01-01",
+        },
+    )
+    cited = LiteratureRecord.get_record_by_pid_value(cited["control_number"])
+    citer = LiteratureRecord.get_record_by_pid_value(citer["control_number"])
+
+    with records_batch([cited, citer]) as batch:
+        assert get_current_records_batch() is batch
+        assert batch.citation_count[cited.id] == 2
+        assert batch.citation_count_without_self_citations[cited.id] == 1
+        assert batch.citation_count[citer.id] == 0
+        assert batch.referenced_authors_bais[citer.id] == ["J.Doe.1"]
+        assert cited.citation_count == cited._citation_query().count()
+        assert cited.citations_by_year == cited._citations_by_year()
+
+    assert get_current_records_batch() is None
+
+
+def test_records_batch_prefetches_linked_records(inspire_app):
+    author = create_record("aut")
+    conference = create_record("con")
+    data = {
+        "authors": [
+            {"full_name": "John Doe", "record": {"$ref": author["self"]["$ref"]}}
+        ],
+        "publication_info": [
+            {"conference_record": {"$ref": conference["self"]["$ref"]}}
+        ],
+        "document_type": ["conference paper"],
+    }
+    record = create_record("lit", data=data)
+    missing_pid = ("aut", "123456789")
+
+    with records_batch([record]) as batch:
+        assert set(batch.linked_records) == {
+            ("aut", str(author["control_number"])),
+            ("con", str(conference["control_number"])),
+        }
+        linked_records = list(
+            InspireRecord.get_records_by_pids(
+                [("aut", str(author["control_number"])), missing_pid]
+            )
+        )
+        linked_conference = InspireRecord.get_record_by_pid_value(
+            conference["control_number"], "con"
+        )
+
+    assert [linked.id for linked in linked_records] == [author.id]
+    assert linked_conference.id == conference.id
+    assert isinstance(linked_conference, ConferencesRecord)
+
+
+def test_serialize_for_es_in_records_batch_matches_serialize_for_es(inspire_app):
+    author = create_record("aut")
+    conference = create_record("con")
+    cited = create_record(
+        "lit",
+        data={
+            "authors": [
+                {"full_name": "John Doe", "record": {"$ref": author["self"]["$ref"]}}
+            ],
+            "publication_info": [
+                {"conference_record": {"$ref": conference["self"]["$ref"]}}
+            ],
+            "document_type": ["conference paper"],
+        },
+    )
+    citer = create_record(
+        "lit", data={"references": [{"record": {"$ref": cited["self"]["$ref"]}}]}
+    )
+    records = InspireRecordIndexer.get_records([cited.id, citer.id])
+    expected = [record.serialize_for_es() for record in records]
+
+    with records_batch(records):
+        result = [record.serialize_for_es() for record in records]
+
+    for expected_data, result_data in zip(expected, result):
+        assert orjson.loads(expected_data.pop("_ui_display")) == orjson.loads(
+            result_data.pop("_ui_display")
+        )
+        assert expected_data == result_data
+
+
+def test_bulk_index_resets_records_batch_when_bulk_stops_early(inspire_app):
+    record = create_record("lit")
+
+    def consume_first_action(client, actions, **kwargs):
+        next(actions)
+        raise RuntimeError()
+
+    with patch("inspirehep.indexer.base.bulk", side_effect=consume_first_action):
+        with pytest.raises(RuntimeError):
+            InspireRecordIndexer().bulk_index([str(record.id)])
+
+    assert get_current_records_batch() is None
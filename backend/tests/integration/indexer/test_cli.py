@@ -7,12 +7,17 @@
 
 import random
 import re
+from datetime import datetime, timedelta
 
+import orjson
 from flask_sqlalchemy import models_committed
 from helpers.utils import create_record, create_record_factory
 from invenio_search import current_search
-from invenio_search.utils import build_index_name
+from invenio_search.utils import build_alias_name, build_index_name
+from mock import patch
 
+from inspirehep.indexer.rebuild import IndexesRebuild
+from inspirehep.indexer.reindex import ReindexCheckpoint
 from inspirehep.records.receivers import index_after_commit
 from inspirehep.search.api import (
     AuthorsSearch,
@@ -55,6 +60,117 @@ def test_reindex_one_type_of_record(inspire_app, cli):
     assert expected_aut_len == results_aut_len
 
 
+def test_reindex_writes_report_and_removes_checkpoint(inspire_app, cli, tmp_path):
+    create_record_factory("lit")
+    create_record_factory("lit")
+
+    result = cli.invoke(
+        ["index", "reindex", "-p", "lit", "-bs", "1", "-l", tmp_path.as_posix()]
+    )
+
+    assert result.exit_code == 0
+    report = orjson.loads((tmp_path / "reindex_report.json").read_bytes())
+    assert report["pid_types"] == ["lit"]
+    assert report["total"]["batches"] == 2
+    assert report["total"]["success"] == 2
+    assert report["total"]["size"] > 0
+    assert not (tmp_path / "reindex_checkpoint.json").exists()
+
+
+def test_reindex_resumes_from_checkpoint(inspire_app, cli, tmp_path):
+    records = sorted(
+        [create_record_factory("lit"), create_record_factory("lit")],
+        key=lambda record: str(record.id),
+    )
+    checkpoint = ReindexCheckpoint(
+        (tmp_path / "reindex_checkpoint.json").as_posix(), ["lit"]
+    )
+    checkpoint.last_uuid = str(records[0].id)
+    checkpoint.counters["records"] = 1
+    checkpoint.save()
+
+    result = cli.invoke(
+        ["index", "reindex", "-p", "lit", "--resume", "-l", tmp_path.as_posix()]
+    )
+    current_search.flush_and_refresh("*")
+
+    assert result.exit_code == 0
+    assert "Resuming after 1 records." in result.output
+    results_uuids = [hit["_id"] for hit in LiteratureSearch().execute().hits.hits]
+    assert results_uuids == [str(records[1].id)]
+
+
+def test_rebuild_index_switches_aliases(inspire_app, cli, tmp_path):
+    record = create_record_factory("lit")
+    alias = build_alias_name("records-hep")
+    old_indexes = set(current_search.client.indices.get_alias(name=alias))
+    old_settings = current_search.client.indices.get_settings(index=alias)
+
+    result = cli.invoke(
+        ["index", "rebuild", "-i", "records-hep", "-l", tmp_path.as_posix()]
+    )
+    current_search.flush_and_refresh("*")
+
+    assert result.exit_code == 0
+    new_indexes = set(current_search.client.indices.get_alias(name=alias))
+    assert len(new_indexes) == 1
+    assert not new_indexes & old_indexes
+    new_index = new_indexes.pop()
+    settings = current_search.client.indices.get_settings(index=new_index)[new_index][
+        "settings"
+    ]["index"]
+    assert settings.get("refresh_interval") != "-1"
+    assert settings["number_of_replicas"] in {
+        old_index_settings["settings"]["index"]["number_of_replicas"]
+        for old_index_settings in old_settings.values()
+    }
+    assert LiteratureSearch().execute().hits.hits[0]["_id"] == str(record.id)
+
+
+def test_rebuild_index_deletes_new_index_when_it_fails(inspire_app, cli, tmp_path):
+    create_record_factory("lit")
+    indexes_before = set(current_search.client.indices.get("*").keys())
+
+    with patch(
+        "inspirehep.indexer.cli.ReindexOrchestrator.run", side_effect=ValueError
+    ):
+        result = cli.invoke(
+            ["index", "rebuild", "-i", "records-hep", "-l", tmp_path.as_posix()]
+        )
+
+    assert result.exit_code != 0
+    assert set(current_search.client.indices.get("*").keys()) == indexes_before
+    assert not (tmp_path / "rebuild_checkpoint.json").exists()
+
+
+def test_rebuild_index_with_wrong_name(inspire_app, cli):
+    result = cli.invoke(["index", "rebuild", "-i", "records-author"])
+
+    assert result.exit_code == 1
+
+
+def test_rebuild_replays_updated_records_into_new_index(inspire_app):
+    rebuild = IndexesRebuild(["records-authors"])
+    rebuild.create_indexes()
+    record = create_record_factory("aut")
+    create_record_factory("lit")
+
+    since, replayed_count = rebuild.replay_updated_records(
+        datetime.utcnow() - timedelta(hours=1)
+    )
+    rebuild.restore_settings()
+
+    assert replayed_count == 1
+    assert since < datetime.utcnow()
+    assert current_search.client.get(
+        index=build_alias_name(rebuild.target_indexes["records-authors"]),
+        id=str(record.id),
+    )["found"]
+    current_search.client.indices.delete(
+        index=build_alias_name(rebuild.target_indexes["records-authors"])
+    )
+
+
 def test_remap_one_index(inspire_app, cli):
     indexes_before = set(current_search.client.indices.get("*").keys())
     # Generate new suffix to distinguish new indexes easier
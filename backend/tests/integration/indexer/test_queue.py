@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 CERN.
+#
+# inspirehep is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+import time
+import uuid
+
+import mock
+import pytest
+from helpers.utils import create_record
+
+from inspirehep.indexer.queue import ReindexQueue, drain_reindex_queue
+from inspirehep.indexer.tasks import index_record, process_reindex_queue
+
+
+def test_reindex_queue_coalesces_records(inspire_app, redis):
+    queue = ReindexQueue(redis)
+    record_uuid = str(uuid.uuid4())
+
+    assert queue.push([record_uuid, record_uuid]) == 1
+    assert queue.push([uuid.UUID(record_uuid)]) == 0
+    assert len(queue) == 1
+
+
+def test_reindex_queue_pops_records_after_debounce(inspire_app, redis, override_config):
+    queue = ReindexQueue(redis)
+    records_uuids = [str(uuid.uuid4()) for _ in range(3)]
+    queue.push(records_uuids)
+
+    with override_config(INDEXER_REINDEX_QUEUE_DEBOUNCE=60):
+        assert queue.pop(10) == []
+    with override_config(INDEXER_REINDEX_QUEUE_DEBOUNCE=0):
+        popped = queue.pop(2)
+
+    assert len(popped) == 2
+    assert {record_uuid for record_uuid, _ in popped} < set(records_uuids)
+    assert len(queue) == 1
+
+
+def test_drain_reindex_queue_indexes_in_batches(inspire_app, redis, override_config):
+    records_uuids = [str(uuid.uuid4()) for _ in range(5)]
+    ReindexQueue(redis).push(records_uuids)
+    index_records = mock.Mock(return_value={"failures_count": 0, "failures": []})
+
+    with override_config(INDEXER_REINDEX_QUEUE_DEBOUNCE=0):
+        popped = drain_reindex_queue(index_records, batch_size=2, max_batches=2)
+
+    assert popped == 4
+    assert [len(call[0][0]) for call in index_records.call_args_list] == [2, 2]
+    assert len(ReindexQueue(redis)) == 1
+
+
+def test_drain_reindex_queue_retries_failed_records_later(
+    inspire_app, redis, override_config
+):
+    records_uuids = [str(uuid.uuid4()) for _ in range(4)]
+    ReindexQueue(redis).push(records_uuids)
+    index_records = mock.Mock(
+        side_effect=[
+            {
+                "failures_count": 1,
+                "failures": [{"index": {"_id": records_uuids[0], "status": 400}}],
+            },
+            {"failures_count": 0, "failures": []},
+        ]
+    )
+
+    with override_config(
+        INDEXER_REINDEX_QUEUE_DEBOUNCE=0, INDEXER_REINDEX_QUEUE_RETRY_BACKOFF=60
+    ):
+        before_drain = time.time()
+        popped = drain_reindex_queue(index_records, batch_size=2, max_batches=3)
+
+    assert popped == 4
+    assert index_records.call_count == 2
+    assert redis.zrange(ReindexQueue.key, 0, -1) == [records_uuids[0]]
+    assert redis.zscore(ReindexQueue.key, records_uuids[0]) >= before_drain + 60
+    assert redis.hgetall(ReindexQueue.attempts_key) == {records_uuids[0]: "1"}
+
+
+def test_drain_reindex_queue_retries_the_batch_on_error(
+    inspire_app, redis, override_config
+):
+    records_uuids = [str(uuid.uuid4()) for _ in range(2)]
+    ReindexQueue(redis).push(records_uuids)
+    index_records = mock.Mock(side_effect=ConnectionError)
+
+    with override_config(INDEXER_REINDEX_QUEUE_DEBOUNCE=0), pytest.raises(
+        ConnectionError
+    ):
+        drain_reindex_queue(index_records, batch_size=2)
+
+    assert set(redis.zrange(ReindexQueue.key, 0, -1)) == set(records_uuids)
+    assert redis.zrangebyscore(ReindexQueue.key, "-inf", time.time()) == []
+
+
+def test_reindex_queue_gives_up_after_max_attempts(inspire_app, redis, override_config):
+    queue = ReindexQueue(redis)
+    record_uuid = str(uuid.uuid4())
+
+    with override_config(
+        INDEXER_REINDEX_QUEUE_MAX_ATTEMPTS=2, INDEXER_REINDEX_QUEUE_RETRY_BACKOFF=0
+    ):
+        assert queue.retry([record_uuid]) == []
+        redis.zrem(ReindexQueue.key, record_uuid)
+        assert queue.retry([record_uuid]) == [record_uuid]
+
+    assert len(queue) == 0
+    assert redis.zrange(ReindexQueue.failed_key, 0, -1) == [record_uuid]
+    assert redis.hgetall(ReindexQueue.attempts_key) == {}
+
+
+def test_drain_reindex_queue_resets_attempts_of_reindexed_records(
+    inspire_app, redis, override_config
+):
+    queue = ReindexQueue(redis)
+    record_uuid = str(uuid.uuid4())
+    with override_config(INDEXER_REINDEX_QUEUE_RETRY_BACKOFF=0):
+        queue.retry([record_uuid])
+    index_records = mock.Mock(return_value={"failures_count": 0, "failures": []})
+
+    with override_config(INDEXER_REINDEX_QUEUE_DEBOUNCE=0):
+        drain_reindex_queue(index_records, batch_size=2)
+
+    index_records.assert_called_once_with([record_uuid])
+    assert redis.hgetall(ReindexQueue.attempts_key) == {}
+
+
+@mock.patch("inspirehep.indexer.tasks.drain_reindex_queue")
+def test_process_reindex_queue_does_nothing_without_the_feature_flag(
+    mock_drain_reindex_queue, inspire_app, override_config
+):
+    with override_config(FEATURE_FLAG_ENABLE_REINDEX_QUEUE=False):
+        process_reindex_queue()
+
+    mock_drain_reindex_queue.assert_not_called()
+
+
+@mock.patch("inspirehep.indexer.tasks.batch_index")
+@mock.patch("inspirehep.indexer.tasks.get_references_to_update")
+def test_index_record_queues_references_to_update(
+    mock_get_references_to_update, mock_batch_index, inspire_app, redis, override_config
+):
+    record = create_record("lit")
+    citer_uuid = str(uuid.uuid4())
+    mock_get_references_to_update.return_value = {citer_uuid}
+
+    with override_config(FEATURE_FLAG_ENABLE_REINDEX_QUEUE=True):
+        index_record(record.id)
+
+    mock_batch_index.assert_not_called()
+    assert redis.zscore(ReindexQueue.key, citer_uuid) is not None
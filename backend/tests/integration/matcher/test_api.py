@@ -9,9 +9,11 @@ import pytest
 from helpers.utils import create_record
 from inspire_schemas.api import load_schema, validate
 from inspire_utils.record import get_value
+from invenio_search import current_search_client as es
 from mock import patch
 
 from inspirehep.matcher.api import (
+    get_matched_recids_cache,
     get_reference_from_grobid,
     match_reference,
     match_reference_control_numbers_with_relaxed_journal_titles,
@@ -863,3 +865,68 @@ def test_match_references_doesnt_use_relaxed_title_matching(inspire_app):
     result = match_references(references)
 
     assert expected_ref == result["matched_references"][0]["record"]
+
+
+def _create_records_with_dois(dois):
+    for control_number, doi in enumerate(dois, 1):
+        create_record(
+            "lit",
+            data={
+                "control_number": control_number,
+                "dois": [{"value": doi}],
+                "titles": [{"title": "A cool title"}],
+            },
+        )
+
+
+def test_match_references_sends_queries_of_all_references_together(inspire_app):
+    dois = ["10.1103/PhysRevD.100.100", "10.1103/PhysRevD.100.101"]
+    _create_records_with_dois(dois)
+    references = [
+        {"reference": {"dois": [dois[0]]}},
+        {"reference": {"dois": [dois[1]]}},
+        {"reference": {"dois": [dois[0]]}, "curated_relation": True},
+    ]
+
+    with patch.object(es, "msearch", wraps=es.msearch) as msearch_mock:
+        result = match_references(references)
+
+    assert msearch_mock.call_count == 1
+    assert [
+        get_value(reference, "record.$ref")
+        for reference in result["matched_references"]
+    ] == [
+        "http://localhost:5000/api/literature/1",
+        "http://localhost:5000/api/literature/2",
+        None,
+    ]
+    assert result["added_recids"] == [1, 2]
+
+
+def test_match_references_sends_queries_in_chunks(inspire_app, override_config):
+    dois = ["10.1103/PhysRevD.100.100", "10.1103/PhysRevD.100.101"]
+    _create_records_with_dois(dois)
+    references = [{"reference": {"dois": [doi]}} for doi in dois]
+
+    with override_config(REFERENCE_MATCHER_MSEARCH_SIZE=1), patch.object(
+        es, "msearch", wraps=es.msearch
+    ) as msearch_mock:
+        result = match_references(references)
+
+    assert msearch_mock.call_count == 2
+    assert result["added_recids"] == [1, 2]
+
+
+def test_match_references_uses_cached_matches(inspire_app, override_config):
+    dois = ["10.1103/PhysRevD.100.100"]
+    _create_records_with_dois(dois)
+
+    with override_config(FEATURE_FLAG_ENABLE_REFERENCE_MATCHER_CACHE=True):
+        get_matched_recids_cache().clear()
+        match_references([{"reference": {"dois": dois}}])
+        with patch.object(es, "msearch", wraps=es.msearch) as msearch_mock:
+            result = match_references([{"reference": {"dois": dois}}])
+        get_matched_recids_cache().clear()
+
+    msearch_mock.assert_not_called()
+    assert result["added_recids"] == [1]
@@ -55,6 +55,73 @@ def cleanup():
     )
 
 
+def _write_records_file(path, fixtures):
+    records = []
+    for fixture in fixtures:
+        with open(
+            pkg_resources.resource_filename(__name__, os.path.join("fixtures", fixture))
+        ) as fd:
+            records.append(fd.read())
+    path.write_text("<collection>{}</collection>".format("\n".join(records)))
+    return path.as_posix()
+
+
+@patch("inspirehep.migrator.tasks.MIRROR_BLOCK_SIZE", 1024)
+def test_populate_mirror_from_file_in_parallel(inspire_app, tmp_path):
+    fixtures = ["1663923.xml", "1663924.xml", "1674987.xml", "1674989.xml"]
+    file_name = _write_records_file(tmp_path / "records.xml", fixtures)
+    checkpoint_file = (tmp_path / "checkpoint").as_posix()
+
+    populate_mirror_from_file(file_name, processes=2, checkpoint_file=checkpoint_file)
+
+    recids = [1663923, 1663924, 1674987, 1674989]
+    prod_records = LegacyRecordsMirror.query.filter(
+        LegacyRecordsMirror.recid.in_(recids)
+    ).all()
+    assert sorted(prod_record.recid for prod_record in prod_records) == recids
+    assert all(prod_record.valid is None for prod_record in prod_records)
+    assert b"<record" in prod_records[0].marcxml
+    assert not os.path.exists(checkpoint_file)
+
+
+def test_populate_mirror_from_file_updates_existing_records(inspire_app, tmp_path):
+    file_name = _write_records_file(tmp_path / "records.xml", ["1663924.xml"])
+    populate_mirror_from_file(file_name)
+    prod_record = LegacyRecordsMirror.query.get(1663924)
+    prod_record.valid = True
+    prod_record.marcxml = b"<record></record>"
+    db.session.commit()
+
+    populate_mirror_from_file(file_name)
+
+    db.session.refresh(prod_record)
+    assert prod_record.valid is None
+    assert b"1663924" in prod_record.marcxml
+
+
+@patch("inspirehep.migrator.tasks.MIRROR_BLOCK_SIZE", 1024)
+def test_populate_mirror_from_file_resumes_from_checkpoint(inspire_app, tmp_path):
+    file_name = _write_records_file(
+        tmp_path / "records.xml", ["1663923.xml", "1663924.xml"]
+    )
+    checkpoint_file = (tmp_path / "checkpoint").as_posix()
+
+    with patch(
+        "inspirehep.migrator.tasks.upsert_into_mirror",
+        side_effect=[None, Exception],
+    ), pytest.raises(Exception):
+        populate_mirror_from_file(file_name, checkpoint_file=checkpoint_file)
+    assert os.path.exists(checkpoint_file)
+    LegacyRecordsMirror.query.filter(
+        LegacyRecordsMirror.recid.in_([1663923, 1663924])
+    ).delete(synchronize_session=False)
+
+    populate_mirror_from_file(file_name, checkpoint_file=checkpoint_file)
+
+    assert LegacyRecordsMirror.query.get(1663923) is None
+    assert LegacyRecordsMirror.query.get(1663924) is not None
+
+
 def test_migrate_and_insert_record_valid_record(inspire_app):
     raw_record = (
         b"<record>"
@@ -13,7 +13,8 @@ from helpers.factories.db.invenio_records import TestRecordMetadata
 from lxml import etree
 
 from inspirehep.orcid import cache as cache_module
-from inspirehep.orcid.cache import OrcidCache, _OrcidHasher
+from inspirehep.orcid.cache import OrcidCache, OrcidCacheBatch, _OrcidHasher
+from inspirehep.orcid.converter import OrcidConverter
 
 # The tests are written in a specific order, disable random
 pytestmark = pytest.mark.random_order(disabled=True)
@@ -75,7 +76,33 @@ class TestOrcidCache(object):
         self.cache.write_work_putcode(self.putcode, self.inspire_record)
 
         self.cache.read_work_putcode()
-        assert self.cache._cached_hash_value == self.hash_value
+        assert (
+            self.cache._cached_hash_value
+            == _OrcidHasher(self.inspire_record).compute_projection_hash()
+        )
+
+    def test_has_work_content_changed_no_with_xml_hash(self):
+        self.cache.redis.hmset(
+            self.cache._key, {"putcode": self.putcode, "hash": self.hash_value}
+        )
+
+        cache = OrcidCache(self.orcid, self.recid)
+        assert not cache.has_work_content_changed(self.inspire_record)
+
+        cache.read_work_putcode()
+        assert cache._cached_hash_value.startswith("p1:sha1:")
+
+    def test_has_work_content_changed_yes_with_xml_hash(self):
+        self.cache.redis.hmset(
+            self.cache._key, {"putcode": self.putcode, "hash": self.hash_value}
+        )
+
+        self.inspire_record["titles"][0]["title"] = "mytitle"
+        cache = OrcidCache(self.orcid, self.recid)
+        assert cache.has_work_content_changed(self.inspire_record)
+
+        cache.read_work_putcode()
+        assert cache._cached_hash_value == self.hash_value
 
     def test_write_work_putcode_do_not_recompute(self):
         self.cache.write_work_putcode(self.putcode)
@@ -98,6 +125,79 @@ class TestOrcidCache(object):
         assert not self.cache.read_work_putcode()
 
 
+@pytest.mark.usefixtures("inspire_app")
+class TestOrcidCacheBatch(object):
+    def setup(self):
+        self.recid = "1936475"
+        self.orcids = ["0000-0002-76YY-56XX", "0000-0002-76YY-56XY"]
+        factory = TestRecordMetadata.create_from_file(
+            __name__, "test_orcid_cache_record.json"
+        )
+        self.inspire_record = factory.inspire_record
+        self.batch = OrcidCacheBatch([(orcid, self.recid) for orcid in self.orcids])
+
+    def setup_method(self, method):
+        cache_module.CACHE_PREFIX = get_fqn(method)
+
+    def teardown(self):
+        for cache in self.batch.caches:
+            cache.delete_work_putcode()
+        cache_module.CACHE_PREFIX = None
+
+    def test_read_write_works_putcodes(self):
+        putcodes = {
+            (self.orcids[0], self.recid): "putcode1",
+            (self.orcids[1], self.recid): "putcode2",
+        }
+        self.batch.write_works_putcodes(putcodes)
+
+        assert self.batch.read_works_putcodes() == putcodes
+        assert OrcidCache(self.orcids[1], self.recid).read_work_putcode() == "putcode2"
+
+    def test_read_works_putcodes_non_existent_keys(self):
+        assert self.batch.read_works_putcodes() == {
+            (self.orcids[0], self.recid): None,
+            (self.orcids[1], self.recid): None,
+        }
+
+    def test_write_works_putcodes_empty_putcode(self):
+        with pytest.raises(ValueError):
+            self.batch.write_works_putcodes({(self.orcids[0], self.recid): "putcode"})
+
+    def test_get_works_with_changed_content(self):
+        OrcidCache(self.orcids[0], self.recid).write_work_putcode(
+            "putcode1", self.inspire_record
+        )
+        OrcidCache(self.orcids[1], self.recid).write_work_putcode("putcode2")
+
+        with mock.patch(
+            "inspirehep.orcid.cache.OrcidConverter", wraps=OrcidConverter
+        ) as mock_converter:
+            changed_works = self.batch.get_works_with_changed_content(
+                {self.recid: self.inspire_record}
+            )
+
+        assert changed_works == [(self.orcids[1], self.recid)]
+        mock_converter.assert_called_once()
+
+    def test_get_works_with_changed_content_replaces_xml_hashes(self):
+        xml_hash = _OrcidHasher(self.inspire_record).compute_hash()
+        for cache in self.batch.caches:
+            cache.redis.hmset(cache._key, {"putcode": "putcode", "hash": xml_hash})
+
+        changed_works = self.batch.get_works_with_changed_content(
+            {self.recid: self.inspire_record}
+        )
+
+        assert changed_works == []
+        projection_hash = _OrcidHasher(self.inspire_record).compute_projection_hash()
+        for cache in OrcidCacheBatch(
+            [(orcid, self.recid) for orcid in self.orcids]
+        ).caches:
+            cache.read_work_putcode()
+            assert cache._cached_hash_value == projection_hash
+
+
 @pytest.mark.usefixtures("inspire_app")
 class TestOrcidHasher(object):
     def setup(self):
@@ -128,6 +228,20 @@ class TestOrcidHasher(object):
         hash_value = self.hasher.compute_hash()
         assert hash_value != self.hash_value
 
+    def test_compute_projection_hash_edit_ignored_filed(self):
+        hash_value = self.hasher.compute_projection_hash()
+        self.hasher.inspire_record["abstracts"][0]["value"] = "xxx"
+        assert _OrcidHasher(self.hasher.inspire_record).compute_projection_hash() == (
+            hash_value
+        )
+
+    def test_compute_projection_hash_edit_considered_filed(self):
+        hash_value = self.hasher.compute_projection_hash()
+        self.hasher.inspire_record["titles"][0]["title"] = "xxx"
+        assert _OrcidHasher(self.hasher.inspire_record).compute_projection_hash() != (
+            hash_value
+        )
+
     def test_canonicalize_xml_element(self):
         parser = etree.XMLParser(remove_blank_text=True)
 
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 CERN.
+#
+# inspirehep is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+import mock
+from helpers.utils import create_record
+from requests.exceptions import RequestException
+
+from inspirehep.orcid.api import push_to_orcid
+from inspirehep.orcid.domain_models import OrcidPusher
+from inspirehep.orcid.push_queue import OrcidPushQueue
+from inspirehep.orcid.tasks import orcid_push_author
+
+ORCID = "0000-0003-1134-6827"
+
+
+def test_orcid_push_queue_coalesces_pushes(inspire_app, redis):
+    queue = OrcidPushQueue(ORCID, redis)
+
+    assert queue.push(1, "token", {"record_db_version": 1}) is True
+    assert queue.push(1, "token", {"record_db_version": 2}) is False
+    assert queue.push(2, "token") is False
+    assert len(queue) == 2
+
+    assert queue.pop_all() == {
+        "1": {"oauth_token": "token", "kwargs_to_pusher": {"record_db_version": 2}},
+        "2": {"oauth_token": "token", "kwargs_to_pusher": None},
+    }
+    assert len(queue) == 0
+    assert queue.push(1, "token") is True
+
+
+@mock.patch("inspirehep.orcid.api._send_push_author_task")
+@mock.patch("inspirehep.orcid.api._send_push_task")
+@mock.patch("inspirehep.orcid.api.push_access_tokens")
+def test_push_to_orcid_schedules_one_job_per_orcid(
+    mock_push_access_tokens,
+    mock_send_push_task,
+    mock_send_push_author_task,
+    inspire_app,
+    redis,
+    override_config,
+):
+    mock_push_access_tokens.get_access_tokens.return_value = [(ORCID, "token")]
+    records = [create_record("lit"), create_record("lit")]
+
+    with override_config(
+        FEATURE_FLAG_ENABLE_ORCID_PUSH=True, FEATURE_FLAG_ENABLE_ORCID_PUSH_QUEUE=True
+    ):
+        for record in records:
+            push_to_orcid(record)
+
+    mock_send_push_task.assert_not_called()
+    mock_send_push_author_task.assert_called_once_with(ORCID)
+    assert len(OrcidPushQueue(ORCID, redis)) == 2
+
+
+@mock.patch("inspirehep.orcid.tasks.domain_models.OrcidPusher")
+def test_orcid_push_author_pushes_all_queued_records(
+    mock_pusher, inspire_app, redis, override_config
+):
+    queue = OrcidPushQueue(ORCID, redis)
+    queue.push(1, "token", {"record_db_version": 3})
+    queue.push(2, "token")
+
+    with override_config(FEATURE_FLAG_ENABLE_ORCID_PUSH=True):
+        orcid_push_author(ORCID)
+
+    assert mock_pusher.call_count == 2
+    first_call, second_call = mock_pusher.call_args_list
+    assert first_call[0] == (ORCID, "1", "token")
+    assert first_call[1]["record_db_version"] == 3
+    assert second_call[0] == (ORCID, "2", "token")
+    assert (
+        first_call[1]["cached_author_putcodes"]
+        is second_call[1]["cached_author_putcodes"]
+    )
+    assert len(queue) == 0
+
+
+@mock.patch("inspirehep.orcid.tasks.orcid_push.apply_async")
+@mock.patch("inspirehep.orcid.tasks.domain_models.OrcidPusher")
+def test_orcid_push_author_retries_failed_pushes_separately(
+    mock_pusher, mock_orcid_push, inspire_app, redis, override_config
+):
+    mock_pusher.return_value.push.side_effect = [RequestException(), 123]
+    queue = OrcidPushQueue(ORCID, redis)
+    queue.push(1, "token")
+    queue.push(2, "token")
+
+    with override_config(FEATURE_FLAG_ENABLE_ORCID_PUSH=True):
+        orcid_push_author(ORCID)
+
+    mock_orcid_push.assert_called_once_with(
+        queue="orcid_push",
+        kwargs={
+            "orcid": ORCID,
+            "rec_id": "1",
+            "oauth_token": "token",
+            "kwargs_to_pusher": None,
+        },
+    )
+
+
+@mock.patch("inspirehep.orcid.domain_models.OrcidPutcodeGetter")
+def test_orcid_pushers_share_author_putcodes(mock_putcode_getter, inspire_app, redis):
+    records = [create_record("lit"), create_record("lit")]
+    recids = [str(record["control_number"]) for record in records]
+    mock_putcode_getter.return_value.get_all_inspire_putcodes_and_recids_iter.return_value = [
+        ("100", recids[0]),
+        ("200", recids[1]),
+    ]
+    cached_author_putcodes = {}
+
+    putcodes = [
+        OrcidPusher(
+            ORCID, recid, "token", cached_author_putcodes=cached_author_putcodes
+        )._cache_all_author_putcodes()
+        for recid in recids
+    ]
+
+    assert putcodes == [100, 200]
+    mock_putcode_getter.assert_called_once()
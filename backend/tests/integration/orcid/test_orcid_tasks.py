@@ -23,11 +23,12 @@
 import mock
 import pytest
 from flask import current_app
-from helpers.utils import create_user
+from helpers.utils import create_record, create_user
 from invenio_db import db
 from invenio_oauthclient.errors import AlreadyLinkedError
 from invenio_oauthclient.models import RemoteToken, User, UserIdentity
 
+from inspirehep.orcid.cache import OrcidCache
 from inspirehep.orcid.tasks import (
     RemoteTokenOrcidMismatch,
     _link_user_and_token,
@@ -143,3 +144,33 @@ def test_push_account_literature_to_orcid(
         queue="orcid_push_legacy_tokens",
         kwargs={"orcid": orcid, "rec_id": 1, "oauth_token": token},
     )
+
+
+@mock.patch("inspirehep.orcid.tasks.get_literature_recids_for_orcid")
+@mock.patch("inspirehep.orcid.tasks.orcid_push")
+def test_push_account_literature_to_orcid_skips_unchanged_works(
+    mock_orcid_push, mock_get_literature_recids_for_orcid, inspire_app, redis
+):
+    orcid = "0000-0001-8829-5461"
+    token = "user-orcid-token"
+    unchanged_record = create_record("lit")
+    changed_record = create_record("lit")
+    deleted_record = create_record("lit", data={"deleted": True})
+    records = [unchanged_record, changed_record, deleted_record]
+    recids = [record["control_number"] for record in records]
+    mock_get_literature_recids_for_orcid.return_value = recids
+    for record in records:
+        OrcidCache(orcid, record["control_number"]).write_work_putcode(
+            "putcode", record
+        )
+    data = dict(changed_record)
+    data["titles"] = [{"title": "a new title"}]
+    changed_record.update(data)
+
+    push_account_literature_to_orcid(orcid, token)
+
+    pushed_recids = [
+        call[1]["kwargs"]["rec_id"]
+        for call in mock_orcid_push.apply_async.call_args_list
+    ]
+    assert pushed_recids == recids[1:]
@@ -8,7 +8,8 @@ import pytest
 from invenio_pidstore.models import PersistentIdentifier, PIDStatus
 
 from inspirehep.pidstore.errors import PidRedirectionMissing
-from inspirehep.pidstore.models import InspireRedirect
+from inspirehep.pidstore.models import InspirePidCounter, InspireRedirect
+from inspirehep.pidstore.providers.bai import InspireBAIProvider
 
 
 def test_get_redirected_pid(inspire_app):
@@ -78,3 +79,72 @@ def test_redirect_pid_to_many_pids_overwrites_previous_redirection(inspire_app):
     InspireRedirect.redirect(pid_1, pid_2)
     InspireRedirect.redirect(pid_1, pid_3)
     assert InspireRedirect.get_redirect(pid_1) == pid_3
+
+
+def test_pid_counter_allocates_consecutive_numbers(inspire_app):
+    assert InspirePidCounter.exists("bai", "J.Smith.") is False
+
+    assert InspirePidCounter.allocate("bai", "J.Smith.", 4) == 4
+    assert InspirePidCounter.allocate("bai", "J.Smith.", 4) == 5
+    assert InspirePidCounter.allocate("bai", "K.Janeway.") == 1
+    assert InspirePidCounter.exists("bai", "J.Smith.") is True
+
+
+def test_pid_counter_bump_only_increases_existing_counters(inspire_app):
+    InspirePidCounter.allocate("bai", "J.Smith.", 4)
+
+    InspirePidCounter.bump("bai", "J.Smith.", 2)
+    InspirePidCounter.bump("bai", "K.Janeway.", 7)
+
+    assert InspirePidCounter.allocate("bai", "J.Smith.") == 5
+    InspirePidCounter.bump("bai", "J.Smith.", 9)
+    assert InspirePidCounter.allocate("bai", "J.Smith.") == 10
+    assert InspirePidCounter.exists("bai", "K.Janeway.") is False
+
+
+def test_pid_counter_backfill(inspire_app):
+    for pid_value in ["J.Smith.1", "J.Smith.12", "J.Smith.A.3", "K.Janeway.2"]:
+        PersistentIdentifier.create(
+            pid_type="bai", pid_value=pid_value, status=PIDStatus.REGISTERED
+        )
+    InspirePidCounter.allocate("bai", "K.Janeway.", 5)
+
+    assert InspirePidCounter.backfill("bai") == 3
+
+    assert InspirePidCounter.allocate("bai", "J.Smith.") == 13
+    assert InspirePidCounter.allocate("bai", "J.Smith.A.") == 4
+    assert InspirePidCounter.allocate("bai", "K.Janeway.") == 6
+
+
+def test_next_bai_number_starts_counter_from_pidstore(inspire_app):
+    for pid_value in ["J.Smith.1", "J.Smith.3", "J.Smith.A.7"]:
+        PersistentIdentifier.create(
+            pid_type="bai", pid_value=pid_value, status=PIDStatus.REGISTERED
+        )
+
+    assert InspireBAIProvider.next_bai_number("J.Smith.") == 4
+    assert InspireBAIProvider.next_bai_number("J.Smith.") == 5
+
+
+def test_bai_provided_in_metadata_bumps_counter(inspire_app):
+    InspirePidCounter.allocate("bai", "J.Smith.")
+
+    InspireBAIProvider.create(
+        pid_value="J.Smith.8",
+        object_type="rec",
+        object_uuid="bc0ae708-7876-4f73-808c-c2a5377e8f9b",
+    )
+
+    assert InspireBAIProvider.next_bai_number("J.Smith.") == 9
+
+
+def test_backfill_counters_cli(inspire_app, cli):
+    PersistentIdentifier.create(
+        pid_type="bai", pid_value="J.Smith.3", status=PIDStatus.REGISTERED
+    )
+
+    result = cli.invoke(["inspire_pidstore", "backfill-counters"])
+
+    assert result.exit_code == 0
+    assert "1 bai counters set." in result.output
+    assert InspirePidCounter.allocate("bai", "J.Smith.") == 4
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 CERN.
+#
+# inspirehep is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+import mock
+import orjson
+from helpers.utils import create_record
+
+from inspirehep.records.cache import RenderCache, hash_render_inputs
+from inspirehep.records.marshmallow.literature import LiteratureElasticSearchSchema
+
+
+def test_render_cache_renders_only_on_miss(inspire_app, redis, override_config):
+    record = create_record("lit")
+    render = mock.Mock(return_value="rendered")
+    with override_config(FEATURE_FLAG_ENABLE_RENDER_CACHE=True):
+        assert RenderCache(record).get_or_render("bibtex_display", render) == "rendered"
+        assert RenderCache(record).get_or_render("bibtex_display", render) == "rendered"
+
+    assert render.call_count == 1
+
+
+def test_render_cache_renders_again_when_record_changes(
+    inspire_app, redis, override_config
+):
+    record = create_record("lit")
+    render = mock.Mock(side_effect=["first", "second"])
+    with override_config(FEATURE_FLAG_ENABLE_RENDER_CACHE=True):
+        assert RenderCache(record).get_or_render("bibtex_display", render) == "first"
+        record["titles"] = [{"title": "A new title"}]
+        assert RenderCache(record).get_or_render("bibtex_display", render) == "second"
+
+
+def test_render_cache_renders_again_when_linked_record_changes(
+    inspire_app, redis, override_config
+):
+    conference = create_record("con")
+    data = {
+        "publication_info": [
+            {"conference_record": {"$ref": conference["self"]["$ref"]}}
+        ],
+        "document_type": ["conference paper"],
+    }
+    record = create_record("lit", data=data)
+    render = mock.Mock(side_effect=["first", "second"])
+    with override_config(FEATURE_FLAG_ENABLE_RENDER_CACHE=True):
+        assert RenderCache(record).get_or_render("ui_display", render) == "first"
+        conference["titles"] = [{"title": "A new conference title"}]
+        conference.update(dict(conference))
+        assert RenderCache(record).get_or_render("ui_display", render) == "second"
+
+
+def test_render_cache_keeps_formats_independent(inspire_app, redis, override_config):
+    record = create_record("lit")
+    with override_config(FEATURE_FLAG_ENABLE_RENDER_CACHE=True):
+        RenderCache(record).get_or_render("bibtex_display", lambda: "bibtex")
+        RenderCache(record).get_or_render("cv_format", lambda: "cv")
+        render_cache = RenderCache(record)
+
+        assert render_cache.get_or_render("bibtex_display", mock.Mock()) == "bibtex"
+        assert render_cache.get_or_render("cv_format", mock.Mock()) == "cv"
+
+
+def test_es_schema_with_render_cache_updates_citation_count(
+    inspire_app, redis, override_config
+):
+    cited = create_record("lit")
+    with override_config(FEATURE_FLAG_ENABLE_RENDER_CACHE=True):
+        LiteratureElasticSearchSchema().dump(cited)
+
+        create_record(
+            "lit",
+            data={"references": [{"record": {"$ref": cited["self"]["$ref"]}}]},
+        )
+        with mock.patch(
+            "inspirehep.records.marshmallow.literature.es.LiteratureDetailSchema"
+        ) as detail_schema_mock:
+            result = LiteratureElasticSearchSchema().dump(cited).data
+            detail_schema_mock.assert_not_called()
+
+    ui_display = orjson.loads(result["_ui_display"])
+    assert ui_display["citation_count"] == 1
+    assert "%1 citations counted in INSPIRE as of" in result["_latex_us_display"]
+    assert "%1 citations counted in INSPIRE as of" in result["_latex_eu_display"]
+
+
+def test_es_schema_with_render_cache_matches_es_schema_without_it(
+    inspire_app, redis, override_config
+):
+    record = create_record("lit")
+    expected = LiteratureElasticSearchSchema().dump(record).data
+    with override_config(FEATURE_FLAG_ENABLE_RENDER_CACHE=True):
+        LiteratureElasticSearchSchema().dump(record)
+        result = LiteratureElasticSearchSchema().dump(record).data
+
+    assert orjson.loads(expected.pop("_ui_display")) == orjson.loads(
+        result.pop("_ui_display")
+    )
+    assert expected == result
+
+
+def test_hash_render_inputs_does_not_depend_on_keys_order():
+    assert hash_render_inputs({"a": 1, "b": [1, 2]}) == hash_render_inputs(
+        {"b": [1, 2], "a": 1}
+    )
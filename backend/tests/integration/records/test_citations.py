@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 CERN.
+#
+# inspirehep is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+import orjson
+from helpers.utils import create_record
+from invenio_db import db
+from mock import patch
+from sqlalchemy import text
+
+from inspirehep.records.api import LiteratureRecord
+from inspirehep.records.citations import (
+    _load_staging_citations,
+    rebuild_citations,
+    recompute_citation_counts,
+)
+from inspirehep.records.models import (
+    RecordCitations,
+    RecordCitationsByYear,
+    RecordCitationsCount,
+)
+
+
+def _get_stored_counts(record):
+    counts = RecordCitationsCount.query.filter_by(record_id=record.id).one_or_none()
+    if counts is None:
+        return (0, 0)
+    db.session.refresh(counts)
+    return counts.citation_count, counts.citation_count_without_self_citations
+
+
+def _get_stored_counts_by_year(record):
+    return {
+        row.year: row.count
+        for row in RecordCitationsByYear.query.filter_by(record_id=record.id)
+        if row.count
+    }
+
+
+def _citing_data(*cited_records, **kwargs):
+    data = {
+        "references": [
+            {"record": {"$ref": cited["self"]["$ref"]}} for cited in cited_records
+        ]
+    }
+    data.update(kwargs)
+    return data
+
+
+def test_citation_counts_are_updated_when_citations_change(inspire_app):
+    cited_1 = create_record("lit")
+    cited_2 = create_record("lit")
+    citer = create_record(
+        "lit", data=_citing_data(cited_1, cited_2, preprint_date="2019-05-01")
+    )
+    create_record("lit", data=_citing_data(cited_1, preprint_date="2020-01-01"))
+
+    assert _get_stored_counts(cited_1) == (2, 2)
+    assert _get_stored_counts(cited_2) == (1, 1)
+    assert _get_stored_counts_by_year(cited_1) == {2019: 1, 2020: 1}
+
+    citer = LiteratureRecord.get_record_by_pid_value(citer["control_number"])
+    data = dict(citer)
+    data["references"] = [{"record": {"$ref": cited_2["self"]["$ref"]}}]
+    data["preprint_date"] = "2021-03-01"
+    citer.update(data)
+
+    assert _get_stored_counts(cited_1) == (1, 1)
+    assert _get_stored_counts(cited_2) == (1, 1)
+    assert _get_stored_counts_by_year(cited_1) == {2020: 1}
+    assert _get_stored_counts_by_year(cited_2) == {2021: 1}
+
+
+def test_citation_counts_are_updated_when_self_citations_change(
+    inspire_app, enable_self_citations
+):
+    authors = {
+        "authors": [
+            {
+                "full_name": "John Doe",
+                "ids": [{"schema": "INSPIRE BAI", "value": "J.Doe.1"}],
+            }
+        ]
+    }
+    cited = create_record("lit", data=authors)
+    create_record("lit", data=_citing_data(cited, **authors))
+    create_record("lit", data=_citing_data(cited))
+
+    assert _get_stored_counts(cited) == (2, 1)
+
+
+def test_citation_counts_are_removed_when_citer_is_hard_deleted(inspire_app):
+    cited = create_record("lit")
+    citer = create_record("lit", data=_citing_data(cited))
+
+    citer.hard_delete()
+
+    assert _get_stored_counts(cited) == (0, 0)
+
+
+def test_citation_count_read_from_counts_table(inspire_app, override_config):
+    cited = create_record("lit")
+    create_record("lit", data=_citing_data(cited, preprint_date="2019-05-01"))
+    create_record("lit", data=_citing_data(cited, preprint_date="2019-10-01"))
+    cited = LiteratureRecord.get_record_by_pid_value(cited["control_number"])
+
+    with override_config(
+        FEATURE_FLAG_ENABLE_CITATION_COUNTS_TABLE=True,
+        FEATURE_FLAG_ENABLE_SELF_CITATIONS=True,
+    ):
+        assert cited.citation_count == 2
+        assert cited.citation_count_without_self_citations == 2
+        assert cited.citations_by_year == [{"year": 2019, "count": 2}]
+
+
+def test_recompute_citation_counts(inspire_app, cli):
+    cited = create_record("lit")
+    create_record("lit", data=_citing_data(cited, preprint_date="2019-05-01"))
+    RecordCitationsCount.query.delete()
+    RecordCitationsByYear.query.delete()
+    uncited = create_record("lit")
+    db.session.add(RecordCitationsCount(record_id=uncited.id, citation_count=3))
+
+    result = cli.invoke(["citations", "recompute-counts"])
+
+    assert result.exit_code == 0
+    assert _get_stored_counts(cited) == (1, 1)
+    assert _get_stored_counts(uncited) == (0, 0)
+    assert _get_stored_counts_by_year(cited) == {2019: 1}
+
+
+def test_recompute_citation_counts_returns_number_of_cited_records(inspire_app):
+    cited_1 = create_record("lit")
+    cited_2 = create_record("lit")
+    create_record("lit", data=_citing_data(cited_1, cited_2))
+
+    assert recompute_citation_counts() == 2
+
+
+def _get_citations():
+    return {
+        (row.citer_id, row.cited_id, row.citation_date, row.is_self_citation)
+        for row in db.session.execute(
+            text("SELECT * FROM records_citations")
+        ).fetchall()
+    }
+
+
+def test_rebuild_citations(inspire_app, enable_self_citations):
+    authors = {
+        "authors": [
+            {
+                "full_name": "John Doe",
+                "ids": [{"schema": "INSPIRE BAI", "value": "J.Doe.1"}],
+            }
+        ]
+    }
+    cited = create_record("lit", data=authors)
+    citer = create_record(
+        "lit", data=_citing_data(cited, preprint_date="2019-05-01", **authors)
+    )
+    create_record("lit", data=_citing_data(cited, citer, preprint_date="2020-01-01"))
+    create_record("lit", data=_citing_data(cited, deleted=True))
+    expected_citations = _get_citations()
+
+    RecordCitations.query.filter_by(citer_id=citer.id).delete()
+    report = rebuild_citations()
+
+    assert _get_citations() == expected_citations
+    assert report["old_citations"] == 2
+    assert report["new_citations"] == 3
+    assert report["added"] == 1
+    assert report["removed"] == 0
+    assert report["most_changed_records"] == [
+        {
+            "control_number": str(cited["control_number"]),
+            "old_citation_count": 1,
+            "new_citation_count": 2,
+        }
+    ]
+    assert _get_stored_counts(cited) == (2, 1)
+
+
+def test_rebuild_citations_keeps_constraints_and_indexes(inspire_app):
+    def get_indexes():
+        return {
+            row.indexname
+            for row in db.session.execute(
+                text(
+                    "SELECT indexname FROM pg_indexes "
+                    "WHERE tablename = 'records_citations'"
+                )
+            )
+        }
+
+    expected_indexes = get_indexes()
+
+    rebuild_citations()
+
+    assert get_indexes() == expected_indexes
+
+
+def test_rebuild_citations_blocks_citations_writes_during_the_build(inspire_app):
+    locks_during_build = []
+
+    def load_staging_citations(batch_size):
+        locks_during_build.extend(
+            row.mode
+            for row in db.session.execute(
+                text(
+                    "SELECT mode FROM pg_locks WHERE pid = pg_backend_pid() "
+                    "AND relation = CAST('records_citations' AS regclass)"
+                )
+            )
+        )
+        _load_staging_citations(batch_size)
+
+    with patch(
+        "inspirehep.records.citations._load_staging_citations",
+        side_effect=load_staging_citations,
+    ):
+        rebuild_citations()
+
+    assert "ShareLock" in locks_during_build
+
+
+def test_rebuild_citations_dry_run(inspire_app, cli):
+    cited = create_record("lit")
+    citer = create_record("lit", data=_citing_data(cited))
+    RecordCitations.query.filter_by(citer_id=citer.id).delete()
+
+    result = cli.invoke(["citations", "rebuild", "--dry-run"])
+
+    assert result.exit_code == 0
+    assert orjson.loads(result.output)["added"] == 1
+    assert _get_citations() == set()
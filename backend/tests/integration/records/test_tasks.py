@@ -7,12 +7,15 @@
 
 from helpers.providers.faker import faker
 from helpers.utils import create_record
+from mock import patch
 
 from inspirehep.records.models import (
     ConferenceLiterature,
     ExperimentLiterature,
     InstitutionLiterature,
     RecordCitations,
+    RecordCitationsCount,
+    RecordsAuthors,
 )
 from inspirehep.records.tasks import update_records_relations
 
@@ -134,3 +137,108 @@ def test_update_records_relations_updated_experiment_literature_relations(inspir
     ).one()
 
     assert experiment_literature_relation.literature_uuid == record.id
+
+
+def _get_relations():
+    return {
+        "authors": {
+            (row.author_id, row.id_type, row.record_id)
+            for row in RecordsAuthors.query.all()
+        },
+        "citations": {
+            (row.citer_id, row.cited_id, row.citation_date, row.is_self_citation)
+            for row in RecordCitations.query.all()
+        },
+        "citation_counts": {
+            (
+                row.record_id,
+                row.citation_count,
+                row.citation_count_without_self_citations,
+            )
+            for row in RecordCitationsCount.query.all()
+        },
+        "conferences": {
+            (row.conference_uuid, row.literature_uuid, row.relationship_type)
+            for row in ConferenceLiterature.query.all()
+        },
+        "institutions": {
+            (row.institution_uuid, row.literature_uuid)
+            for row in InstitutionLiterature.query.all()
+        },
+        "experiments": {
+            (row.experiment_uuid, row.literature_uuid)
+            for row in ExperimentLiterature.query.all()
+        },
+    }
+
+
+def test_update_records_relations_in_batch_matches_record_by_record(
+    inspire_app, enable_self_citations
+):
+    conference = create_record("con")
+    institution = create_record("ins")
+    experiment = create_record("exp")
+    deleted_experiment = create_record("exp", data={"deleted": True})
+    authors = [
+        {
+            "full_name": "John Doe",
+            "ids": [{"schema": "INSPIRE BAI", "value": "J.Doe.1"}],
+            "affiliations": [
+                {"value": "CERN", "record": {"$ref": institution["self"]["$ref"]}}
+            ],
+        }
+    ]
+    cited = create_record(
+        "lit",
+        data={
+            "authors": authors,
+            "document_type": ["conference paper"],
+            "publication_info": [
+                {"conference_record": {"$ref": conference["self"]["$ref"]}}
+            ],
+        },
+    )
+    citer = create_record(
+        "lit",
+        data={
+            "authors": authors,
+            "collaborations": [{"value": "ATLAS"}],
+            "accelerator_experiments": [
+                {"record": {"$ref": experiment["self"]["$ref"]}},
+                {"record": {"$ref": deleted_experiment["self"]["$ref"]}},
+            ],
+            "references": [
+                {"record": {"$ref": cited["self"]["$ref"]}},
+                {"record": {"$ref": cited["self"]["$ref"]}},
+            ],
+            "preprint_date": "2019-05-01",
+        },
+    )
+    other_citer = create_record(
+        "lit", data={"references": [{"record": {"$ref": cited["self"]["$ref"]}}]}
+    )
+    expected_relations = _get_relations()
+
+    RecordsAuthors.query.delete()
+    ConferenceLiterature.query.delete()
+    InstitutionLiterature.query.delete()
+    ExperimentLiterature.query.delete()
+    update_records_relations([cited.id, citer.id, other_citer.id, conference.id])
+
+    assert _get_relations() == expected_relations
+
+
+@patch("inspirehep.records.tasks.RecordsRelationsBatch.update", side_effect=KeyError)
+def test_update_records_relations_falls_back_to_record_by_record(
+    mock_update, inspire_app
+):
+    cited = create_record("lit")
+    citer = create_record(
+        "lit", data={"references": [{"record": {"$ref": cited["self"]["$ref"]}}]}
+    )
+    RecordCitations.query.delete()
+
+    result = update_records_relations([cited.id, citer.id])
+
+    assert result == [cited.id, citer.id]
+    assert RecordCitations.query.filter_by(cited_id=cited.id).count() == 1
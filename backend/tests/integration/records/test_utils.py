@@ -5,13 +5,19 @@
 # inspirehep is free software; you can redistribute it and/or modify it under
 # the terms of the MIT License; see LICENSE file for more details.
 
+import hashlib
+
 import pytest
 import requests_mock
 from helpers.utils import create_record
 
 from inspirehep.records.errors import DownloadFileError
 from inspirehep.records.marshmallow.literature.utils import get_parent_record
-from inspirehep.records.utils import download_file_from_url, get_pid_for_pid
+from inspirehep.records.utils import (
+    download_file_from_url,
+    download_file_to_temporary_file,
+    get_pid_for_pid,
+)
 
 
 def test_download_file_from_url_with_relative_url(inspire_app):
@@ -51,6 +57,37 @@ def test_download_file_from_url_fails(inspire_app):
             download_file_from_url(url)
 
 
+def test_download_file_to_temporary_file(inspire_app, override_config):
+    url = "https://inspirehep.net/record/1759380/files/document.pdf"
+    expected_content = b"%PDF-1.4\n" + b"This is the file data\n" * 100
+    with requests_mock.Mocker() as mocker, override_config(
+        FILES_DOWNLOAD_CHUNK_SIZE=64, FILES_SPOOL_MAX_MEMORY_SIZE=128
+    ):
+        mocker.get(url, status_code=200, content=expected_content)
+        with download_file_to_temporary_file(url) as (file_data, key, mimetype):
+            assert file_data.read() == expected_content
+            assert key == hashlib.md5(expected_content).hexdigest()
+            assert mimetype == "application/pdf"
+
+
+def test_download_file_to_temporary_file_fails_for_empty_file(inspire_app):
+    url = "https://inspirehep.net/record/1759380/files/empty.pdf"
+    with requests_mock.Mocker() as mocker:
+        mocker.get(url, status_code=200, content=b"")
+        with pytest.raises(ValueError):
+            with download_file_to_temporary_file(url):
+                pass
+
+
+def test_download_file_to_temporary_file_fails(inspire_app):
+    url = "https://inspirehep.net/record/1759380/files/channelxi3.png"
+    with requests_mock.Mocker() as mocker:
+        mocker.get(url, status_code=404)
+        with pytest.raises(DownloadFileError):
+            with download_file_to_temporary_file(url):
+                pass
+
+
 def test_get_pids_for_one_pid(inspire_app):
     data = {"opening_date": "2020-12-11"}
     rec = create_record("con", data)
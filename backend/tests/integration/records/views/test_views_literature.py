@@ -8,6 +8,7 @@
 from urllib.parse import urlencode
 
 import orjson
+import pytest
 from helpers.providers.faker import faker
 from helpers.utils import (
     create_record,
@@ -22,6 +23,8 @@ from invenio_search import current_search
 from inspirehep.accounts.roles import Roles
 from inspirehep.records.api import LiteratureRecord
 from inspirehep.records.errors import MaxResultWindowRESTError
+from inspirehep.records.export import ExportSlots
+from inspirehep.search.api import LiteratureSearch
 
 
 def test_literature_search_application_json_get(inspire_app):
@@ -629,7 +632,10 @@ def test_literature_citation_annual_summary(inspire_app):
     assert response.json["aggregations"]["citations_by_year"] == expected_response
 
 
-def test_literature_citation_annual_summary_for_many_records(inspire_app):
+@pytest.mark.parametrize("nested_citations_by_year", [False, True])
+def test_literature_citation_annual_summary_for_many_records(
+    inspire_app, override_config, nested_citations_by_year
+):
     literature1 = create_record("lit", faker.record("lit"))
     create_record(
         "lit",
@@ -670,7 +676,9 @@ def test_literature_citation_annual_summary_for_many_records(inspire_app):
 
     current_search.flush_and_refresh("records-hep")
 
-    with inspire_app.test_client() as client:
+    with override_config(
+        FEATURE_FLAG_ENABLE_NESTED_CITATIONS_BY_YEAR=nested_citations_by_year
+    ), inspire_app.test_client() as client:
         response = client.get(f"/literature/facets/?{urlencode(request_param)}")
 
     expected_response = {"value": {"2013": 2, "2012": 1, "2010": 1}}
@@ -899,3 +907,113 @@ def test_restricted_file_attach(inspire_app, override_config):
 
     assert expected_status_code == response.status_code
     assert expected_message == response.json["message"]
+
+
+def test_literature_export_streams_all_results(inspire_app, redis, override_config):
+    # the same earliest date, so they are exported by control number
+    records = [
+        create_record("lit", data={"preprint_date": "2020-01-01"}) for _ in range(3)
+    ]
+
+    with override_config(
+        LITERATURE_EXPORT_PAGE_SIZE=2, LITERATURE_EXPORT_MAX_CONCURRENT=1
+    ), inspire_app.test_client() as client:
+        response = client.get("/literature/export?format=bibtex")
+        data = response.get_data(as_text=True)
+        # releases the export slot
+        response.close()
+        second_response = client.get("/literature/export?format=bibtex")
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-bibtex"
+    assert data == "\n".join(
+        LiteratureSearch.get_record_data_from_es(record)["_bibtex_display"]
+        for record in sorted(records, key=lambda record: record["control_number"])
+    )
+    assert second_response.status_code == 200
+
+
+def test_literature_export_json(inspire_app, redis, override_config):
+    records = [create_record("lit") for _ in range(3)]
+
+    with override_config(
+        LITERATURE_EXPORT_PAGE_SIZE=2
+    ), inspire_app.test_client() as client:
+        response = client.get("/literature/export?format=json&sort=mostrecent")
+
+    assert response.status_code == 200
+    exported_records = orjson.loads(response.data)
+    assert sorted(
+        exported_record["metadata"]["control_number"]
+        for exported_record in exported_records
+    ) == sorted(record["control_number"] for record in records)
+    assert "_bibtex_display" not in exported_records[0]["metadata"]
+
+
+def test_literature_export_with_query(inspire_app, redis):
+    create_record("lit", data={"titles": [{"title": "Exported"}]})
+    create_record("lit", data={"titles": [{"title": "Other"}]})
+
+    with inspire_app.test_client() as client:
+        response = client.get("/literature/export?format=json&q=t exported")
+
+    exported_records = orjson.loads(response.data)
+    assert len(exported_records) == 1
+    assert exported_records[0]["metadata"]["titles"] == [{"title": "Exported"}]
+
+
+def test_literature_export_is_limited_per_client(inspire_app, redis, override_config):
+    create_record("lit")
+
+    with override_config(
+        LITERATURE_EXPORT_MAX_CONCURRENT=1
+    ), inspire_app.test_client() as client:
+        ExportSlots("ip:127.0.0.1", redis).acquire()
+        response = client.get("/literature/export?format=bibtex")
+
+    assert response.status_code == 429
+
+
+def test_literature_export_ignores_source_of_accept_header(inspire_app, redis):
+    create_record("lit", data={"titles": [{"title": "Exported"}]})
+
+    with inspire_app.test_client() as client:
+        response = client.get(
+            "/literature/export?format=json",
+            headers={"Accept": "application/vnd+inspire.record.ui+json"},
+        )
+
+    exported_records = orjson.loads(response.data)
+    assert exported_records[0]["metadata"]["titles"] == [{"title": "Exported"}]
+
+
+def test_literature_export_slots_are_not_released_below_zero(
+    inspire_app, redis, override_config
+):
+    with override_config(LITERATURE_EXPORT_MAX_CONCURRENT=1):
+        slots = ExportSlots("ip:127.0.0.1", redis)
+        slots.release()
+
+        assert slots.acquire()
+        assert not slots.acquire()
+
+
+def test_literature_export_slots_expire_after_the_first_slot_taken(
+    inspire_app, redis, override_config
+):
+    with override_config(
+        LITERATURE_EXPORT_MAX_CONCURRENT=2, LITERATURE_EXPORT_SLOT_TTL=600
+    ):
+        slots = ExportSlots("ip:127.0.0.1", redis)
+        slots.acquire()
+        redis.expire(slots.key, 10)
+        slots.acquire()
+
+    assert 0 < redis.ttl(slots.key) <= 10
+
+
+def test_literature_export_with_unknown_format(inspire_app):
+    with inspire_app.test_client() as client:
+        response = client.get("/literature/export?format=marcxml")
+
+    assert response.status_code == 400
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 CERN.
+#
+# inspirehep is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+import orjson
+from flask import current_app
+from helpers.providers.faker import faker
+from helpers.utils import create_record, get_index_alias
+from invenio_search import current_search_client as es
+from mock import patch
+
+from inspirehep.indexer.tasks import index_record, invalidate_search_cache_after_refresh
+from inspirehep.records.api import InspireRecord
+from inspirehep.search.cache import ParsedQueriesCache, invalidate_search_cache
+
+
+def test_search_cache_reuses_facets_response(inspire_app, redis, override_config):
+    create_record("lit", data={"citation_count": 3, "citeable": True})
+    url = "/literature/facets?facet_name=citation-summary"
+
+    with override_config(FEATURE_FLAG_ENABLE_SEARCH_CACHE=True), patch.object(
+        es, "search", wraps=es.search
+    ) as mock_search, inspire_app.test_client() as client:
+        response = client.get(url)
+        cached_response = client.get(url)
+
+    assert mock_search.call_count == 1
+    assert orjson.loads(cached_response.data) == orjson.loads(response.data)
+
+
+def test_search_cache_is_keyed_on_the_search(inspire_app, redis, override_config):
+    with override_config(FEATURE_FLAG_ENABLE_SEARCH_CACHE=True), patch.object(
+        es, "search", wraps=es.search
+    ) as mock_search, inspire_app.test_client() as client:
+        client.get("/literature?q=title foo")
+        client.get("/literature?q=title bar")
+        client.get("/literature?q=title foo&page=2")
+
+    assert mock_search.call_count == 3
+
+
+def test_search_cache_is_invalidated_on_indexing(inspire_app, redis, override_config):
+    url = "/literature/facets?facet_name=citation-summary"
+
+    with override_config(FEATURE_FLAG_ENABLE_SEARCH_CACHE=True), patch.object(
+        es, "search", wraps=es.search
+    ) as mock_search, inspire_app.test_client() as client:
+        client.get(url)
+        invalidate_search_cache()
+        client.get(url)
+
+    assert mock_search.call_count == 2
+
+
+@patch("inspirehep.indexer.tasks.invalidate_search_cache_after_refresh.apply_async")
+def test_search_cache_is_invalidated_after_the_refresh_of_indexed_records(
+    mock_invalidate_after_refresh, inspire_app, redis, override_config
+):
+    index = get_index_alias(current_app.config["PID_TYPE_TO_INDEX"]["lit"])
+    es.indices.put_settings(index=index, body={"index": {"refresh_interval": "-1"}})
+    try:
+        with override_config(
+            FEATURE_FLAG_ENABLE_SEARCH_CACHE=True, SEARCH_CACHE_INVALIDATION_DELAY=5
+        ), inspire_app.test_client() as client:
+            record = InspireRecord.create(faker.record("lit"))
+            index_record(record.id)
+            response_before_refresh = client.get("/literature").json
+            es.indices.refresh(index=index)
+            invalidate_search_cache_after_refresh()
+            response = client.get("/literature").json
+    finally:
+        es.indices.put_settings(index=index, body={"index": {"refresh_interval": None}})
+
+    mock_invalidate_after_refresh.assert_called_once_with(countdown=5)
+    assert response_before_refresh["hits"]["total"] == 0
+    assert response["hits"]["total"] == 1
+
+
+def test_search_cache_is_disabled_for_endpoints_without_ttl(
+    inspire_app, redis, override_config
+):
+    with override_config(
+        FEATURE_FLAG_ENABLE_SEARCH_CACHE=True, SEARCH_CACHE_TTL_BY_ENDPOINT={}
+    ), patch.object(
+        es, "search", wraps=es.search
+    ) as mock_search, inspire_app.test_client() as client:
+        client.get("/literature")
+        client.get("/literature")
+
+    assert mock_search.call_count == 2
+
+
+@patch(
+    "inspirehep.search.cache.inspire_query_parser.parse_query",
+    return_value={"match": {"title": "foo"}},
+)
+def test_parsed_queries_cache_parses_a_query_once(mock_parse_query, inspire_app):
+    cache = ParsedQueriesCache(10)
+
+    query = cache.parse_query("t foo")
+    query["match"]["title"] = "bar"
+    cached_query = cache.parse_query("t foo")
+
+    mock_parse_query.assert_called_once_with("t foo")
+    assert cached_query == {"match": {"title": "foo"}}
+
+
+@patch(
+    "inspirehep.search.cache.inspire_query_parser.parse_query",
+    return_value={"match_all": {}},
+)
+def test_parsed_queries_cache_evicts_least_recently_used(mock_parse_query, inspire_app):
+    cache = ParsedQueriesCache(2)
+
+    cache.parse_query("a")
+    cache.parse_query("b")
+    cache.parse_query("a")
+    cache.parse_query("c")
+    cache.parse_query("a")
+    cache.parse_query("b")
+
+    assert [call[0][0] for call in mock_parse_query.call_args_list] == [
+        "a",
+        "b",
+        "c",
+        "b",
+    ]
+
+
+@patch(
+    "inspirehep.search.cache.inspire_query_parser.parse_query",
+    return_value={"match_all": {}},
+)
+def test_parsed_queries_cache_shares_queries_in_redis(
+    mock_parse_query, inspire_app, redis
+):
+    ParsedQueriesCache(10, redis_ttl=60).parse_query("a")
+    query = ParsedQueriesCache(10, redis_ttl=60).parse_query("a")
+
+    mock_parse_query.assert_called_once_with("a")
+    assert query == {"match_all": {}}
+
+
+def test_parsed_queries_cache_key_depends_on_the_day(inspire_app):
+    with patch("inspirehep.search.cache.date") as mock_date:
+        mock_date.today.return_value.isoformat.return_value = "2021-01-01"
+        key = ParsedQueriesCache.get_key("de today")
+        mock_date.today.return_value.isoformat.return_value = "2021-01-02"
+        next_day_key = ParsedQueriesCache.get_key("de today")
+
+    assert key != next_day_key
+
+
+@patch(
+    "inspirehep.search.factories.query.inspire_query_parser.parse_query",
+    return_value={"match_all": {}},
+)
+def test_inspire_query_factory_uses_parsed_queries_cache(
+    mock_parse_query, inspire_app, override_config
+):
+    with override_config(
+        FEATURE_FLAG_ENABLE_PARSED_QUERY_CACHE=True,
+        SEARCH_PARSED_QUERY_CACHE_SIZE=10,
+    ), patch("inspirehep.search.cache._parsed_queries_cache", None):
+        with inspire_app.test_client() as client:
+            client.get("/api/literature?q=parsed+once")
+            client.get("/api/literature?q=parsed+once")
+
+    mock_parse_query.assert_called_once_with("parsed once")
@@ -11,8 +11,10 @@ from flask import render_template
 from helpers.utils import create_record, es_search
 from inspire_utils.record import get_value
 from lxml import etree
+from mock import patch
 
 from inspirehep.files import current_s3_instance
+from inspirehep.sitemap.utils import read_sitemap_manifest, write_sitemap_page_content
 from inspirehep.utils import get_inspirehep_url
 
 
@@ -129,3 +131,88 @@ def test_generate_sitemap_file(inspire_app, s3, cli, override_config):
     obj.seek(0)
 
     assert page_content == obj.read().decode("utf8")
+
+
+def test_generate_sitemap_incremental_writes_only_changed_pages(
+    inspire_app, s3, cli, override_config
+):
+    current_s3_instance.client.create_bucket(
+        Bucket=inspire_app.config["S3_SITEMAP_BUCKET"]
+    )
+    create_record("lit")
+    create_record("aut")
+
+    with override_config(SITEMAP_PAGE_SIZE=1):
+        result = cli.invoke(["sitemap", "generate"])
+        assert result.exit_code == 0
+
+        with patch(
+            "inspirehep.sitemap.tasks.write_sitemap_page_content",
+            wraps=write_sitemap_page_content,
+        ) as mock_write:
+            result = cli.invoke(["sitemap", "generate", "--incremental"])
+        assert result.exit_code == 0
+        assert [call[0][0] for call in mock_write.call_args_list] == [""]
+
+        create_record("lit")
+        with patch(
+            "inspirehep.sitemap.tasks.write_sitemap_page_content",
+            wraps=write_sitemap_page_content,
+        ) as mock_write:
+            result = cli.invoke(["sitemap", "generate", "--incremental"])
+        assert result.exit_code == 0
+        assert [call[0][0] for call in mock_write.call_args_list] == [3, ""]
+
+    pages = read_sitemap_manifest()
+    assert [(page["page"], page["collection"], page["count"]) for page in pages] == [
+        (1, "literature", 1),
+        (2, "authors", 1),
+        (3, "literature", 1),
+    ]
+
+
+def test_generate_sitemap_incremental_fills_last_page_of_collection(
+    inspire_app, s3, cli, override_config
+):
+    current_s3_instance.client.create_bucket(
+        Bucket=inspire_app.config["S3_SITEMAP_BUCKET"]
+    )
+    literature = create_record("lit")
+
+    with override_config(SITEMAP_PAGE_SIZE=2):
+        cli.invoke(["sitemap", "generate"])
+        new_literature = create_record("lit")
+        result = cli.invoke(["sitemap", "generate", "--incremental"])
+    assert result.exit_code == 0
+
+    obj = BytesIO()
+    current_s3_instance.client.download_fileobj("sitemap", "sitemap1.xml", obj)
+    page_content = obj.getvalue().decode("utf8")
+    assert f"/literature/{literature['control_number']}<" in page_content
+    assert f"/literature/{new_literature['control_number']}<" in page_content
+
+
+def test_generate_sitemap_incremental_resumes_unfinished_pages(
+    inspire_app, s3, cli, override_config
+):
+    current_s3_instance.client.create_bucket(
+        Bucket=inspire_app.config["S3_SITEMAP_BUCKET"]
+    )
+    create_record("lit")
+    create_record("lit")
+
+    with override_config(SITEMAP_PAGE_SIZE=1, SITEMAP_WORKERS=1):
+        with patch(
+            "inspirehep.sitemap.tasks.write_sitemap_page_content",
+            side_effect=[None, Exception],
+        ):
+            cli.invoke(["sitemap", "generate"])
+
+        with patch(
+            "inspirehep.sitemap.tasks.write_sitemap_page_content",
+            wraps=write_sitemap_page_content,
+        ) as mock_write:
+            result = cli.invoke(["sitemap", "generate", "--incremental"])
+    assert result.exit_code == 0
+    assert len(mock_write.call_args_list) == 2
+    assert mock_write.call_args_list[-1][0][0] == ""
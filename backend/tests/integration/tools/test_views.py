@@ -8,10 +8,12 @@
 import pytest
 from freezegun import freeze_time
 from helpers.utils import create_record
+from invenio_search import current_search_client as es
+from mock import patch
 from werkzeug.datastructures import FileStorage
 
 from inspirehep.files import current_s3_instance
-from inspirehep.tools.utils import find_references
+from inspirehep.tools.utils import find_references, get_references
 
 
 @pytest.fixture(scope="function")
@@ -161,3 +163,37 @@ def test_find_references(literature_records):
     assert references == expected_references_latex_us
 
     assert errors == expected_errors
+
+
+def test_find_references_searches_references_in_batches(
+    literature_records, override_config
+):
+    reference_names = [
+        ("1979PhLB...80..360E", 1),
+        ("Beacom:2004yd", 1),
+        ("hep-th/0501240", 3),
+        ("CERN-W5013", 6),
+        ("Garcia:2020ay", 8),
+    ]
+
+    with override_config(BIBLIOGRAPHY_GENERATOR_MSEARCH_SIZE=2), patch.object(
+        es, "msearch", wraps=es.msearch
+    ) as mock_msearch:
+        references, errors = find_references(reference_names, "bibtex")
+
+    assert mock_msearch.call_count == 3
+    assert len(references) == 3
+    assert errors == [
+        {"ref": "CERN-W5013", "line": 6, "type": "ambiguous"},
+        {"ref": "Garcia:2020ay", "line": 8, "type": "not found"},
+    ]
+
+
+def test_get_references_removes_duplicates():
+    latex = [
+        "\\cite{Beacom:2004yd,hep-th/0501240}\n",
+        "% \\cite{Ellis:1978xg}\n",
+        "\\cite{ hep-th/0501240, Beacom:2004yd, #1}\n",
+    ]
+
+    assert get_references(latex) == [("Beacom:2004yd", 1), ("hep-th/0501240", 1)]
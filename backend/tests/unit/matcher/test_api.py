@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 CERN.
+#
+# inspirehep is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+from mock import patch
+
+from inspirehep.matcher.api import MatchedRecidsCache
+
+
+def test_matched_recids_cache_evicts_least_recently_used():
+    cache = MatchedRecidsCache(max_size=2, ttl=60)
+    cache.set("a", [1])
+    cache.set("b", [2])
+    cache.get("a")
+    cache.set("c", [3])
+
+    assert cache.get("a") == [1]
+    assert cache.get("b") is None
+    assert cache.get("c") == [3]
+
+
+@patch("inspirehep.matcher.api.time.monotonic")
+def test_matched_recids_cache_expires_entries(mock_monotonic):
+    cache = MatchedRecidsCache(max_size=2, ttl=60)
+    mock_monotonic.return_value = 100
+    cache.set("a", [])
+
+    mock_monotonic.return_value = 159
+    assert cache.get("a") == []
+    mock_monotonic.return_value = 161
+    assert cache.get("a") is None
@@ -6,25 +6,36 @@
 # the terms of the MIT License; see LICENSE file for more details.
 
 import os
+from io import BytesIO
 
 import pkg_resources
 
-from inspirehep.migrator.tasks import read_file, wait_for_all_tasks
+from inspirehep.migrator.tasks import (
+    read_file_record_blocks,
+    read_record_blocks,
+    split_blob,
+    wait_for_all_tasks,
+)
 
 
-def test_read_file_reads_xml_file_correctly():
+def _read_file_records(source):
+    blob = b"".join(block for block, _ in read_file_record_blocks(source))
+    return list(split_blob(blob.decode("utf8")))
+
+
+def test_read_file_record_blocks_reads_xml_file_correctly():
     xml_file = pkg_resources.resource_filename(
         __name__, os.path.join("fixtures", "1663924.xml")
     )
 
-    with open(xml_file, "rb") as f:
-        expected = f.readlines()
-    result = list(read_file(xml_file))
+    with open(xml_file) as f:
+        expected = list(split_blob(f.read()))
+    result = _read_file_records(xml_file)
 
     assert expected == result
 
 
-def test_read_file_reads_gzipped_file_correctly():
+def test_read_file_record_blocks_reads_gzipped_file_correctly():
     xml_file = pkg_resources.resource_filename(
         __name__, os.path.join("fixtures", "1663924.xml")
     )
@@ -32,14 +43,14 @@ def test_read_file_reads_gzipped_file_correctly():
         __name__, os.path.join("fixtures", "1663924.xml.gz")
     )
 
-    with open(xml_file, "rb") as f:
-        expected = f.readlines()
-    result = list(read_file(gzipped_file))
+    with open(xml_file) as f:
+        expected = list(split_blob(f.read()))
+    result = _read_file_records(gzipped_file)
 
     assert expected == result
 
 
-def test_read_file_reads_prodsync_file_correctly():
+def test_read_file_record_blocks_reads_prodsync_file_correctly():
     xml_files = [
         pkg_resources.resource_filename(
             __name__, os.path.join("fixtures", "1663923.xml")
@@ -55,9 +66,9 @@ def test_read_file_reads_prodsync_file_correctly():
 
     expected = []
     for xml_file in xml_files:
-        with open(xml_file, "rb") as f:
-            expected.extend(f.readlines())
-    result = list(read_file(prodsync_file))
+        with open(xml_file) as f:
+            expected.extend(split_blob(f.read()))
+    result = _read_file_records(prodsync_file)
 
     assert expected == result
 
@@ -65,3 +76,37 @@ def test_read_file_reads_prodsync_file_correctly():
 def test_migrator_wait_for_task_when_receives_none_do_not_throw_exception():
     result = wait_for_all_tasks(None)
     assert result is None
+
+
+def test_read_record_blocks_splits_after_complete_records():
+    stream = BytesIO(b"<collection><record>1</record><record>2</record></collection>")
+
+    result = list(read_record_blocks(stream, block_size=30))
+
+    assert result == [
+        (b"<collection><record>1</record>", 30),
+        (b"<record>2</record>", 48),
+    ]
+
+
+def test_read_record_blocks_starts_from_offset():
+    stream = BytesIO(b"<collection><record>1</record><record>2</record></collection>")
+
+    result = list(read_record_blocks(stream, offset=30))
+
+    assert result == [(b"<record>2</record>", 48)]
+
+
+def test_read_file_record_blocks_resumes_prodsync_file_from_checkpoint():
+    prodsync_file = pkg_resources.resource_filename(
+        __name__, os.path.join("fixtures", "micro-prodsync.tar")
+    )
+    blocks = list(read_file_record_blocks(prodsync_file))
+
+    result = list(read_file_record_blocks(prodsync_file, checkpoint=blocks[0][1]))
+
+    assert [position["name"] for _, position in blocks] == [
+        "1663923.xml.gz",
+        "1663924.xml.gz",
+    ]
+    assert result == blocks[1:]
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 CERN.
+#
+# inspirehep is free software; you can redistribute it and/or modify it under
+# the terms of the MIT License; see LICENSE file for more details.
+
+import pytest
+
+from inspirehep.indexer.reindex import AdaptiveBatchSize, ReindexCheckpoint
+
+
+def test_adaptive_batch_size_shrinks_on_big_records():
+    batch_size = AdaptiveBatchSize(
+        200, 10, 1000, target_bytes=1000, target_duration=10, smoothing=1
+    )
+
+    assert batch_size.update(200, size=2000, duration=1) == 100
+
+
+def test_adaptive_batch_size_shrinks_on_slow_batches():
+    batch_size = AdaptiveBatchSize(
+        200, 10, 1000, target_bytes=1000, target_duration=10, smoothing=1
+    )
+
+    assert batch_size.update(200, size=200, duration=40) == 50
+
+
+def test_adaptive_batch_size_is_smoothed_and_bounded():
+    batch_size = AdaptiveBatchSize(
+        200, 10, 300, target_bytes=1000, target_duration=10, smoothing=0.5
+    )
+
+    assert batch_size.update(200, size=100, duration=1) == 300
+    assert batch_size.update(300, size=300000, duration=1) == 150
+    assert batch_size.update(0, size=0, duration=0) == 150
+
+
+def test_reindex_checkpoint_save_and_load(tmp_path):
+    file_path = (tmp_path / "checkpoint.json").as_posix()
+    checkpoint = ReindexCheckpoint(file_path, ["lit", "aut"])
+    checkpoint.last_uuid = "5a2c5bd6-35b5-4c87-8c06-5e5b6e2a4b61"
+    checkpoint.counters["records"] = 10
+    checkpoint.save()
+
+    loaded_checkpoint = ReindexCheckpoint(file_path, ["aut", "lit"])
+
+    assert loaded_checkpoint.load()
+    assert loaded_checkpoint.last_uuid == checkpoint.last_uuid
+    assert loaded_checkpoint.counters == checkpoint.counters
+
+
+def test_reindex_checkpoint_load_with_different_pid_types(tmp_path):
+    file_path = (tmp_path / "checkpoint.json").as_posix()
+    ReindexCheckpoint(file_path, ["lit"]).save()
+
+    with pytest.raises(ValueError):
+        ReindexCheckpoint(file_path, ["aut"]).load()
+
+
+def test_reindex_checkpoint_load_without_file(tmp_path):
+    file_path = (tmp_path / "checkpoint.json").as_posix()
+
+    assert not ReindexCheckpoint(file_path, ["lit"]).load()
+
+
+def test_reindex_checkpoint_clear(tmp_path):
+    file_path = (tmp_path / "checkpoint.json").as_posix()
+    checkpoint = ReindexCheckpoint(file_path, ["lit"])
+    checkpoint.save()
+
+    checkpoint.clear()
+
+    assert not checkpoint.load()
+
+
+def test_reindex_checkpoint_clear_without_file(tmp_path):
+    file_path = (tmp_path / "checkpoint.json").as_posix()
+
+    ReindexCheckpoint(file_path, ["lit"]).clear()
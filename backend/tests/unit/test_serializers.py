@@ -110,3 +110,78 @@ def test_flatten_aggregations_doesnt_add_buckets_with_doc_count_0_for_filter_agg
     }
     result = JSONSerializerFacets.flatten_aggregations(aggregation)
     assert expected_result == result
+
+
+def test_compute_aggregations_values_for_h_index_aggregation():
+    aggregation = {
+        "citation_summary": {
+            "doc_count": 6,
+            "h-index": {
+                "meta": {"is_h_index_aggregation": True},
+                "buckets": {
+                    "all": {
+                        "doc_count": 6,
+                        "citation_count": {
+                            "buckets": [
+                                {"key": 0.0, "doc_count": 1},
+                                {"key": 2.0, "doc_count": 2},
+                                {"key": 3.0, "doc_count": 2},
+                                {"key": 100.0, "doc_count": 1},
+                            ]
+                        },
+                    },
+                    "published": {"doc_count": 0, "citation_count": {"buckets": []}},
+                },
+            },
+        }
+    }
+    expected_result = {
+        "citation_summary": {
+            "doc_count": 6,
+            "h-index": {"value": {"all": 3, "published": 0}},
+        }
+    }
+    JSONSerializerFacets.compute_aggregations_values(aggregation)
+    assert expected_result == aggregation
+
+
+def test_compute_aggregations_values_for_h_index_of_highest_citation_counts():
+    # the 2 highest citation counts of 3 papers with 100 and 2 papers with 1 citation
+    aggregation = {
+        "h-index": {
+            "meta": {"is_h_index_aggregation": True},
+            "buckets": {
+                "all": {
+                    "doc_count": 5,
+                    "citation_count": {
+                        "buckets": [
+                            {"key": 100, "doc_count": 3},
+                            {"key": 1, "doc_count": 2},
+                        ]
+                    },
+                },
+                "published": {"doc_count": 0, "citation_count": {"buckets": []}},
+            },
+        }
+    }
+    expected_result = {"h-index": {"value": {"all": 3, "published": 0}}}
+    JSONSerializerFacets.compute_aggregations_values(aggregation)
+    assert expected_result == aggregation
+
+
+def test_compute_aggregations_values_for_citations_by_year_aggregation():
+    aggregation = {
+        "citations_by_year": {
+            "meta": {"is_citations_by_year_aggregation": True},
+            "doc_count": 3,
+            "years": {
+                "buckets": [
+                    {"key": 2013, "doc_count": 2, "count": {"value": 5.0}},
+                    {"key": 2012, "doc_count": 1, "count": {"value": 1.0}},
+                ]
+            },
+        }
+    }
+    expected_result = {"citations_by_year": {"value": {"2013": 5, "2012": 1}}}
+    JSONSerializerFacets.compute_aggregations_values(aggregation)
+    assert expected_result == aggregation
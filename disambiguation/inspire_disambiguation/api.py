@@ -23,6 +23,8 @@
 """Disambiguation API."""
 import json
 import math
+import multiprocessing
+from collections import deque
 from datetime import datetime
 
 import numpy as np
@@ -39,6 +41,7 @@ from inspire_disambiguation.core.ml.models import (Clusterer,
                                                    DistanceEstimator,
                                                    EthnicityEstimator)
 from inspire_disambiguation.core.ml.sampling import sample_signature_pairs
+from inspire_disambiguation.core.store import get_signature_store
 from redis import StrictRedis
 
 LOGGER = structlog.getLogger()
@@ -88,7 +91,11 @@ def train_and_save_distance_model(
             used for training.
     """
     start_time = datetime.now()
-    curated_signatures = get_signatures(only_curated=True)
+    store = get_signature_store()
+    if store:
+        curated_signatures = store.get_signatures(only_curated=True)
+    else:
+        curated_signatures = get_signatures(only_curated=True)
     LOGGER.info(
         "Splitting data into training and test set.",
         training_set_fraction=train_to_validation_split_fraction,
@@ -159,7 +166,11 @@ def train_and_save_distance_model(
 
 
 def cluster(
-    ethnicity_model_path, distance_model_path, n_jobs, signature_block=None,
+    ethnicity_model_path,
+    distance_model_path,
+    n_jobs,
+    signature_block=None,
+    refresh_signature_store=True,
 ):
     """Train the clustering model and process the output.
 
@@ -169,10 +180,16 @@ def cluster(
         n_jobs (int): Number of processes to use.
         signature_block (str): Signature block indicating which block should be
             clustered. If set to None, clustering will run on all blocks.
+        refresh_signature_store (bool): If set to False, the signature store
+            is used without being refreshed first.
     """
     start_time = datetime.now()
     LOGGER.info("Preparing test dataset...")
-    signatures = get_signatures(signature_block=signature_block)
+    store = get_signature_store(refresh=refresh_signature_store)
+    if store:
+        signatures = store.get_signatures(signature_block=signature_block)
+    else:
+        signatures = get_signatures(signature_block=signature_block)
     input_clusters = get_input_clusters(signatures)
     LOGGER.info(
         "Input data",
@@ -189,7 +206,12 @@ def cluster(
     distance_estimator = DistanceEstimator.get(
         ethnicity_model_path, distance_model_path
     )
-    clusterer = Clusterer(distance_estimator)
+    clusterer = Clusterer(
+        distance_estimator,
+        two_stage_affinity=conf["CLUSTERING_TWO_STAGE_AFFINITY"],
+        max_block_size=conf["CLUSTERING_MAX_BLOCK_SIZE"],
+        trace_memory=conf["CLUSTERING_TRACE_MEMORY"],
+    )
     clusterer.load_data(signatures, input_clusters)
     prepare_clusterer_time = datetime.now()
     LOGGER.info("Clustering", signature_block=signature_block)
@@ -206,6 +228,9 @@ def cluster(
                 cluster, "best_threshold_", clusterer.clusterer.base_estimator.threshold
             ),
             signature_block=phonetic_block,
+            block_runtime=str(getattr(cluster, "runtime_", None)),
+            block_peak_memory=getattr(cluster, "peak_memory_", None),
+            components_thresholds=getattr(cluster, "components_best_thresholds_", None),
             B3_f_score=cluster.supervised_scoring(clusterer.y, cluster.labels_)
             if hasattr(cluster, "supervised_scoring")
             else None,
@@ -228,7 +253,11 @@ def cluster_with_evaluation(
         for model validation.
     """
     start_time = datetime.now()
-    signature_blocks = get_curated_signature_blocks()
+    store = get_signature_store()
+    if store:
+        signature_blocks = store.get_curated_signature_blocks()
+    else:
+        signature_blocks = get_curated_signature_blocks()
     labels_train, labels_test, y_train, y_test = (
         np.array([]),
         np.array([]),
@@ -242,7 +271,10 @@ def cluster_with_evaluation(
         )
         test_signatures = []
         test_authors_ids = []
-        signatures = get_signatures(signature_block=block, only_curated=True)
+        if store:
+            signatures = store.get_signatures(signature_block=block, only_curated=True)
+        else:
+            signatures = get_signatures(signature_block=block, only_curated=True)
         input_clusters_with_all_labels = get_input_clusters(signatures)
         for signature in signatures:
             if signature.signature_uuid in test_signatures_uuids:
@@ -267,7 +299,12 @@ def cluster_with_evaluation(
         distance_estimator = DistanceEstimator.get(
             ethnicity_model_path, distance_model_path
         )
-        clusterer = Clusterer(distance_estimator)
+        clusterer = Clusterer(
+            distance_estimator,
+            two_stage_affinity=conf["CLUSTERING_TWO_STAGE_AFFINITY"],
+            max_block_size=conf["CLUSTERING_MAX_BLOCK_SIZE"],
+            trace_memory=conf["CLUSTERING_TRACE_MEMORY"],
+        )
         clusterer.load_data(signatures, input_clusters)
         prepare_clusterer_time = datetime.now()
         LOGGER.info("Clustering", signature_block=block)
@@ -286,6 +323,11 @@ def cluster_with_evaluation(
                     clusterer.clusterer.base_estimator.threshold,
                 ),
                 signature_block=phonetic_block,
+                block_runtime=str(getattr(cluster, "runtime_", None)),
+                block_peak_memory=getattr(cluster, "peak_memory_", None),
+                components_thresholds=getattr(
+                    cluster, "components_best_thresholds_", None
+                ),
             )
             (
                 labels_train_per_block,
@@ -348,39 +390,186 @@ def cluster_with_evaluation(
 
 
 def cluster_from_redis(
-    ethnicity_model_path, distance_model_path, n_jobs,
+    ethnicity_model_path, distance_model_path, n_jobs, n_workers=1,
 ):
     """
-    Process all signature blocks from redis set (one by one).
+    Process all signature blocks from redis set.
+
+    With more than one worker, the blocks are clustered concurrently by a pool
+    of processes, see: `cluster_from_redis_in_parallel`.
+
     Args:
         ethnicity_model_path (str): Full path where ethnicity model is saved.
         distance_model_path (str): Full path where distance model is saved.
         n_jobs (int): How many jobs will be running to fit data.
+        n_workers (int): How many signature blocks will be clustered at once.
     """
+    if n_workers > 1:
+        return cluster_from_redis_in_parallel(
+            ethnicity_model_path, distance_model_path, n_workers
+        )
     redis_url = conf["REDIS_URL"]
     redis = StrictRedis.from_url(redis_url, decode_responses=True)
+    redis_key = conf["REDIS_PHONETIC_BLOCK_KEY"]
+    clusters_batch = ClustersBatch()
     while True:
-        signature_block_data = redis.bzpopmin(
-            conf["REDIS_PHONETIC_BLOCK_KEY"], conf["REDIS_TIMEOUT"]
-        )
-        if not signature_block_data:
-            LOGGER.warning("No signature blocks in redis to process! STOP.")
-            break
-        signature_block = signature_block_data[1]
+        signature_block_data = redis.zpopmin(redis_key)
+        if signature_block_data:
+            signature_block = signature_block_data[0][0]
+        else:
+            # the clusters are posted before waiting for new blocks
+            clusters_batch.flush()
+            signature_block_data = redis.bzpopmin(redis_key, conf["REDIS_TIMEOUT"])
+            if not signature_block_data:
+                LOGGER.warning("No signature blocks in redis to process! STOP.")
+                break
+            signature_block = signature_block_data[1]
         LOGGER.info("Clustering signature_block", signature_block=signature_block)
         clusters = cluster(
             ethnicity_model_path, distance_model_path, n_jobs, signature_block,
         )
         LOGGER.info("Output", output_clusters=clusters, signature_block=signature_block)
-        response = send_clusters_to_inspirehep(clusters)
+        clusters_batch.add(signature_block, clusters)
+
+
+def cluster_from_redis_in_parallel(
+    ethnicity_model_path, distance_model_path, n_workers,
+):
+    """
+    Process all signature blocks from redis set with a pool of processes.
+
+    The distance model is loaded once before starting the workers, which get
+    it through fork. Every worker clusters one signature block at a time and
+    the clusters of several blocks are posted to inspirehep at once.
+
+    Args:
+        ethnicity_model_path (str): Full path where ethnicity model is saved.
+        distance_model_path (str): Full path where distance model is saved.
+        n_workers (int): How many signature blocks will be clustered at once.
+    """
+    redis_url = conf["REDIS_URL"]
+    redis = StrictRedis.from_url(redis_url, decode_responses=True)
+    redis_key = conf["REDIS_PHONETIC_BLOCK_KEY"]
+    DistanceEstimator.get(ethnicity_model_path, distance_model_path)
+    clusters_batch = ClustersBatch()
+    pending_blocks = deque()
+    failed_blocks = set()
+    start_time = datetime.now()
+    blocks_count = 0
+    with multiprocessing.get_context("fork").Pool(n_workers) as pool:
+        while True:
+            signature_store_refreshed = False
+            while len(pending_blocks) < 2 * n_workers:
+                if pending_blocks:
+                    signature_block_data = redis.zpopmin(redis_key)
+                    if not signature_block_data:
+                        break
+                    signature_block, score = signature_block_data[0]
+                else:
+                    clusters_batch.flush()
+                    signature_block_data = redis.bzpopmin(
+                        redis_key, conf["REDIS_TIMEOUT"]
+                    )
+                    if not signature_block_data:
+                        break
+                    _, signature_block, score = signature_block_data
+                if not signature_store_refreshed:
+                    # refreshed here once, instead of by every worker
+                    get_signature_store()
+                    signature_store_refreshed = True
+                LOGGER.info(
+                    "Clustering signature_block", signature_block=signature_block
+                )
+                pending_blocks.append(
+                    (
+                        signature_block,
+                        score,
+                        pool.apply_async(
+                            _cluster_in_worker,
+                            (
+                                ethnicity_model_path,
+                                distance_model_path,
+                                signature_block,
+                            ),
+                        ),
+                    )
+                )
+
+            if not pending_blocks:
+                LOGGER.warning("No signature blocks in redis to process! STOP.")
+                break
+
+            signature_block, score, result = pending_blocks.popleft()
+            try:
+                clusters = result.get()
+            except Exception:
+                LOGGER.exception(
+                    "Cannot cluster signature_block", signature_block=signature_block
+                )
+                if signature_block in failed_blocks:
+                    continue
+                # the block is clustered again once, a later failure drops it
+                failed_blocks.add(signature_block)
+                redis.zadd(redis_key, {signature_block: score})
+                continue
+            LOGGER.info(
+                "Output", output_clusters=clusters, signature_block=signature_block
+            )
+            clusters_batch.add(signature_block, clusters)
+            blocks_count += 1
+            if blocks_count % conf["CLUSTERING_METRICS_INTERVAL"] == 0:
+                minutes = (datetime.now() - start_time).total_seconds() / 60
+                LOGGER.info(
+                    "Clustering metrics",
+                    queue_depth=redis.zcard(redis_key),
+                    pending_blocks=len(pending_blocks),
+                    blocks_count=blocks_count,
+                    blocks_per_minute=blocks_count / minutes if minutes else None,
+                )
+    clusters_batch.flush()
+
+
+def _cluster_in_worker(ethnicity_model_path, distance_model_path, signature_block):
+    # pool workers can't start the processes of `BlockClustering`
+    return cluster(
+        ethnicity_model_path,
+        distance_model_path,
+        1,
+        signature_block,
+        refresh_signature_store=False,
+    )
+
+
+class ClustersBatch(object):
+    """Clusters of several signature blocks, posted to inspirehep at once.
+
+    The clusters are posted when `CLUSTERING_POST_BATCH_SIZE` blocks were
+    added, or when `flush` is called.
+    """
+
+    def __init__(self):
+        self.signature_blocks = []
+        self.clusters = []
+
+    def add(self, signature_block, clusters):
+        self.signature_blocks.append(signature_block)
+        self.clusters.extend(clusters)
+        if len(self.signature_blocks) >= conf["CLUSTERING_POST_BATCH_SIZE"]:
+            self.flush()
 
+    def flush(self):
+        if not self.signature_blocks:
+            return
+        response = send_clusters_to_inspirehep(self.clusters)
         if response.status_code != 200:
             LOGGER.error(
-                "Failed to post clustering output for signature block.",
-                signature_block=signature_block,
+                "Failed to post clustering output for signature blocks.",
+                signature_blocks=self.signature_blocks,
                 error_msg=response.text,
                 status_code=response.status_code,
             )
+        self.signature_blocks = []
+        self.clusters = []
 
 
 def send_clusters_to_inspirehep(clusters):
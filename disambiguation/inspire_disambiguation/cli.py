@@ -26,6 +26,7 @@ from inspire_disambiguation.api import cluster_with_evaluation
 from inspire_disambiguation.api import (cluster_from_redis,
                                         train_and_save_distance_model,
                                         train_and_save_ethnicity_model)
+from inspire_disambiguation.core.store import SignatureStore
 
 
 @click.group()
@@ -154,8 +155,39 @@ def distance_model(
     help=f"Number of processes to use. (default: '{conf['CLUSTERING_N_JOBS']}')",
     type=int,
 )
-def cluster(ethnicity_model_path, distance_model_path, n_jobs):
+@click.option(
+    "-w",
+    "--n_workers",
+    "n_workers",
+    default=conf["CLUSTERING_BLOCK_WORKERS"],
+    help=f"Number of signature blocks clustered at once. "
+    f"(default: '{conf['CLUSTERING_BLOCK_WORKERS']}')",
+    type=int,
+)
+def cluster(ethnicity_model_path, distance_model_path, n_jobs, n_workers):
     """Cluster data for signature_blocks stored in redis"""
     click.secho("Starting clustering.")
-    cluster_from_redis(ethnicity_model_path, distance_model_path, n_jobs)
+    cluster_from_redis(ethnicity_model_path, distance_model_path, n_jobs, n_workers)
     click.secho("Done.", fg="green")
+
+
+@cli.command()
+@click.option(
+    "-p",
+    "--path",
+    "store_path",
+    default=conf["SIGNATURE_STORE_PATH"],
+    help=f"Path to the signature store. (default: '{conf['SIGNATURE_STORE_PATH']}')",
+    type=str,
+    required=True,
+)
+@click.option(
+    "--prune",
+    help="Remove the records which are not in ES anymore.",
+    is_flag=True,
+)
+def refresh_signature_store(store_path, prune):
+    """Build or refresh the local snapshot of the signatures."""
+    click.secho("Refreshing signature store.")
+    records_count = SignatureStore(store_path).refresh(prune=prune)
+    click.secho(f"Done. {records_count} records stored.", fg="green")
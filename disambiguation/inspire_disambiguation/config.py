@@ -34,8 +34,32 @@ import os
 
     CLUSTERING_N_JOBS: Number of processes to use for clustering.
 
+    CLUSTERING_TWO_STAGE_AFFINITY: When True the features of every signature are
+        extracted once per block instead of once per pair of signatures.
+
+    CLUSTERING_MAX_BLOCK_SIZE: Blocks with more signatures are split in groups of
+        close signatures before clustering, to bound the memory used by the
+        distance matrix. None to never split them.
+
+    CLUSTERING_TRACE_MEMORY: When True the peak memory used by the clustering of
+        every block is traced with tracemalloc and logged, which slows it down.
+
+    CLUSTERING_BLOCK_WORKERS: Number of signature blocks from redis clustered at
+        once by a pool of processes.
+
+    CLUSTERING_POST_BATCH_SIZE: Number of signature blocks whose clusters are
+        posted together to inspirehep.
+
+    CLUSTERING_METRICS_INTERVAL: Number of clustered signature blocks between two
+        logs of the queue depth and of the blocks clustered per minute.
+
     DISPLAY_PROGRESS: When True displays progress bar during pairing process.
 
+    SIGNATURE_STORE_PATH: Location of the local snapshot of the signatures, used
+        instead of scanning ES for every signature block. It is refreshed with
+        the records updated in ES every time signatures are loaded.
+        None to always load signatures from ES.
+
     LOG_LEVEL: Minimum log level which will be displaying messages.
 
     REDIS_PHONETIC_BLOCK_KEY: Key in redis from which script will read signature blocks
@@ -77,7 +101,14 @@ ETHNICITY_DATA_PATH = os.path.join(disambiguation_base_path, "ethnicity.csv")
 ETHNICITY_MODEL_PATH = os.path.join(disambiguation_base_path, "ethnicity.pkl")
 DISTANCE_MODEL_PATH = os.path.join(disambiguation_base_path, "distance.pkl")
 CLUSTERING_N_JOBS = 8
+CLUSTERING_TWO_STAGE_AFFINITY = True
+CLUSTERING_MAX_BLOCK_SIZE = 10000
+CLUSTERING_TRACE_MEMORY = False
+CLUSTERING_BLOCK_WORKERS = 1
+CLUSTERING_POST_BATCH_SIZE = 1
+CLUSTERING_METRICS_INTERVAL = 100
 DISPLAY_PROGRESS = False
+SIGNATURE_STORE_PATH = None
 LOG_LEVEL = "WARNING"
 REDIS_PHONETIC_BLOCK_KEY = "author_phonetic_blocks"
 REDIS_TIMEOUT = 60
@@ -61,7 +61,7 @@ class LiteratureSearch(Search):
         )
 
 
-def get_literature_records_query(signature_block, only_curated):
+def get_literature_records_query(signature_block, only_curated, updated_since=None):
     """Build query for ES based on provided parameters.
 
     Args:
@@ -69,11 +69,14 @@ def get_literature_records_query(signature_block, only_curated):
             returned. If empty or None returns all of them.
         only_curated (bool): if `True` limit results of query to curated
             records (with `authors.curated_relation` set to `True`).
+        updated_since (str): if set, limit results of query to records
+            updated at this date or later.
 
     Returns:
         Query: Query built for provided parameters.
     """
     SIGNATURE_FIELDS = [
+        "_updated",
         "abstracts.value",
         "affiliations.value",
         "authors.affiliations.value",
@@ -97,14 +100,31 @@ def get_literature_records_query(signature_block, only_curated):
             "term", authors__signature_block__raw=signature_block
         )
     authors_query = Q("nested", path="authors", query=partial_authors_query)
+    must = [literature_query, authors_query]
+    if updated_since:
+        must.append(Q("range", _updated={"gte": updated_since}))
     query = (
         LiteratureSearch()
-        .query(Q("bool", must=[literature_query, authors_query]))
+        .query(Q("bool", must=must))
         .params(size=conf["ES_MAX_QUERY_SIZE"], _source=SIGNATURE_FIELDS)
     )
     return query
 
 
+def get_literature_records_ids():
+    """Get the control numbers of all the literature records from ES.
+
+    Returns:
+        set: control numbers of the records.
+    """
+    query = (
+        LiteratureSearch()
+        .query(Q("match", _collections="Literature"))
+        .params(size=conf["ES_MAX_QUERY_SIZE"], _source=["control_number"])
+    )
+    return {record["control_number"] for record in query.scan()}
+
+
 def get_curated_signature_blocks_query():
     literature_query = Q("match", _collections="Literature")
     partial_authors_query = Q("term", authors__curated_relation=True)
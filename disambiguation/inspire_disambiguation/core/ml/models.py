@@ -23,10 +23,15 @@
 """Disambiguation core ML models."""
 
 import csv
+import heapq
 import pickle
+import tracemalloc
+from datetime import datetime
 from functools import partial
 
 import numpy as np
+import scipy.sparse as sp
+import structlog
 from beard.clustering import (BlockClustering, ScipyHierarchicalClustering,
                               block_phonetic)
 from beard.metrics import b3_f_score, b3_precision_recall_fscore
@@ -48,12 +53,16 @@ from inspire_disambiguation.core.helpers import (get_abstract,
                                                  group_by_signature,
                                                  load_signatures)
 from inspire_disambiguation.utils import open_file_in_folder
+from scipy.sparse.csgraph import connected_components
 from scipy.special import expit
+from sklearn.base import clone
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.pipeline import FeatureUnion, Pipeline
 from sklearn.svm import LinearSVC
 
+LOGGER = structlog.getLogger()
+
 
 class EthnicityEstimator(object):
     def __init__(self, model_filename=None, C=4.0):
@@ -590,8 +599,250 @@ class DistanceEstimator(object):
         return self.distance_estimator.score(self.X, self.y)
 
 
+class MemoryBoundedHierarchicalClustering(ScipyHierarchicalClustering):
+    """Hierarchical clustering not building the distance matrix of big blocks.
+
+    Blocks of up to ``max_block_size`` signatures are clustered as by
+    `ScipyHierarchicalClustering`. The distances of the signatures of bigger
+    blocks are computed in chunks, keeping only the pairs closer than
+    ``threshold``, and the block is split in the connected components of this
+    graph. As an average linkage cluster can only contain signatures linked by
+    such pairs, every component is then clustered on its own. The components
+    still bigger than ``max_block_size`` are split again with half the
+    threshold, up to ``max_splits`` times. Afterwards they are clustered by
+    `_sparse_average_linkage` on the pairs of the last split, counting the
+    other pairs at ``max_distance``.
+
+    The thresholds used by the clustering of the components are stored in
+    ``components_best_thresholds_`` and the runtime of the fit in ``runtime_``.
+    With ``trace_memory``, the peak memory allocated by the fit is traced with
+    tracemalloc and stored in ``peak_memory_``.
+    """
+
+    def __init__(
+        self,
+        method="single",
+        affinity="euclidean",
+        threshold=None,
+        supervised_scoring=None,
+        max_block_size=None,
+        step=10000,
+        max_splits=3,
+        max_distance=1.0,
+        trace_memory=False,
+    ):
+        super().__init__(
+            method=method,
+            affinity=affinity,
+            threshold=threshold,
+            supervised_scoring=supervised_scoring,
+        )
+        self.max_block_size = max_block_size
+        self.step = step
+        self.max_splits = max_splits
+        self.max_distance = max_distance
+        self.trace_memory = trace_memory
+
+    def fit(self, X, y=None):
+        start_time = datetime.now()
+        # the peak memory is measured only by the outermost traced fit
+        trace_memory = self.trace_memory and not tracemalloc.is_tracing()
+        if trace_memory:
+            tracemalloc.start()
+        try:
+            if self.max_block_size is None or len(X) <= self.max_block_size:
+                self.components_labels_ = None
+                self.components_best_thresholds_ = None
+                super().fit(X, y=y)
+            else:
+                self._fit_components(X, y)
+        finally:
+            self.peak_memory_ = (
+                tracemalloc.get_traced_memory()[1] if trace_memory else None
+            )
+            if trace_memory:
+                tracemalloc.stop()
+        self.runtime_ = datetime.now() - start_time
+        return self
+
+    def _iter_components(self, X, indices, threshold, splits=0):
+        """Yield the components of the pairs closer than threshold.
+
+        Yields:
+            tuple: the indices of the signatures of the component and, for the
+                components too big to be split, the indices in the component
+                of the first and second signatures of its pairs and their
+                distances, None otherwise.
+        """
+        rows, columns, close_distances = [], [], []
+        for i, j, distances in _iter_distances(X[indices], self.step):
+            close = distances < threshold
+            rows.append(i[close])
+            columns.append(j[close])
+            close_distances.append(distances[close])
+        rows = np.concatenate(rows)
+        columns = np.concatenate(columns)
+        close_distances = np.concatenate(close_distances)
+        n_samples = len(indices)
+        graph = sp.coo_matrix(
+            (np.ones(len(rows), dtype=np.bool_), (rows, columns)),
+            shape=(n_samples, n_samples),
+        )
+        n_components, components = connected_components(graph, directed=False)
+        LOGGER.info(
+            "Splitting block",
+            signatures=n_samples,
+            components=n_components,
+            threshold=threshold,
+        )
+
+        for component in range(n_components):
+            in_component = components == component
+            component_indices = indices[in_component]
+            if len(component_indices) <= self.max_block_size:
+                yield component_indices, None
+            elif splits < self.max_splits:
+                yield from self._iter_components(
+                    X, component_indices, threshold / 2, splits=splits + 1
+                )
+            else:
+                LOGGER.warning(
+                    "Component too big to be split, clustering its close pairs",
+                    signatures=len(component_indices),
+                    threshold=threshold,
+                )
+                positions = np.cumsum(in_component) - 1
+                in_pairs = components[rows] == component
+                yield component_indices, (
+                    positions[rows[in_pairs]],
+                    positions[columns[in_pairs]],
+                    close_distances[in_pairs],
+                )
+
+    def _fit_components(self, X, y):
+        n_samples = len(X)
+        labels = np.empty(n_samples, dtype=np.int)
+        best_thresholds = []
+        next_label = 0
+        for indices, pairs in self._iter_components(
+            X, np.arange(n_samples), self.threshold
+        ):
+            if len(indices) == 1:
+                component_labels = np.zeros(1, dtype=np.int)
+            elif pairs is not None:
+                component_labels = _sparse_average_linkage(
+                    len(indices), *pairs, self.threshold, self.max_distance
+                )
+                best_thresholds.append(self.threshold)
+            else:
+                estimator = clone(self).set_params(max_block_size=None)
+                estimator.fit(X[indices], y=None if y is None else y[indices])
+                component_labels = estimator.labels_
+                best_thresholds.append(estimator.best_threshold_)
+            labels[indices] = component_labels + next_label
+            next_label += component_labels.max() + 1
+
+        self.components_labels_ = labels
+        self.components_best_thresholds_ = best_thresholds
+        self.n_samples_ = n_samples
+
+    @property
+    def labels_(self):
+        if self.components_labels_ is not None:
+            return self.components_labels_
+        return super().labels_
+
+
+def _sparse_average_linkage(
+    n_samples, rows, columns, distances, threshold, max_distance=1.0
+):
+    """Cluster the samples by average linkage, knowing only some of their pairs.
+
+    The pairs which are not given are counted at ``max_distance``, so the
+    memory used depends on the number of given pairs and not on the number
+    of samples squared. The two clusters with the lowest average distance are
+    merged while it is below ``threshold``.
+
+    Returns:
+        numpy.ndarray: the labels of the samples.
+    """
+    sizes = np.ones(n_samples, dtype=np.int)
+    versions = np.zeros(n_samples, dtype=np.int)
+    merged_into = np.arange(n_samples)
+    # sum of the differences to max_distance of the given pairs between clusters
+    links = [{} for _ in range(n_samples)]
+    for i, j, distance in zip(rows, columns, distances):
+        links[i][j] = links[j][i] = links[i].get(j, 0.0) + distance - max_distance
+
+    def average_distance(a, b):
+        return max_distance + links[a][b] / (sizes[a] * sizes[b])
+
+    heap = [
+        (average_distance(a, b), a, b, 0, 0)
+        for a in range(n_samples)
+        for b in links[a]
+        if a < b
+    ]
+    heapq.heapify(heap)
+    while heap:
+        distance, a, b, version_a, version_b = heapq.heappop(heap)
+        if distance >= threshold:
+            break
+        if versions[a] != version_a or versions[b] != version_b:
+            continue
+        merged_into[b] = a
+        sizes[a] += sizes[b]
+        versions[a] += 1
+        # b is never merged again
+        versions[b] = -1
+        del links[a][b]
+        for c, link in links[b].items():
+            if c != a:
+                links[a][c] = links[c][a] = links[a].get(c, 0.0) + link
+                del links[c][b]
+        links[b] = None
+        for c in links[a]:
+            first, second = min(a, c), max(a, c)
+            heapq.heappush(
+                heap,
+                (
+                    average_distance(first, second),
+                    first,
+                    second,
+                    versions[first],
+                    versions[second],
+                ),
+            )
+
+    roots = merged_into.copy()
+    while True:
+        parents = roots[roots]
+        if np.array_equal(parents, roots):
+            break
+        roots = parents
+    return np.unique(roots, return_inverse=True)[1]
+
+
 class Clusterer(object):
-    def __init__(self, estimator):
+    def __init__(
+        self,
+        estimator,
+        two_stage_affinity=False,
+        max_block_size=None,
+        trace_memory=False,
+    ):
+        """
+
+        Args:
+            estimator (DistanceEstimator): trained distance estimator.
+            two_stage_affinity (bool): if True, the signatures features are
+                extracted once per block and paired afterwards,
+                see: `_two_stage_affinity`.
+            max_block_size (int): blocks with more signatures are split before
+                clustering, see: `MemoryBoundedHierarchicalClustering`.
+            trace_memory (bool): if True, the peak memory used by the clustering
+                of every block is traced.
+        """
         # TODO get rid of this global
         global distance_estimator
         distance_estimator = estimator.distance_estimator
@@ -599,6 +850,9 @@ class Clusterer(object):
             distance_estimator.steps[-1][1].set_params(n_jobs=1)
         except Exception:
             pass
+        self.affinity = _two_stage_affinity if two_stage_affinity else _affinity
+        self.max_block_size = max_block_size
+        self.trace_memory = trace_memory
 
         # threshold determines when to split blocks
         # into smaller ones adding first initial
@@ -654,11 +908,13 @@ class Clusterer(object):
         """Fit data using the estimator"""
         self.clusterer = BlockClustering(
             blocking=self.block_function,
-            base_estimator=ScipyHierarchicalClustering(
-                affinity=_affinity,
+            base_estimator=MemoryBoundedHierarchicalClustering(
+                affinity=self.affinity,
                 threshold=self.clustering_threshold,
                 method=self.clustering_method,
                 supervised_scoring=b3_f_score,
+                max_block_size=self.max_block_size,
+                trace_memory=self.trace_memory,
             ),
             n_jobs=n_jobs,
             verbose=True,
@@ -682,17 +938,22 @@ class Clusterer(object):
         labels_test = self.clusterer.labels_[mask]
         return labels_train, y_train, labels_test, y_test
 
-    def nb_of_clusters_predicted_for_author(self, input_clusters_with_all_author_labels, test_signature_authors_ids):
-        author_ids = np.array([sample[0]['author_id'] for sample in self.X])
+    def nb_of_clusters_predicted_for_author(
+        self, input_clusters_with_all_author_labels, test_signature_authors_ids
+    ):
+        author_ids = np.array([sample[0]["author_id"] for sample in self.X])
         author_ids[author_ids == None] = test_signature_authors_ids
-        signatures_per_author = {cluster['author_id']: set(
-            cluster['signature_uuids']
-        ) for cluster in input_clusters_with_all_author_labels}
+        signatures_per_author = {
+            cluster["author_id"]: set(cluster["signature_uuids"])
+            for cluster in input_clusters_with_all_author_labels
+        }
         nb_of_clusters_per_author = {}
         for author_id in signatures_per_author.keys():
             author_mask = author_ids == author_id
             signatures_predicted_in_one_cluster = self.clusterer.labels_[author_mask]
-            nb_of_clusters_per_author[author_id] = np.unique(signatures_predicted_in_one_cluster).size
+            nb_of_clusters_per_author[author_id] = np.unique(
+                signatures_predicted_in_one_cluster
+            ).size
         return nb_of_clusters_per_author
 
     def score(self, labels_train, y_train, labels_test, y_test):
@@ -707,9 +968,13 @@ class Clusterer(object):
             y_test - array of true labels for test set
         """
         return (
-        b3_precision_recall_fscore(self.y, self.clusterer.labels_),
-        b3_precision_recall_fscore(y_train, labels_train) if labels_train.size != 0 else None,
-        b3_precision_recall_fscore(y_test, labels_test) if labels_test.size != 0 else None
+            b3_precision_recall_fscore(self.y, self.clusterer.labels_),
+            b3_precision_recall_fscore(y_train, labels_train)
+            if labels_train.size != 0
+            else None,
+            b3_precision_recall_fscore(y_test, labels_test)
+            if labels_test.size != 0
+            else None,
         )
 
 
@@ -733,3 +998,78 @@ def _affinity(X, step=10000):
         distances[start:end] = Xt[:]
 
     return distances
+
+
+def _iter_pairs(n_samples, step):
+    """Yield the indices of all the pairs of samples, about ``step`` at a time.
+
+    The pairs are in the same order as ``np.triu_indices(n_samples, k=1)``,
+    but the indices of all of them are never in memory at once.
+    """
+    rows, columns, size = [], [], 0
+    for i in range(n_samples - 1):
+        j = np.arange(i + 1, n_samples)
+        rows.append(np.full(len(j), i))
+        columns.append(j)
+        size += len(j)
+        if size >= step:
+            yield np.concatenate(rows), np.concatenate(columns)
+            rows, columns, size = [], [], 0
+    if size:
+        yield np.concatenate(rows), np.concatenate(columns)
+
+
+def _pair_features(features, i, j):
+    """Build the features of the pairs ``(i, j)`` from per-signature features."""
+    if sp.issparse(features):
+        return sp.hstack((features[i], features[j])).tocsr()
+    return np.hstack((features[i], features[j]))
+
+
+def _iter_distances(X, step=10000):
+    """Yield the distances of all the pairs of signatures, about ``step`` at a time.
+
+    The first stage runs the element transformer of every pair transformer of
+    the distance estimator (names, affiliations, TF-IDF vectors...) once on all
+    the signatures of the block. The second stage pairs the resulting feature
+    matrices by indexing them and applies the fitted combiners (cosine
+    similarity, string distance...) and the classifier on each chunk of pairs.
+
+    Yields:
+        tuple: the indices of the first and second signatures of the pairs and
+            their distances.
+    """
+    global distance_estimator
+    transformer = distance_estimator.steps[0][1]
+    classifier = distance_estimator.steps[-1][1]
+
+    components = []
+    for _, pipeline in transformer.transformer_list:
+        pair_transformer = pipeline.steps[0][1]
+        features = pair_transformer.element_transformer.transform(X)
+        combiners = [combiner for _, combiner in pipeline.steps[1:]]
+        components.append((features, combiners))
+
+    for i, j in _iter_pairs(len(X), step):
+        similarities = []
+        for features, combiners in components:
+            Xt = _pair_features(features, i, j)
+            for combiner in combiners:
+                Xt = combiner.transform(Xt)
+            similarities.append(Xt)
+        yield i, j, classifier.predict_proba(np.hstack(similarities))[:, 1]
+
+
+def _two_stage_affinity(X, step=10000):
+    """Custom affinity function, extracting the features of each signature once.
+
+    It gives the same distances as `_affinity`, see: `_iter_distances`.
+    """
+    distances = np.zeros(len(X) * (len(X) - 1) // 2, dtype=np.float64)
+    start = 0
+    for i, _, chunk_distances in _iter_distances(X, step):
+        end = start + len(i)
+        distances[start:end] = chunk_distances
+        start = end
+
+    return distances
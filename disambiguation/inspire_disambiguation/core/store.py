@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2021 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+"""Disambiguation local signature store."""
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+import structlog
+
+from inspire_disambiguation import conf
+from inspire_disambiguation.core.data_models import Signature
+from inspire_disambiguation.core.data_models.publication import Publication
+from inspire_disambiguation.core.es.readers import (
+    get_literature_records_ids,
+    get_literature_records_query,
+)
+from inspire_disambiguation.core.helpers import get_author_affiliation, get_author_id
+
+LOGGER = structlog.getLogger()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS publications (
+    publication_id INTEGER PRIMARY KEY,
+    abstract TEXT,
+    authors TEXT NOT NULL,
+    collaborations TEXT NOT NULL,
+    keywords TEXT NOT NULL,
+    title TEXT,
+    topics TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS signatures (
+    signature_uuid TEXT PRIMARY KEY,
+    publication_id INTEGER NOT NULL,
+    author_affiliation TEXT,
+    author_id INTEGER,
+    author_name TEXT NOT NULL,
+    signature_block TEXT,
+    curated_relation INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_signatures_signature_block
+    ON signatures (signature_block);
+CREATE INDEX IF NOT EXISTS ix_signatures_publication_id
+    ON signatures (publication_id);
+CREATE TABLE IF NOT EXISTS metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class SignatureStore(object):
+    """Local snapshot of the signatures and publications of all literature records.
+
+    The snapshot is a SQLite database built once from ES and refreshed with
+    the records updated since the last refresh, so that signature blocks can
+    be loaded without scanning ES.
+
+    Example:
+        >>> store = SignatureStore("/tmp/signatures.db")
+        >>> store.refresh()
+        >>> store.get_signatures("ABDa", True)
+        [Signature(...), Signature(...), Signature(...)]
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): path of the database file, created if it doesn't exist.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    @property
+    def last_updated(self):
+        row = self.connection.execute(
+            "SELECT value FROM metadata WHERE key = 'last_updated'"
+        ).fetchone()
+        return row[0] if row else None
+
+    def refresh(self, prune=False):
+        """Store the records updated since the last refresh.
+
+        The first refresh stores all the records.
+
+        Args:
+            prune (bool): if `True` also remove the records which are not in ES
+                anymore, which requires to fetch the ids of all the records.
+
+        Returns:
+            int: number of records stored.
+        """
+        start_time = datetime.now()
+        last_updated = self.last_updated
+        # records indexed while the previous refresh was scanning can have
+        # an older update date than the last one stored
+        query = get_literature_records_query(
+            None,
+            False,
+            updated_since=f"{last_updated}||-1h" if last_updated else None,
+        )
+        records_count = 0
+        with self.connection:
+            for record in query.scan():
+                record = record.to_dict()
+                self._store_record(record)
+                updated = record.get("_updated")
+                if updated and (last_updated is None or updated > last_updated):
+                    last_updated = updated
+                records_count += 1
+            if prune:
+                self._prune()
+            if last_updated:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO metadata VALUES ('last_updated', ?)",
+                    (last_updated,),
+                )
+        LOGGER.info(
+            "Refreshed signature store",
+            records_count=records_count,
+            last_updated=last_updated,
+            total_runtime=str(datetime.now() - start_time),
+        )
+        return records_count
+
+    def _store_record(self, record):
+        publication_id = record["control_number"]
+        self._delete_publications([publication_id])
+        publication = Publication.build(record)
+        self.connection.execute(
+            "INSERT INTO publications VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                publication_id,
+                publication.abstract,
+                json.dumps(publication.authors),
+                json.dumps(publication.collaborations),
+                json.dumps(publication.keywords),
+                publication.title,
+                json.dumps(publication.topics),
+            ),
+        )
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO signatures VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    author["uuid"],
+                    publication_id,
+                    get_author_affiliation(author),
+                    get_author_id(author),
+                    author["full_name"],
+                    author.get("signature_block"),
+                    bool(author.get("curated_relation")),
+                )
+                for author in record.get("authors", [])
+            ],
+        )
+
+    def _delete_publications(self, publications_ids):
+        for table in ("signatures", "publications"):
+            self.connection.executemany(
+                f"DELETE FROM {table} WHERE publication_id = ?",
+                [(publication_id,) for publication_id in publications_ids],
+            )
+
+    def _prune(self):
+        stored_ids = {
+            row[0]
+            for row in self.connection.execute(
+                "SELECT publication_id FROM publications"
+            )
+        }
+        deleted_ids = stored_ids - get_literature_records_ids()
+        self._delete_publications(deleted_ids)
+        LOGGER.info("Pruned signature store", records_count=len(deleted_ids))
+
+    def get_signatures(self, signature_block=None, only_curated=False):
+        """Get signatures from the store.
+
+        Args and return value are the same as for
+        `inspire_disambiguation.core.es.readers.get_signatures`.
+        """
+        query = """
+            SELECT s.author_affiliation, s.author_id, s.author_name,
+                s.signature_block, s.signature_uuid, s.curated_relation,
+                p.publication_id, p.abstract, p.authors, p.collaborations,
+                p.keywords, p.title, p.topics
+            FROM signatures AS s
+            JOIN publications AS p ON p.publication_id = s.publication_id
+        """
+        conditions, parameters = [], []
+        if signature_block:
+            conditions.append("s.signature_block = ?")
+            parameters.append(signature_block)
+        if only_curated:
+            conditions.append("s.curated_relation AND s.author_id IS NOT NULL")
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY s.publication_id, s.rowid"
+
+        publications = {}
+        signatures = []
+        for row in self.connection.execute(query, parameters):
+            publication_id = row[6]
+            if publication_id not in publications:
+                publications[publication_id] = Publication(
+                    abstract=row[7],
+                    authors=json.loads(row[8]),
+                    collaborations=json.loads(row[9]),
+                    keywords=json.loads(row[10]),
+                    publication_id=publication_id,
+                    title=row[11],
+                    topics=json.loads(row[12]),
+                )
+            author_id = row[1]
+            signatures.append(
+                Signature(
+                    author_affiliation=row[0],
+                    author_id=author_id,
+                    author_name=row[2],
+                    publication=publications[publication_id],
+                    signature_block=row[3],
+                    signature_uuid=row[4],
+                    is_curated_author_id=author_id is not None and bool(row[5]),
+                )
+            )
+        return signatures
+
+    def get_curated_signature_blocks(self):
+        """Get the signature blocks having curated signatures.
+
+        Returns:
+            set: the signature blocks.
+        """
+        return {
+            row[0]
+            for row in self.connection.execute(
+                "SELECT DISTINCT signature_block FROM signatures "
+                "WHERE curated_relation"
+            )
+        }
+
+
+def get_signature_store(refresh=True):
+    """Get the signature store, if `SIGNATURE_STORE_PATH` is set.
+
+    Args:
+        refresh (bool): if `True`, store the records updated since the last
+            refresh before returning the store.
+
+    Returns:
+        SignatureStore: the store or `None` if it is not configured.
+    """
+    path = conf.get("SIGNATURE_STORE_PATH")
+    if not path:
+        return None
+    store = SignatureStore(path)
+    if refresh:
+        store.refresh()
+    return store
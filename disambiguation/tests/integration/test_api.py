@@ -281,8 +281,9 @@ def test_train_and_save_distance_model(
 
 
 @patch("inspire_disambiguation.api.cluster")
+@patch("inspire_disambiguation.api.StrictRedis.zpopmin", return_value=[])
 @patch("inspire_disambiguation.api.StrictRedis.bzpopmin")
-def test_cluster_from_redis(redis_mock, cluster_mock, requests_mock):
+def test_cluster_from_redis(redis_mock, zpopmin_mock, cluster_mock, requests_mock):
     requests_mock.post(conf["INSPIREHEP_DISAMBIGUATION_URL"])
     redis_mock.side_effect = [
         ("author_phonetic_blocks", "BLOCK_1", "1566893840"),
@@ -291,9 +292,9 @@ def test_cluster_from_redis(redis_mock, cluster_mock, requests_mock):
         None,
     ]
     cluster_mock.side_effect = [
-        "clustering_result1",
-        "clustering_result2",
-        "clustering_result3",
+        ["clustering_result1"],
+        ["clustering_result2"],
+        ["clustering_result3"],
     ]
     cluster_from_redis(None, None, None)
     redis_mock.assert_called_with("author_phonetic_blocks", 60)
@@ -305,4 +306,104 @@ def test_cluster_from_redis(redis_mock, cluster_mock, requests_mock):
         == history.headers["Authorization"]
     )
     assert history.url == conf["INSPIREHEP_DISAMBIGUATION_URL"]
-    assert history.json() == {"clusters": "clustering_result1"}
+    assert history.json() == {"clusters": ["clustering_result1"]}
+
+
+@patch("inspire_disambiguation.api.cluster")
+@patch("inspire_disambiguation.api.StrictRedis.zpopmin")
+@patch("inspire_disambiguation.api.StrictRedis.bzpopmin")
+def test_cluster_from_redis_posts_clusters_in_batches(
+    bzpopmin_mock, zpopmin_mock, cluster_mock, requests_mock
+):
+    requests_mock.post(conf["INSPIREHEP_DISAMBIGUATION_URL"])
+    bzpopmin_mock.side_effect = [
+        ("author_phonetic_blocks", "BLOCK_1", "1566893840"),
+        None,
+    ]
+    zpopmin_mock.side_effect = [
+        [],
+        [("BLOCK_2", "1566893841")],
+        [("BLOCK_3", "1566893842")],
+        [],
+    ]
+    cluster_mock.side_effect = lambda *args, **kwargs: [f"clusters_of_{args[3]}"]
+
+    with patch.dict(conf, {"CLUSTERING_POST_BATCH_SIZE": 2}):
+        cluster_from_redis(None, None, None)
+
+    assert [history.json() for history in requests_mock.request_history] == [
+        {"clusters": ["clusters_of_BLOCK_1", "clusters_of_BLOCK_2"]},
+        {"clusters": ["clusters_of_BLOCK_3"]},
+    ]
+
+
+@patch("inspire_disambiguation.api.DistanceEstimator.get")
+@patch("inspire_disambiguation.api.cluster")
+@patch("inspire_disambiguation.api.StrictRedis.zcard")
+@patch("inspire_disambiguation.api.StrictRedis.zpopmin")
+@patch("inspire_disambiguation.api.StrictRedis.bzpopmin")
+def test_cluster_from_redis_in_parallel(
+    bzpopmin_mock,
+    zpopmin_mock,
+    zcard_mock,
+    cluster_mock,
+    distance_estimator_get_mock,
+    requests_mock,
+):
+    requests_mock.post(conf["INSPIREHEP_DISAMBIGUATION_URL"])
+    bzpopmin_mock.side_effect = [
+        ("author_phonetic_blocks", "BLOCK_1", "1566893840"),
+        None,
+    ]
+    zpopmin_mock.side_effect = [
+        [("BLOCK_2", "1566893841")],
+        [("BLOCK_3", "1566893842")],
+    ] + [[]] * 5
+    zcard_mock.return_value = 0
+    cluster_mock.side_effect = lambda *args, **kwargs: [f"clusters_of_{args[3]}"]
+
+    with patch.dict(conf, {"CLUSTERING_POST_BATCH_SIZE": 2}):
+        cluster_from_redis("ethnicity", "distance", 8, n_workers=2)
+
+    distance_estimator_get_mock.assert_called_once_with("ethnicity", "distance")
+    assert [history.json() for history in requests_mock.request_history] == [
+        {"clusters": ["clusters_of_BLOCK_1", "clusters_of_BLOCK_2"]},
+        {"clusters": ["clusters_of_BLOCK_3"]},
+    ]
+
+
+def _cluster_failing_for_block_2(*args, **kwargs):
+    if args[3] == "BLOCK_2":
+        raise ValueError("Cannot cluster")
+    return [f"clusters_of_{args[3]}"]
+
+
+@patch("inspire_disambiguation.api.DistanceEstimator.get")
+@patch("inspire_disambiguation.api.cluster")
+@patch("inspire_disambiguation.api.StrictRedis.zadd")
+@patch("inspire_disambiguation.api.StrictRedis.zpopmin")
+@patch("inspire_disambiguation.api.StrictRedis.bzpopmin")
+def test_cluster_from_redis_in_parallel_pushes_back_failed_blocks(
+    bzpopmin_mock,
+    zpopmin_mock,
+    zadd_mock,
+    cluster_mock,
+    distance_estimator_get_mock,
+    requests_mock,
+):
+    requests_mock.post(conf["INSPIREHEP_DISAMBIGUATION_URL"])
+    bzpopmin_mock.side_effect = [
+        ("author_phonetic_blocks", "BLOCK_1", "1566893840"),
+        None,
+    ]
+    zpopmin_mock.side_effect = [[("BLOCK_2", "1566893841")]] + [[]] * 5
+    cluster_mock.side_effect = _cluster_failing_for_block_2
+
+    cluster_from_redis("ethnicity", "distance", 8, n_workers=2)
+
+    zadd_mock.assert_called_once_with(
+        "author_phonetic_blocks", {"BLOCK_2": "1566893841"}
+    )
+    assert [history.json() for history in requests_mock.request_history] == [
+        {"clusters": ["clusters_of_BLOCK_1"]},
+    ]
@@ -21,11 +21,18 @@
 # or submit itself to any jurisdiction.
 
 from mock import patch
-from numpy import array
+from numpy import allclose, array, concatenate, empty, triu_indices
 from inspire_disambiguation.core.data_models.publication import Publication
 from inspire_disambiguation.core.data_models.signature import Signature
 from inspire_disambiguation.core.es.readers import get_signatures, get_input_clusters
-from inspire_disambiguation.core.ml.models import DistanceEstimator, Clusterer
+from inspire_disambiguation.core.ml.models import (
+    Clusterer,
+    DistanceEstimator,
+    EthnicityEstimator,
+    _affinity,
+    _iter_pairs,
+    _two_stage_affinity,
+)
 
 
 @patch("inspire_disambiguation.core.es.readers.LiteratureSearch.scan")
@@ -352,3 +359,60 @@ def test_clusterer_load_data(
     expected_y = array([0, -1])
     assert (clusterer.X == expected_X).all()
     assert (clusterer.y == expected_y).all()
+
+
+def test_iter_pairs_yields_upper_triangle_indices_in_chunks():
+    chunks = list(_iter_pairs(5, 4))
+
+    assert [len(rows) for rows, _ in chunks] == [4, 5, 1]
+    assert (concatenate([rows for rows, _ in chunks]) == triu_indices(5, k=1)[0]).all()
+    assert (
+        concatenate([columns for _, columns in chunks]) == triu_indices(5, k=1)[1]
+    ).all()
+
+
+def _signature(signature_id, author_name, affiliation, title, collaboration):
+    return Signature(
+        author_affiliation=affiliation,
+        author_id=None,
+        author_name=author_name,
+        publication=Publication(
+            abstract=f"Abstract of {title}",
+            authors=[author_name, "Smith, Jane"],
+            collaborations=[collaboration],
+            keywords=["keyword", title],
+            publication_id=signature_id,
+            title=title,
+            topics=["Theory-HEP"],
+        ),
+        signature_block="DAj",
+        signature_uuid=str(signature_id),
+        is_curated_author_id=False,
+    )
+
+
+def test_two_stage_affinity_matches_affinity(ethnicity_path):
+    signatures = [
+        _signature(1, "Doe, John", "CERN", "Black holes", "ATLAS"),
+        _signature(2, "Doe, J.", "CERN", "Black holes entropy", "ATLAS"),
+        _signature(3, "Doe, Jane", "DESY", "Neutrinos", "CMS"),
+        _signature(4, "Doe, J", "DESY", "Neutrino masses", "CMS"),
+        _signature(5, "Doe, John Smith", "Rutgers U.", "Strings", "LHCb"),
+    ]
+    distance_estimator = DistanceEstimator(EthnicityEstimator(str(ethnicity_path)))
+    distance_estimator.X = array(
+        [
+            [signatures[0], signatures[1]],
+            [signatures[2], signatures[3]],
+            [signatures[0], signatures[2]],
+            [signatures[1], signatures[4]],
+        ],
+        dtype=object,
+    )
+    distance_estimator.y = array([0, 0, 1, 1])
+    distance_estimator.fit()
+    Clusterer(distance_estimator, two_stage_affinity=True)
+    X = empty((len(signatures), 1), dtype=object)
+    X[:, 0] = signatures
+
+    assert allclose(_two_stage_affinity(X, step=4), _affinity(X))
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2019 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+from operator import attrgetter
+
+from click.testing import CliRunner
+from mock import patch
+
+from inspire_disambiguation.cli import cli
+from inspire_disambiguation.core.es.readers import (
+    get_curated_signature_blocks,
+    get_signatures,
+)
+from inspire_disambiguation.core.store import SignatureStore
+from tests.integration.conftest import FakeHit
+
+
+def _sorted_signatures(signatures):
+    return sorted(signatures, key=attrgetter("signature_uuid"))
+
+
+@patch("inspire_disambiguation.core.es.readers.LiteratureSearch.scan")
+def test_signature_store_returns_same_signatures_as_es(
+    scan_mock,
+    tmpdir,
+    es_record_with_2_curated_authors,
+    es_record_with_curated_author_and_no_recid,
+    es_record_with_non_curated_author,
+):
+    records = [
+        es_record_with_2_curated_authors,
+        es_record_with_curated_author_and_no_recid,
+        es_record_with_non_curated_author,
+    ]
+    scan_mock.side_effect = [records, records, records, records]
+    store = SignatureStore(str(tmpdir.join("signatures.db")))
+    store.refresh()
+
+    assert _sorted_signatures(store.get_signatures()) == _sorted_signatures(
+        get_signatures()
+    )
+    assert _sorted_signatures(
+        store.get_signatures(only_curated=True)
+    ) == _sorted_signatures(get_signatures(only_curated=True))
+    assert store.get_signatures(signature_block="JANa") == [
+        signature
+        for signature in store.get_signatures()
+        if signature.signature_block == "JANa"
+    ]
+    assert store.get_curated_signature_blocks() == get_curated_signature_blocks()
+
+
+@patch("inspire_disambiguation.core.es.readers.LiteratureSearch.scan")
+def test_signature_store_refreshes_updated_records(
+    scan_mock,
+    tmpdir,
+    es_record_with_2_curated_authors,
+    es_record_with_curated_author,
+):
+    es_record_with_2_curated_authors["_updated"] = "2021-01-01T10:00:00+00:00"
+    es_record_with_curated_author["_updated"] = "2021-01-02T10:00:00+00:00"
+    updated_record = FakeHit(es_record_with_2_curated_authors)
+    updated_record["_updated"] = "2021-01-03T10:00:00+00:00"
+    updated_record["authors"] = es_record_with_2_curated_authors["authors"][:1]
+    scan_mock.side_effect = [
+        [es_record_with_2_curated_authors, es_record_with_curated_author],
+        [updated_record],
+        [{"control_number": updated_record["control_number"]}],
+    ]
+    store = SignatureStore(str(tmpdir.join("signatures.db")))
+    store.refresh()
+    assert store.last_updated == "2021-01-02T10:00:00+00:00"
+
+    assert store.refresh(prune=True) == 1
+
+    signatures = store.get_signatures()
+    assert [signature.signature_uuid for signature in signatures] == [
+        "94fc2b0a-dc17-42c2-bae3-ca0024079e52"
+    ]
+    assert store.last_updated == "2021-01-03T10:00:00+00:00"
+
+
+@patch("inspire_disambiguation.core.es.readers.LiteratureSearch.scan")
+def test_refresh_signature_store_cli(
+    scan_mock, tmpdir, es_record_with_2_curated_authors
+):
+    scan_mock.side_effect = [[es_record_with_2_curated_authors]]
+    store_path = str(tmpdir.join("signatures.db"))
+
+    result = CliRunner().invoke(cli, ["refresh-signature-store", "-p", store_path])
+
+    assert result.exit_code == 0
+    assert len(SignatureStore(store_path).get_signatures()) == 2
@@ -91,6 +91,7 @@ def test_cluster_cli_function_default_params(cluster_from_redis_mock):
         conf["ETHNICITY_MODEL_PATH"],
         conf["DISTANCE_MODEL_PATH"],
         conf["CLUSTERING_N_JOBS"],
+        conf["CLUSTERING_BLOCK_WORKERS"],
     )
 
 
@@ -98,6 +99,9 @@ def test_cluster_cli_function_default_params(cluster_from_redis_mock):
 def test_cluster_cli_function_provided_params(cluster_from_redis_mock):
     runner = CliRunner()
     runner.invoke(
-        cli, ["cluster", "-e", "ethnicity_model", "-d", "distance_model", "-j", 8]
+        cli,
+        ["cluster", "-e", "ethnicity_model", "-d", "distance_model", "-j", 8, "-w", 4],
+    )
+    cluster_from_redis_mock.assert_called_with(
+        "ethnicity_model", "distance_model", 8, 4
     )
-    cluster_from_redis_mock.assert_called_with("ethnicity_model", "distance_model", 8)
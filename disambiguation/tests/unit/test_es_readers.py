@@ -22,6 +22,7 @@
 from inspire_disambiguation.core.es.readers import get_literature_records_query
 
 EXPECTED_SOURCE = [
+    "_updated",
     "abstracts.value",
     "affiliations.value",
     "authors.affiliations.value",
@@ -131,3 +132,21 @@ def test_get_lit_records_query_for_only_curated_signature_block():
     }
     assert query.to_dict() == expected_query
     assert source == EXPECTED_SOURCE
+
+
+def test_get_lit_records_query_for_updated_since():
+    query = get_literature_records_query(
+        None, False, updated_since="2021-01-01T10:00:00+00:00"
+    )
+    expected_query = {
+        "query": {
+            "bool": {
+                "must": [
+                    {"match": {"_collections": "Literature"}},
+                    {"nested": {"path": "authors", "query": {"match_all": {}}}},
+                    {"range": {"_updated": {"gte": "2021-01-01T10:00:00+00:00"}}},
+                ]
+            }
+        }
+    }
+    assert query.to_dict() == expected_query
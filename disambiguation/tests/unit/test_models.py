@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of INSPIRE.
+# Copyright (C) 2014-2019 CERN.
+#
+# INSPIRE is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# INSPIRE is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with INSPIRE. If not, see <http://www.gnu.org/licenses/>.
+#
+# In applying this license, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization
+# or submit itself to any jurisdiction.
+
+import numpy as np
+from mock import patch
+
+from inspire_disambiguation.core.ml.models import (
+    MemoryBoundedHierarchicalClustering,
+    _iter_pairs,
+    _sparse_average_linkage,
+)
+
+
+def _affinity(X):
+    i, j = np.triu_indices(len(X), k=1)
+    return np.abs(X[i, 0] - X[j, 0])
+
+
+def _iter_distances(X, step=10000):
+    for i, j in _iter_pairs(len(X), step):
+        yield i, j, np.abs(X[i, 0] - X[j, 0])
+
+
+@patch("inspire_disambiguation.core.ml.models._iter_distances", _iter_distances)
+def test_memory_bounded_clustering_clusters_components_of_big_blocks():
+    X = np.array([[0.0], [5.0], [0.3], [10.0], [5.2], [0.1]])
+    clusterer = MemoryBoundedHierarchicalClustering(
+        method="average", affinity=_affinity, threshold=0.5, max_block_size=3, step=4
+    )
+    clusterer.fit(X)
+
+    expected_labels = (
+        MemoryBoundedHierarchicalClustering(
+            method="average", affinity=_affinity, threshold=0.5
+        )
+        .fit(X)
+        .labels_
+    )
+    assert clusterer.components_labels_ is not None
+    assert len(set(clusterer.labels_)) == 3
+    assert len(set(zip(clusterer.labels_, expected_labels))) == 3
+    assert clusterer.components_best_thresholds_ == [0.5, 0.5]
+    assert clusterer.runtime_.total_seconds() >= 0
+
+
+@patch("inspire_disambiguation.core.ml.models._iter_distances", _iter_distances)
+def test_memory_bounded_clustering_splits_again_components_too_big():
+    X = np.array([[0.0], [0.4], [0.8], [1.2], [5.0], [5.1]])
+    clusterer = MemoryBoundedHierarchicalClustering(
+        method="average", affinity=_affinity, threshold=0.5, max_block_size=3
+    )
+    clusterer.fit(X)
+
+    assert len(set(clusterer.labels_[:4])) == 4
+    assert clusterer.labels_[4] == clusterer.labels_[5]
+    assert clusterer.components_best_thresholds_ == [0.5]
+
+
+@patch("inspire_disambiguation.core.ml.models._iter_distances", _iter_distances)
+def test_memory_bounded_clustering_clusters_whole_components_too_big_to_split():
+    X = np.array([[0.0], [0.0], [0.0], [0.0], [5.0]])
+    clusterer = MemoryBoundedHierarchicalClustering(
+        method="average", affinity=_affinity, threshold=0.5, max_block_size=3
+    )
+    clusterer.fit(X)
+
+    assert len(set(clusterer.labels_[:4])) == 1
+    assert clusterer.labels_[4] != clusterer.labels_[0]
+
+
+@patch("inspire_disambiguation.core.ml.models._iter_distances", _iter_distances)
+@patch("inspire_disambiguation.core.ml.models.ScipyHierarchicalClustering.fit")
+def test_memory_bounded_clustering_clusters_close_pairs_of_components_too_big(
+    mock_fit,
+):
+    X = np.array([[0.0], [0.4], [0.8], [1.2]])
+    clusterer = MemoryBoundedHierarchicalClustering(
+        method="average",
+        affinity=_affinity,
+        threshold=0.5,
+        max_block_size=2,
+        max_splits=0,
+    )
+    clusterer.fit(X)
+
+    mock_fit.assert_not_called()
+    assert clusterer.labels_[0] == clusterer.labels_[1]
+    assert clusterer.labels_[2] == clusterer.labels_[3]
+    assert clusterer.labels_[0] != clusterer.labels_[2]
+    assert clusterer.components_best_thresholds_ == [0.5]
+
+
+def test_sparse_average_linkage_counts_missing_pairs_at_max_distance():
+    rows = np.array([0, 1, 0])
+    columns = np.array([1, 2, 2])
+    distances = np.array([0.1, 0.2, 0.3])
+
+    labels = _sparse_average_linkage(4, rows, columns, distances, 0.5)
+    assert list(labels) == [0, 0, 0, 1]
+
+    labels = _sparse_average_linkage(4, rows[:2], columns[:2], distances[:2], 0.5)
+    assert labels[0] == labels[1] != labels[2]
+
+
+@patch("inspire_disambiguation.core.ml.models._iter_distances", _iter_distances)
+def test_memory_bounded_clustering_traces_peak_memory():
+    X = np.array([[0.0], [5.0], [0.3], [10.0], [5.2], [0.1]])
+    clusterer = MemoryBoundedHierarchicalClustering(
+        method="average", affinity=_affinity, threshold=0.5, max_block_size=3
+    )
+
+    assert clusterer.fit(X).peak_memory_ is None
+    assert clusterer.set_params(trace_memory=True).fit(X).peak_memory_ > 0
+
+
+def test_memory_bounded_clustering_keeps_small_blocks_whole():
+    X = np.array([[0.0], [5.0], [0.3]])
+    clusterer = MemoryBoundedHierarchicalClustering(
+        method="average", affinity=_affinity, threshold=0.5, max_block_size=3
+    )
+    clusterer.fit(X)
+
+    assert clusterer.components_labels_ is None
+    assert clusterer.labels_[0] == clusterer.labels_[2] != clusterer.labels_[1]